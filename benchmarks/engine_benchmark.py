@@ -0,0 +1,310 @@
+"""
+Latency / throughput benchmark for `TranslationEngine`.
+
+Runs offline against a tiny random NLLB-shaped model (see `fixture.py`), or against
+a local model folder passed with `--model`, and sweeps input length, `num_beams`,
+`max_length`, batch size and thread count. Results are written as JSON and can be
+compared with an earlier run:
+
+    python -m baligh.benchmarks.engine_benchmark --output before.json
+    python -m baligh.benchmarks.engine_benchmark --output after.json --compare before.json
+
+With `--tuned`, the thread settings stored for this host by `baligh.tune_threads`
+are applied and benchmarked; the stored settings are recorded in the results either way.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from .fixture import SRC_LANG, TGT_LANG, build_tiny_model, sample_text
+
+# Values swept when no override is given on the command line
+DEFAULT_SWEEP = {
+    "input_words": [8, 32, 128],
+    "num_beams": [1, 3],
+    "max_length": [64, 256],
+    "batch_size": [1, 8],
+    "threads": sorted({1, os.cpu_count() or 1}),
+}
+
+# The fields that identify a benchmark case when comparing two runs
+CASE_FIELDS = ("threads", "input_words", "batch_size", "num_beams", "max_length")
+
+
+def run_benchmark(model_path: str, sweep: dict = None, repeat: int = 10, warmup: int = 2,
+                  src_lang: str = SRC_LANG, tgt_lang: str = TGT_LANG, backend: str = "torch",
+                  precision: str = "fp32") -> dict:
+    """
+    Run every combination of the sweep and collect latency, throughput and memory figures.
+
+    For each case the engine first runs `warmup` untimed translations, then `repeat`
+    timed `translate_batch` calls. Time-to-first-token is measured with
+    `translate_stream` for greedy, single-input cases (streaming is not available
+    for beam search or batches).
+
+    Args:
+        model_path (str): The model folder to benchmark.
+        sweep (dict, optional): Lists of values for each of `CASE_FIELDS`.
+            Defaults to `DEFAULT_SWEEP`.
+        repeat (int, optional): Timed runs per case. Defaults to 10.
+        warmup (int, optional): Untimed runs per case. Defaults to 2.
+        src_lang (str, optional): The source language code. Defaults to "eng_Latn".
+        tgt_lang (str, optional): The target language code. Defaults to "fra_Latn".
+        backend (str, optional): The inference backend. Defaults to "torch".
+        precision (str, optional): The model precision. Defaults to "fp32".
+
+    Returns:
+        dict: {"meta": {...}, "results": [one dict per case]}.
+    """
+    import torch
+    from baligh.core.translation_engine import TranslationEngine
+
+    sweep = {**DEFAULT_SWEEP, **(sweep or {})}
+    results = []
+    engine = None
+    for threads in sweep["threads"]:
+        torch.set_num_threads(threads)
+        if engine is None or backend == "onnx":
+            # ONNX Runtime fixes its thread pool when the session is created
+            options = {"intra_op_threads": threads} if backend == "onnx" else None
+            engine = TranslationEngine(model_path, precision=precision, backend=backend, backend_options=options)
+            engine.backend = _CountingBackend(engine.backend)
+
+        for input_words, batch_size, num_beams, max_length in itertools.product(
+                sweep["input_words"], sweep["batch_size"], sweep["num_beams"], sweep["max_length"]):
+            texts = [sample_text(input_words, offset=i) for i in range(batch_size)]
+            case = {"threads": threads, "input_words": input_words, "batch_size": batch_size,
+                    "num_beams": num_beams, "max_length": max_length}
+            results.append({**case, **_run_case(engine, texts, src_lang, tgt_lang, num_beams, max_length,
+                                                repeat, warmup)})
+            print(_format_result(results[-1]), flush=True)
+
+    return {"meta": _environment(model_path, engine, backend, repeat, warmup), "results": results}
+
+
+def compare_results(current: dict, baseline: dict, max_regression: float = 0.10) -> int:
+    """
+    Print the change of every case between two runs and count the regressions.
+
+    Args:
+        current (dict): The result of `run_benchmark` for the new code.
+        baseline (dict): The result of an earlier run.
+        max_regression (float, optional): The relative p50 slowdown tolerated before a
+            case counts as a regression. Defaults to 0.10 (10%).
+
+    Returns:
+        int: The number of cases slower than the baseline by more than `max_regression`.
+    """
+    baseline_cases = {_case_key(result): result for result in baseline["results"]}
+    regressions = 0
+    print(f"{'case':<40} {'p50 before':>11} {'p50 after':>10} {'change':>8} {'tok/s change':>13}")
+    for result in current["results"]:
+        before = baseline_cases.get(_case_key(result))
+        if before is None:
+            continue
+        change = result["latency_ms"]["p50"] / before["latency_ms"]["p50"] - 1
+        throughput_change = result["tokens_per_s"] / before["tokens_per_s"] - 1 if before["tokens_per_s"] else 0.0
+        regressed = change > max_regression
+        regressions += regressed
+        print(f"{_case_label(result):<40} {before['latency_ms']['p50']:>9.1f}ms {result['latency_ms']['p50']:>8.1f}ms "
+              f"{change:>+8.1%} {throughput_change:>+13.1%}{'  REGRESSION' if regressed else ''}")
+    print(f"{regressions} regression(s) above {max_regression:.0%}")
+    return regressions
+
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak resident memory of this process in MiB, or None if unavailable.
+
+    Uses `resource` on Linux / macOS and `psutil` (if installed) on Windows.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def _run_case(engine, texts, src_lang, tgt_lang, num_beams, max_length, repeat, warmup):
+    """Time one sweep case and summarise it."""
+    for _ in range(warmup):
+        engine.translate_batch(texts, src_lang, tgt_lang, max_length, num_beams, batch_size=len(texts))
+
+    latencies = []
+    engine.backend.generated_tokens = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.translate_batch(texts, src_lang, tgt_lang, max_length, num_beams, batch_size=len(texts))
+        latencies.append(time.perf_counter() - start)
+    generated_tokens = engine.backend.generated_tokens
+
+    first_token_times = []
+    if num_beams == 1 and len(texts) == 1:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stream = engine.translate_stream(texts[0], src_lang, tgt_lang, max_length, num_beams)
+            next(stream, None)
+            first_token_times.append(time.perf_counter() - start)
+            stream.close()
+
+    return {
+        "latency_ms": _percentiles(latencies),
+        "tokens_per_s": generated_tokens / sum(latencies),
+        "output_tokens": generated_tokens / repeat,
+        "ttft_ms": _percentiles(first_token_times) if first_token_times else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _percentiles(seconds):
+    """p50 / p95 / p99 / mean of a list of durations, in milliseconds."""
+    import numpy as np
+
+    values = np.array(seconds) * 1000
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)), "mean": float(values.mean())}
+
+
+def _environment(model_path, engine, backend, repeat, warmup):
+    """Describe the machine and libraries, so runs are only compared like for like."""
+    import torch
+    import transformers
+    from baligh.core.thread_tuning import available_cores
+
+    return {
+        "model": model_path,
+        "model_id": engine.model_id,
+        "backend": backend,
+        "precision": engine.precision,
+        "repeat": repeat,
+        "warmup": warmup,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "inter_op_threads": torch.get_num_interop_threads(),
+        "cpu_affinity": available_cores(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _case_key(result):
+    return tuple(result[field] for field in CASE_FIELDS)
+
+
+def _case_label(result):
+    return (f"t={result['threads']} words={result['input_words']} batch={result['batch_size']} "
+            f"beams={result['num_beams']} max={result['max_length']}")
+
+
+def _format_result(result):
+    line = (f"{_case_label(result):<40} p50 {result['latency_ms']['p50']:8.1f} ms  "
+            f"p95 {result['latency_ms']['p95']:8.1f} ms  p99 {result['latency_ms']['p99']:8.1f} ms  "
+            f"{result['tokens_per_s']:8.1f} tok/s")
+    if result["ttft_ms"] is not None:
+        line += f"  ttft {result['ttft_ms']['p50']:6.1f} ms"
+    if result["peak_rss_mb"] is not None:
+        line += f"  rss {result['peak_rss_mb']:7.1f} MiB"
+    return line
+
+
+class _CountingBackend:
+    """
+    Wraps an inference backend and counts the tokens it generates.
+
+    Args:
+        backend (InferenceBackend): The backend to wrap.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.generated_tokens = 0
+
+    def generate(self, *args, **kwargs):
+        outputs = self.backend.generate(*args, **kwargs)
+        self.generated_tokens += sum(len(output) for output in outputs)
+        return outputs
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def _tuned_settings():
+    """This host's entry under `thread_tuning.hosts` in config.json, or None."""
+    from baligh.core.thread_tuning import host_key
+    from baligh.services.config_loader import load_config
+
+    try:
+        config = load_config()
+    except (OSError, ValueError):
+        return None
+    return config.get("thread_tuning", {}).get("hosts", {}).get(host_key())
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark TranslationEngine latency and throughput.")
+    parser.add_argument("--model", help="A local model folder. Defaults to a tiny random NLLB-shaped model.")
+    parser.add_argument("--src-lang", default=SRC_LANG)
+    parser.add_argument("--tgt-lang", default=TGT_LANG)
+    parser.add_argument("--backend", default="torch", choices=("torch", "onnx"))
+    parser.add_argument("--precision", default="fp32", choices=("fp32", "bf16", "int8"))
+    for field in CASE_FIELDS:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=_int_list,
+                            help=f"Comma-separated values (default {','.join(map(str, DEFAULT_SWEEP[field]))})")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per case")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="A previous results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Relative p50 slowdown that counts as a regression (default 0.10)")
+    parser.add_argument("--tuned", action="store_true",
+                        help="Run with this host's settings from `baligh.tune_threads` (threads and affinity)")
+    args = parser.parse_args(argv)
+
+    sweep = {field: getattr(args, field) for field in CASE_FIELDS if getattr(args, field)}
+    tuned = _tuned_settings()
+    if args.tuned:
+        if tuned is None:
+            print("Error: no tuned thread settings for this host; run `python -m baligh.tune_threads` first")
+            return 1
+        from baligh.core.thread_tuning import apply_thread_settings
+        apply_thread_settings(cpu_affinity=tuned.get("cpu_affinity"))
+        sweep.setdefault("threads", [tuned["intra_op_threads"]])
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        model_path = args.model or build_tiny_model(fixture_dir)
+        results = run_benchmark(model_path, sweep, args.repeat, args.warmup, args.src_lang, args.tgt_lang,
+                                args.backend, args.precision)
+    if not args.model:
+        results["meta"]["model"] = "tiny-random-nllb"
+    results["meta"]["tuned_threads"] = tuned
+    results["meta"]["tuned_applied"] = args.tuned
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare_results(results, baseline, args.max_regression) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+
+# Fixed English text used both as benchmark input and as the fixture's vocabulary
+SAMPLE_TEXT = (
+    "The quick brown fox jumps over the lazy dog while the old farmer watches from the porch . "
+    "Every morning he walks to the river , fills two buckets with cold water and carries them home . "
+    "His neighbours say that the weather will change soon , but nobody knows when the rain will come ."
+)
+
+# Languages the fixture is benchmarked with (NLLB codes)
+SRC_LANG = "eng_Latn"
+TGT_LANG = "fra_Latn"
+
+
+def sample_text(num_words: int, offset: int = 0) -> str:
+    """
+    Build a deterministic input of exactly `num_words` words by repeating `SAMPLE_TEXT`.
+
+    Args:
+        num_words (int): The number of words (and punctuation marks) in the result.
+        offset (int, optional): The word of `SAMPLE_TEXT` to start from, so the inputs
+            of a batch differ. Defaults to 0.
+
+    Returns:
+        str: The input text.
+    """
+    words = SAMPLE_TEXT.split()
+    return " ".join(words[(offset + i) % len(words)] for i in range(num_words))
+
+
+def build_tiny_model(out_dir: str, seed: int = 0) -> str:
+    """
+    Write a tiny, randomly initialised NLLB-shaped model (M2M100 + NLLB tokenizer).
+
+    The model has the same architecture and special tokens as NLLB, but only two
+    layers of width 32 and a word-level vocabulary built from `SAMPLE_TEXT`, so it
+    loads in milliseconds and runs offline. Its translations are meaningless; it only
+    exercises the same code paths as the real model. The weights depend only on
+    `seed`, so results are comparable between runs.
+
+    Args:
+        out_dir (str): The folder to write the model to (created if needed).
+        seed (int, optional): The random seed for the weights. Defaults to 0.
+
+    Returns:
+        str: `out_dir`, usable as a `TranslationEngine` model path.
+    """
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import M2M100Config, M2M100ForConditionalGeneration, NllbTokenizerFast
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Word-level vocabulary; NllbTokenizerFast appends the language codes after it
+    vocab = {"<s>": 0, "<pad>": 1, "</s>": 2, "<unk>": 3}
+    for word in dict.fromkeys(SAMPLE_TEXT.split()):
+        vocab["▁" + word] = len(vocab)
+    word_tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    word_tokenizer.pre_tokenizer = pre_tokenizers.Metaspace()
+    word_tokenizer.decoder = decoders.Metaspace()
+    tokenizer_file = os.path.join(out_dir, "tokenizer.json")
+    word_tokenizer.save(tokenizer_file)
+    tokenizer = NllbTokenizerFast(tokenizer_file=tokenizer_file, src_lang=SRC_LANG, tgt_lang=TGT_LANG)
+    tokenizer.save_pretrained(out_dir)
+
+    config = M2M100Config(
+        vocab_size=len(tokenizer), d_model=32, encoder_layers=2, decoder_layers=2,
+        encoder_attention_heads=4, decoder_attention_heads=4, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        max_position_embeddings=1024, decoder_start_token_id=2, pad_token_id=1, bos_token_id=0,
+        eos_token_id=2, init_std=0.2,
+    )
+    torch.manual_seed(seed)
+    model = M2M100ForConditionalGeneration(config)
+    with torch.no_grad():
+        # Damp the language-code embeddings so outputs vary with the input text
+        model.model.shared.weight[len(vocab):] *= 0.01
+    model.save_pretrained(out_dir)
+    return out_dir
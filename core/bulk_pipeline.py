@@ -0,0 +1,296 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from .text_segmenter import segment_text
+
+# Supported input formats
+FORMATS = ("text", "jsonl")
+
+
+class BulkTranslator:
+    """
+    Translates large text or JSONL files with bounded memory and resumable progress.
+
+    The file flows through a pipeline of generators:
+
+    read records -> segment into sentences -> drop duplicate sentences -> form batches
+    -> tokenize -> `generate` -> decode -> reassemble records -> write
+
+    Reading, segmenting and tokenizing run on a producer thread, at most `prefetch`
+    batches ahead of generation, so the next batch is tokenized while the current
+    one generates and memory does not grow with the file size. Each distinct
+    sentence is translated once; later copies reuse the translation (within a bounded
+    window of `dedup_entries` sentences).
+
+    Progress is saved to a checkpoint file every `checkpoint_every` records; running
+    the same job again resumes after the last checkpoint.
+
+    Attributes:
+        engine (TranslationEngine): The engine that runs the model.
+        src_lang (str): The source language code.
+        tgt_lang (str): The target language code.
+        max_length (int): The maximum number of tokens generated per sentence.
+        num_beams (int): The beam search width.
+        batch_size (int): The number of distinct sentences per batch.
+        max_batch_tokens (int): The maximum padded input tokens per `generate` call.
+        prefetch (int): How many tokenized batches may wait for generation.
+        dedup_entries (int): How many sentence translations are remembered for reuse.
+    """
+    def __init__(self, engine, src_lang, tgt_lang, max_length=500, num_beams=1, batch_size=32,
+                 max_batch_tokens=4096, prefetch=2, dedup_entries=100000):
+        """
+        Initialize the translator.
+
+        Args:
+            engine (TranslationEngine): The engine that runs the model.
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+            max_length (int, optional): Maximum tokens per sentence. Defaults to 500.
+            num_beams (int, optional): The beam search width. Defaults to 1.
+            batch_size (int, optional): Distinct sentences per batch. Defaults to 32.
+            max_batch_tokens (int, optional): Padded input tokens per `generate` call.
+                Defaults to 4096.
+            prefetch (int, optional): Tokenized batches kept ready. Defaults to 2.
+            dedup_entries (int, optional): Sentence translations kept for reuse.
+                Defaults to 100000.
+        """
+        self.engine = engine
+        self.src_lang = src_lang
+        self.tgt_lang = tgt_lang
+        self.max_length = max_length
+        self.num_beams = num_beams
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.prefetch = prefetch
+        self.dedup_entries = dedup_entries
+
+    def translate_file(self, input_path, output_path, file_format="auto", field="text", output_field=None,
+                       checkpoint_path=None, checkpoint_every=500, resume=True, progress=None) -> dict:
+        """
+        Translate a file record by record, writing the output in input order.
+
+        - "text": every line is one record; empty lines stay empty.
+        - "jsonl": every line is a JSON object; `field` is translated and stored in
+          `output_field` (or replaces `field` when `output_field` is None).
+
+        Args:
+            input_path (str): The file to translate.
+            output_path (str): Where to write the translation.
+            file_format (str, optional): "text", "jsonl" or "auto" (by extension).
+                Defaults to "auto".
+            field (str, optional): The JSONL field to translate. Defaults to "text".
+            output_field (str, optional): The JSONL field to write. Defaults to `field`.
+            checkpoint_path (str, optional): The checkpoint file. Defaults to
+                `<output_path>.checkpoint.json`.
+            checkpoint_every (int, optional): Records between checkpoints. Defaults to 500.
+            resume (bool, optional): Continue from an existing checkpoint. Defaults to True.
+            progress (Callable[[dict], None], optional): Called with the running
+                statistics at every checkpoint.
+
+        Returns:
+            dict: Statistics: `records`, `segments`, `translated_segments` (distinct
+            sentences sent to the model), `resumed_from` and `seconds`.
+
+        Raises:
+            ValueError: If the format is unknown, the checkpoint belongs to a
+                different job, or a JSONL line is not a JSON object.
+        """
+        if file_format == "auto":
+            file_format = "jsonl" if input_path.lower().endswith((".jsonl", ".ndjson")) else "text"
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format '{file_format}', expected one of {FORMATS}")
+        checkpoint_path = checkpoint_path or output_path + ".checkpoint.json"
+        job = {"input": os.path.abspath(input_path), "format": file_format, "field": field,
+               "output_field": output_field, "src_lang": self.src_lang, "tgt_lang": self.tgt_lang,
+               "max_length": self.max_length, "num_beams": self.num_beams, "model_id": self.engine.model_id}
+
+        start_record, output_bytes = 0, 0
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint["job"] != job:
+                raise ValueError(f"Checkpoint {checkpoint_path} was written for a different job; "
+                                 f"delete it or disable resuming")
+            start_record, output_bytes = checkpoint["records_done"], checkpoint["output_bytes"]
+            if not os.path.exists(output_path) or os.path.getsize(output_path) < output_bytes:
+                raise ValueError(f"Output {output_path} is missing or shorter than its checkpoint; "
+                                 f"delete {checkpoint_path} to start over")
+
+        stats = {"records": start_record, "segments": 0, "translated_segments": 0, "resumed_from": start_record}
+        started = time.perf_counter()
+        with open(output_path, "ab" if start_record else "wb") as output:
+            # Drop anything written after the last checkpoint
+            output.truncate(output_bytes)
+            output.seek(output_bytes)
+
+            records = _read_records(input_path, file_format, field, start_record)
+            for record_text in self._translate_records(records, stats):
+                output.write(_format_record(record_text, field, output_field))
+                stats["records"] += 1
+                if (stats["records"] - start_record) % checkpoint_every == 0:
+                    _write_checkpoint(checkpoint_path, job, stats["records"], output)
+                    if progress is not None:
+                        progress(stats)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        stats["seconds"] = time.perf_counter() - started
+        return stats
+
+    def _translate_records(self, records, stats):
+        """
+        Run the pipeline over (record, text) pairs.
+
+        Yields:
+            tuple: (record, translated text) in input order.
+        """
+        translations = OrderedDict()
+        work = queue.Queue(maxsize=self.prefetch)
+        stop_event = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(records, work, stop_event, stats), daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                kind, payload = item
+                if kind == "error":
+                    raise payload
+                if kind == "batch":
+                    texts, encoded = payload
+                    for text, translation in zip(texts, self.engine.translate_encoded(
+                            encoded, self.src_lang, self.tgt_lang, self.max_length, self.num_beams,
+                            batch_size=len(texts), max_batch_tokens=self.max_batch_tokens)):
+                        _remember(translations, text, translation, self.dedup_entries)
+                else:
+                    record, document = payload
+                    yield record, document.reassemble([self._lookup(translations, segment)
+                                                       for segment in document.segments])
+        finally:
+            stop_event.set()
+            # Unblock the producer if it is waiting on a full queue
+            while producer.is_alive():
+                try:
+                    work.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def _produce(self, records, work, stop_event, stats):
+        """
+        Producer thread: segment records, batch new sentences and tokenize them.
+
+        A record is queued only after the batch holding its last new sentence, so the
+        consumer always has every translation a record needs when it reaches it.
+        """
+        scheduled = OrderedDict()
+        batch, held = [], []
+
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    work.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def flush():
+            if batch:
+                encoded = self.engine.encode(batch, self.src_lang)
+                stats["translated_segments"] += len(batch)
+                if not put(("batch", (list(batch), encoded))):
+                    return False
+                batch.clear()
+            for record in held:
+                if not put(("record", record)):
+                    return False
+            held.clear()
+            return True
+
+        try:
+            for record, text in records:
+                document = segment_text(text)
+                stats["segments"] += len(document.segments)
+                for segment in document.segments:
+                    if segment not in scheduled:
+                        _remember(scheduled, segment, True, self.dedup_entries)
+                        batch.append(segment)
+                held.append((record, document))
+                if len(batch) >= self.batch_size and not flush():
+                    return
+            if flush():
+                put(None)
+        except Exception as e:
+            put(("error", e))
+
+    def _lookup(self, translations, segment):
+        """Return a sentence's translation, translating it again if it left the dedup window."""
+        translation = translations.get(segment)
+        if translation is None:
+            translation = self.engine.translate_batch([segment], self.src_lang, self.tgt_lang, self.max_length,
+                                                      self.num_beams)[0]
+            _remember(translations, segment, translation, self.dedup_entries)
+        return translation
+
+
+def _remember(entries, key, value, capacity):
+    """Insert into a bounded insertion-ordered dict, evicting the oldest entries."""
+    entries[key] = value
+    entries.move_to_end(key)
+    while len(entries) > capacity:
+        entries.popitem(last=False)
+
+
+def _read_records(path, file_format, field, start_record):
+    """
+    Stream (record, text) pairs from a file, skipping the first `start_record` records.
+
+    For "text" the record is None; for "jsonl" it is the parsed object (None for
+    blank lines, which are copied through).
+
+    Raises:
+        ValueError: If a JSONL line is not a JSON object with a string (or missing)
+            `field`; the message names the line.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if index < start_record:
+                continue
+            line = line.rstrip("\r\n")
+            if file_format == "text" or not line.strip():
+                yield None, line
+            else:
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}, line {index + 1}: invalid JSON: {e}")
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path}, line {index + 1}: expected a JSON object, "
+                                     f"got {type(record).__name__}")
+                text = record.get(field) or ""
+                if not isinstance(text, str):
+                    raise ValueError(f"{path}, line {index + 1}: field '{field}' is not a string")
+                yield record, text
+
+
+def _format_record(record_text, field, output_field):
+    """Serialize one translated record as an output line."""
+    record, translation = record_text
+    if record is None:
+        return (translation + "\n").encode("utf-8")
+    record[output_field or field] = translation
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _write_checkpoint(checkpoint_path, job, records_done, output):
+    """Flush the output to disk and record how far the job got (atomically)."""
+    output.flush()
+    os.fsync(output.fileno())
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"job": job, "records_done": records_done, "output_bytes": output.tell()}, f)
+    os.replace(temp_path, checkpoint_path)
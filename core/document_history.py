@@ -0,0 +1,86 @@
+import difflib
+import threading
+from collections import OrderedDict
+
+
+class DocumentHistory:
+    """
+    The segments and translations of the last documents, for incremental re-translation.
+
+    When a slightly edited version of a recent text comes in, its segments are
+    aligned with the previous version (`difflib.SequenceMatcher` over whole
+    segments) and the translations of unchanged segments are reused; only inserted
+    or edited segments still need the model.
+
+    One document is kept per (src_lang, tgt_lang, max_length, num_beams), for the
+    `max_documents` most recently used settings.
+
+    Attributes:
+        max_documents (int): How many documents are kept.
+    """
+    def __init__(self, max_documents: int = 8):
+        """
+        Initialize an empty history.
+
+        Args:
+            max_documents (int, optional): How many documents are kept. Defaults to 8.
+        """
+        self.max_documents = max_documents
+        # (src_lang, tgt_lang, max_length, num_beams) => (segments, translations); order = recency
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reuse(self, segments, src_lang, tgt_lang, max_length, num_beams) -> list:
+        """
+        Find the translations of the segments that did not change since the last document.
+
+        Args:
+            segments (list[str]): The segments of the new document.
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            max_length (int): The generation length the translations were made with.
+            num_beams (int): The beam width the translations were made with.
+
+        Returns:
+            list[str or None]: One entry per segment: the previous translation, or None
+            if the segment is new or edited.
+        """
+        key = (src_lang, tgt_lang, max_length, num_beams)
+        with self._lock:
+            previous = self._documents.get(key)
+            if previous is not None:
+                self._documents.move_to_end(key)
+        reused = [None] * len(segments)
+        if previous is None:
+            return reused
+
+        previous_segments, previous_translations = previous
+        matcher = difflib.SequenceMatcher(None, previous_segments, segments, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == "equal":
+                reused[new_start:new_end] = previous_translations[old_start:old_end]
+        return reused
+
+    def record(self, segments, translations, src_lang, tgt_lang, max_length, num_beams):
+        """
+        Remember a translated document as the one the next text is compared with.
+
+        Args:
+            segments (list[str]): The segments of the document.
+            translations (list[str]): One translation per segment.
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            max_length (int): The generation length used.
+            num_beams (int): The beam width used.
+        """
+        key = (src_lang, tgt_lang, max_length, num_beams)
+        with self._lock:
+            self._documents[key] = (list(segments), list(translations))
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        """Forget every document."""
+        with self._lock:
+            self._documents.clear()
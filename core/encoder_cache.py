@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+
+class EncoderCache:
+    """
+    Memory-bounded LRU of encoder hidden states, keyed by source language and tokens.
+
+    The encoder output of NLLB does not depend on the target language, so translating
+    the same text into another language only needs to run the decoder again. Entries
+    are the unpadded hidden states of one input (a NumPy array of shape
+    (tokens, hidden size)); the least recently used entries are evicted once their
+    total size exceeds `max_bytes`.
+
+    Attributes:
+        max_bytes (int): The memory budget of the cached arrays.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to run the encoder.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int, optional): The memory budget. Defaults to 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(src_lang, input_ids, model_id=None) -> tuple:
+        """
+        Build the key of one tokenized input.
+
+        Args:
+            src_lang (str): The source language code.
+            input_ids (list[int]): The unpadded token ids of the input.
+            model_id (str, optional): The model that encodes it, so engines of
+                different models can share one cache. Defaults to None.
+
+        Returns:
+            tuple: A hashable key.
+        """
+        return model_id, src_lang, tuple(input_ids)
+
+    def get(self, key):
+        """
+        Look up the hidden states of an input.
+
+        Args:
+            key (tuple): A key from `make_key`.
+
+        Returns:
+            numpy.ndarray or None: The hidden states, or None on a miss.
+        """
+        with self._lock:
+            states = self._entries.get(key)
+            if states is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return states
+
+    def put(self, key, states):
+        """
+        Store the hidden states of an input, evicting the least recently used entries.
+
+        Arrays larger than the whole budget are not stored.
+
+        Args:
+            key (tuple): A key from `make_key`.
+            states (numpy.ndarray): The unpadded hidden states of the input.
+        """
+        if states.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = states
+            self._bytes += states.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss counters and current size.
+
+        Returns:
+            dict: Keys `hits`, `misses`, `entries` and `bytes`.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,255 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from .thread_tuning import available_cores, pin_to_cores
+
+# Engine methods a pool worker may run
+POOL_METHODS = ("translate", "translate_batch", "translate_document")
+
+# Set in the parent just before forking, so forked workers reuse the loaded engine
+_FORKED_ENGINE = None
+
+
+class EnginePool:
+    """
+    Runs N `TranslationEngine` processes, each pinned to its own slice of CPU cores.
+
+    One engine cannot keep a many-core CPU busy: `generate` is largely serial per
+    request, and the Python work between decoding steps caps throughput. The pool
+    runs several engines side by side, each with as many intra-op threads (torch's
+    or ONNX Runtime's) as there are cores in its slice.
+
+    With the torch backend the model weights are shared rather than copied per worker:
+
+    - Where `fork` is available (Linux), the engine is loaded once in the parent and
+      the workers are forked from it; the weights are shared copy-on-write.
+    - Elsewhere (Windows, macOS), every worker loads the model itself. The weights are
+      memory-mapped from the same safetensors file (see `load_model`), so the
+      processes share the operating system's page cache.
+
+    With the ONNX backend every worker creates its own sessions: their thread pools
+    are sized when a session is created and do not survive a fork.
+
+    Tasks go to a single queue that idle workers pull from, so work always lands on
+    a free worker. Tasks cannot be cancelled once submitted.
+
+    Attributes:
+        num_workers (int): The number of worker processes.
+        core_slices (list[list[int]]): The CPU cores each worker is pinned to.
+        model_id (str): The `model_id` of the workers' engines.
+        precision (str): The precision the workers' engines run in.
+        language_codes (frozenset[str]): The `language_codes` of the workers' engines.
+    """
+    def __init__(self, engine_kwargs: dict, num_workers: int = None, threads_per_worker: int = None,
+                 start_method: str = None):
+        """
+        Start the workers and wait until every one of them has loaded the engine.
+
+        Args:
+            engine_kwargs (dict): Keyword arguments for `TranslationEngine` (model_path,
+                precision, backend, backend_options). Workers always run on the CPU.
+            num_workers (int, optional): The number of processes. Defaults to one per
+                four available cores (at least one).
+            threads_per_worker (int, optional): Intra-op threads per worker. Defaults to
+                the size of the worker's core slice.
+            start_method (str, optional): "fork" or "spawn". Defaults to "fork" where
+                available, "spawn" otherwise.
+
+        Raises:
+            RuntimeError: If a worker fails to load the engine.
+        """
+        global _FORKED_ENGINE
+
+        cores = available_cores()
+        self.num_workers = num_workers or max(1, len(cores) // 4)
+        self.core_slices = _split_cores(cores, self.num_workers)
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(start_method)
+
+        # The Rust tokenizer's own thread pool does not survive a fork
+        os.environ["TOKENIZERS_PARALLELISM"] = "false"
+        engine_kwargs = {**engine_kwargs, "device": None}
+        parent_threads = None
+        if start_method == "fork" and engine_kwargs.get("backend", "torch") == "torch":
+            import torch
+            from .translation_engine import TranslationEngine
+
+            # GNU OpenMP hangs in a child forked after the parent started its thread pool,
+            # so the parent loads the engine on one thread and the workers start their own
+            parent_threads = torch.get_num_threads()
+            _FORKED_ENGINE = TranslationEngine(**_worker_engine_kwargs(engine_kwargs, 1))
+
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._futures = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._processes = []
+        try:
+            for index, core_slice in enumerate(self.core_slices):
+                process = context.Process(
+                    target=_worker_main, name=f"baligh-engine-{index}", daemon=True,
+                    args=(index, core_slice, threads_per_worker or len(core_slice), engine_kwargs,
+                          self._tasks, self._results))
+                process.start()
+                self._processes.append(process)
+        finally:
+            # Workers hold their own reference; the parent does not need the engine
+            _FORKED_ENGINE = None
+            if parent_threads is not None:
+                torch.set_num_threads(parent_threads)
+
+        self.model_id = self.precision = self.language_codes = None
+        ready = 0
+        while ready < len(self._processes):
+            try:
+                status, index, detail = self._results.get(timeout=1)
+            except queue.Empty:
+                dead = [process.name for process in self._processes if process.exitcode is not None]
+                if dead:
+                    self.shutdown()
+                    raise RuntimeError(f"Engine workers exited while loading: {', '.join(dead)}")
+                continue
+            if status == "failed":
+                self.shutdown()
+                raise RuntimeError(f"Engine worker {index} failed to load: {detail}")
+            self.model_id, self.precision, self.language_codes = detail
+            ready += 1
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        """
+        Run an engine method on the next idle worker.
+
+        Args:
+            method (str): One of `POOL_METHODS` (e.g., "translate_batch").
+            *args, **kwargs: The method's arguments (must be picklable; no cancel events).
+
+        Returns:
+            concurrent.futures.Future: Resolves to the method's return value, or raises
+            the exception it raised.
+
+        Raises:
+            ValueError: If `method` is not one of `POOL_METHODS`.
+        """
+        if method not in POOL_METHODS:
+            raise ValueError(f"Unknown engine method '{method}', expected one of {POOL_METHODS}")
+        future = Future()
+        with self._lock:
+            task_id = next(self._task_ids)
+            self._futures[task_id] = future
+        self._tasks.put((task_id, method, args, kwargs))
+        return future
+
+    def supports_pair(self, src_lang, tgt_lang) -> bool:
+        """`TranslationEngine.supports_pair` of the workers' engines."""
+        return not self.language_codes or (src_lang in self.language_codes and tgt_lang in self.language_codes)
+
+    def translate_batch(self, texts, src_lang, tgt_lang, max_length=500, num_beams=3, batch_size=16,
+                        max_batch_tokens=4096) -> list:
+        """Blocking `TranslationEngine.translate_batch` on the next idle worker."""
+        return self.submit("translate_batch", texts, src_lang, tgt_lang, max_length, num_beams,
+                           batch_size, max_batch_tokens).result()
+
+    def translate_document(self, text, src_lang, tgt_lang, max_length=500, num_beams=3) -> str:
+        """Blocking `TranslationEngine.translate_document` on the next idle worker."""
+        return self.submit("translate_document", text, src_lang, tgt_lang, max_length, num_beams).result()
+
+    def shutdown(self):
+        """Stop the workers after their current task and fail unfinished futures."""
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._results.put(None)
+        with self._lock:
+            for future in self._futures.values():
+                future.set_exception(RuntimeError("Engine pool shut down"))
+            self._futures.clear()
+
+    def _collect_results(self):
+        """Resolve futures as workers report results (runs on a daemon thread)."""
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            task_id, succeeded, value = message
+            with self._lock:
+                future = self._futures.pop(task_id, None)
+            if future is None:
+                continue
+            if succeeded:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+def _worker_main(index, cores, threads, engine_kwargs, tasks, results):
+    """Entry point of a worker process: pin, load (or inherit) the engine, serve tasks."""
+    pin_to_cores(cores)
+    engine = _FORKED_ENGINE
+    if engine is not None:
+        # The inherited torch engine: resize the thread pool it was loaded with
+        import torch
+        torch.set_num_threads(threads)
+    else:
+        try:
+            from .translation_engine import TranslationEngine
+            engine = TranslationEngine(**_worker_engine_kwargs(engine_kwargs, threads))
+        except Exception as e:
+            results.put(("failed", index, str(e)))
+            return
+    results.put(("ready", index, (engine.model_id, engine.precision, engine.language_codes)))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, method, args, kwargs = task
+        try:
+            results.put((task_id, True, getattr(engine, method)(*args, **kwargs)))
+        except Exception as e:
+            # Exceptions are pickled back to the parent; fall back to a plain error if that fails
+            try:
+                results.put((task_id, False, e))
+            except Exception:
+                results.put((task_id, False, RuntimeError(repr(e))))
+
+
+def _worker_engine_kwargs(engine_kwargs, threads):
+    """
+    The engine arguments of a worker, with its thread count in the backend options.
+
+    Both backends take `intra_op_threads`; a configured `cpu_affinity` is dropped
+    because it would undo the worker's own core slice.
+    """
+    backend_options = dict(engine_kwargs.get("backend_options") or {})
+    backend_options.pop("cpu_affinity", None)
+    backend_options["intra_op_threads"] = threads
+    return {**engine_kwargs, "backend_options": backend_options}
+
+
+def _split_cores(cores, num_workers):
+    """
+    Split cores into `num_workers` contiguous slices of (almost) equal size.
+
+    With more workers than cores, workers get one core each, round-robin.
+    """
+    if num_workers >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(num_workers)]
+    size, extra = divmod(len(cores), num_workers)
+    slices, start = [], 0
+    for i in range(num_workers):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cores[start:end])
+        start = end
+    return slices
@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import threading
+
+
+class GenerationBudget:
+    """
+    Derives how many tokens a translation may generate from the length of its input.
+
+    A fixed `max_length` lets a degenerate, repetitive decode of a three-word input
+    run for hundreds of steps. Instead, every input gets
+
+        max_new_tokens = ceil(input_tokens × ratio × margin) + slack_tokens
+
+    where `ratio` is the typical output/input token ratio of the language pair. The
+    ratio starts at `default_ratio` and is learned (as an exponential moving average)
+    from translations that ended on their own, so truncated or degenerate outputs do
+    not skew it. The learned ratios are saved to a JSON file and reloaded on start.
+
+    Attributes:
+        default_ratio (float): The ratio used for pairs without observations.
+        margin (float): Head room above the expected length.
+        slack_tokens (int): Extra tokens allowed for every input (matters for short inputs).
+        smoothing (float): The weight of each new observation in the moving average.
+        path (str or None): Where the learned ratios are saved.
+    """
+    def __init__(self, default_ratio: float = 1.3, margin: float = 1.5, slack_tokens: int = 10,
+                 smoothing: float = 0.05, path: str = None, save_every: int = 50):
+        """
+        Initialize the budget and load previously learned ratios.
+
+        Args:
+            default_ratio (float, optional): Initial output/input ratio. Defaults to 1.3.
+            margin (float, optional): Multiplier above the expected length. Defaults to 1.5.
+            slack_tokens (int, optional): Tokens added to every budget. Defaults to 10.
+            smoothing (float, optional): Moving average weight. Defaults to 0.05.
+            path (str, optional): JSON file for the learned ratios. Defaults to None
+                (ratios are kept in memory only).
+            save_every (int, optional): Observations between saves. Defaults to 50.
+        """
+        self.default_ratio = default_ratio
+        self.margin = margin
+        self.slack_tokens = slack_tokens
+        self.smoothing = smoothing
+        self.path = path
+        self.save_every = save_every
+        self._ratios = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._ratios = {key: float(value) for key, value in json.load(f).items()}
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Warning: could not load length ratios from {path}: {e}")
+
+    def ratio(self, src_lang: str, tgt_lang: str) -> float:
+        """
+        Return the current output/input token ratio of a language pair.
+
+        Args:
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+
+        Returns:
+            float: The learned ratio, or `default_ratio` if the pair is new.
+        """
+        with self._lock:
+            return self._ratios.get(_pair_key(src_lang, tgt_lang), self.default_ratio)
+
+    def max_new_tokens(self, src_lang: str, tgt_lang: str, input_tokens: int) -> int:
+        """
+        Return the generation budget for an input.
+
+        Args:
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            input_tokens (int): The number of input tokens, special tokens excluded.
+
+        Returns:
+            int: The maximum number of tokens to generate, special tokens excluded.
+        """
+        return math.ceil(input_tokens * self.ratio(src_lang, tgt_lang) * self.margin) + self.slack_tokens
+
+    def observe(self, src_lang: str, tgt_lang: str, input_tokens: int, output_tokens: int):
+        """
+        Learn from a translation that ended on its own (not cut off by a limit).
+
+        Args:
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            input_tokens (int): Input tokens, special tokens excluded.
+            output_tokens (int): Generated tokens, special tokens excluded.
+        """
+        if input_tokens <= 0 or output_tokens <= 0:
+            return
+        key = _pair_key(src_lang, tgt_lang)
+        with self._lock:
+            previous = self._ratios.get(key, self.default_ratio)
+            self._ratios[key] = previous + self.smoothing * (output_tokens / input_tokens - previous)
+            self._unsaved += 1
+            save = self.path and self._unsaved >= self.save_every
+        if save:
+            self.save()
+
+    def save(self):
+        """Write the learned ratios to `path` (atomically)."""
+        if not self.path:
+            return
+        with self._lock:
+            ratios = dict(self._ratios)
+            self._unsaved = 0
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(ratios, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: could not save length ratios to {self.path}: {e}")
+
+
+def _pair_key(src_lang, tgt_lang):
+    return f"{src_lang}->{tgt_lang}"
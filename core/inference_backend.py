@@ -0,0 +1,108 @@
+import importlib
+
+# Backend name => (module, class) implementing it; modules are imported on first use
+BACKENDS = {
+    "torch": (".torch_backend", "TorchBackend"),
+    "onnx": (".onnx_backend", "OnnxBackend"),
+}
+
+
+class InferenceBackend:
+    """
+    Interface between `TranslationEngine` and the library that actually runs the model.
+
+    The engine owns tokenization, batching and decoding of text; a backend only turns
+    padded token ids into generated token ids. Implementations:
+
+    - `TorchBackend`: PyTorch and `model.generate` (the default).
+    - `OnnxBackend`: ONNX Runtime with greedy or beam decoding written in NumPy.
+
+    Attributes:
+        name (str): The backend name used in `config.json` (e.g., "torch").
+        precision (str): The numeric precision the model actually runs in.
+    """
+    name = None
+    precision = "fp32"
+
+    def encode(self, input_ids, attention_mask):
+        """
+        Run only the encoder on a padded batch of inputs.
+
+        Args:
+            input_ids (numpy.ndarray): int64 array of shape (batch, length), right-padded.
+            attention_mask (numpy.ndarray): int64 array of the same shape; 0 marks padding.
+
+        Returns:
+            numpy.ndarray: float32 hidden states of shape (batch, length, hidden size).
+        """
+        raise NotImplementedError
+
+    def generate(self, input_ids, attention_mask, forced_bos_token_id, max_length, num_beams,
+                 stop_events=(), on_tokens=None, deadline=None, encoder_hidden_states=None) -> list:
+        """
+        Generate output token ids for a padded batch of inputs.
+
+        Args:
+            input_ids (numpy.ndarray): int64 array of shape (batch, length), right-padded.
+            attention_mask (numpy.ndarray): int64 array of the same shape; 0 marks padding.
+            forced_bos_token_id (int or None): The token forced as the first generated
+                token (the target language code for NLLB).
+            max_length (int): The maximum output length, including the start tokens.
+            num_beams (int): The beam search width (1 means greedy decoding).
+            stop_events (Iterable[threading.Event], optional): Generation stops at the
+                next step once any of these events is set.
+            on_tokens (Callable[[list[int]], None], optional): Called with newly generated
+                token ids after every step. Only supported for a batch of one with greedy
+                decoding.
+            deadline (float, optional): A `time.monotonic()` value; generation stops at
+                the next step once it has passed and returns the best output so far.
+            encoder_hidden_states (numpy.ndarray, optional): The output of `encode` for
+                these inputs; when given, the encoder is not run again.
+
+        Returns:
+            list[list[int]]: The generated token ids of every input, special tokens included.
+        """
+        raise NotImplementedError
+
+
+def create_backend(name: str, model_path: str, device=None, precision: str = "fp32", **options) -> InferenceBackend:
+    """
+    Instantiate the inference backend selected in the configuration.
+
+    Args:
+        name (str): One of the keys of `BACKENDS` ("torch" or "onnx").
+        model_path (str): The path to the pretrained translation model.
+        device (torch.device, optional): The device for backends that support one.
+        precision (str, optional): The requested numeric precision. Defaults to "fp32".
+        **options: Backend-specific settings (e.g., thread counts for ONNX Runtime).
+
+    Returns:
+        InferenceBackend: The loaded backend.
+
+    Raises:
+        ValueError: If `name` is not a known backend.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {tuple(BACKENDS)}")
+    module_name, class_name = BACKENDS[name]
+    backend_class = getattr(importlib.import_module(module_name, __package__), class_name)
+    return backend_class(model_path, device=device, precision=precision, **options)
+
+
+def default_device(name: str):
+    """
+    Pick the device for a backend: a GPU when PyTorch sees one, else the CPU.
+
+    Only the "torch" backend uses a device; for the others this returns None without
+    importing PyTorch, so they run (and start) without it.
+
+    Args:
+        name (str): The backend name.
+
+    Returns:
+        torch.device or None: The device to pass to `create_backend`.
+    """
+    if name != "torch":
+        return None
+    import torch
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -0,0 +1,357 @@
+import math
+import re
+from collections import Counter
+
+# Unicode blocks => script; characters outside these blocks are ignored
+_SCRIPT_RANGES = (
+    (0x0041, 0x005A, "Latn"), (0x0061, 0x007A, "Latn"), (0x00C0, 0x024F, "Latn"),
+    (0x0370, 0x03FF, "Grek"), (0x0400, 0x04FF, "Cyrl"), (0x0590, 0x05FF, "Hebr"),
+    (0x0600, 0x06FF, "Arab"), (0x0750, 0x077F, "Arab"), (0x0900, 0x097F, "Deva"),
+    (0x0980, 0x09FF, "Beng"), (0x0E00, 0x0E7F, "Thai"), (0x1100, 0x11FF, "Hang"),
+    (0x3040, 0x30FF, "Kana"), (0x3130, 0x318F, "Hang"), (0x3400, 0x4DBF, "Hani"),
+    (0x4E00, 0x9FFF, "Hani"), (0xAC00, 0xD7AF, "Hang"), (0xFB50, 0xFDFF, "Arab"),
+    (0xFE70, 0xFEFF, "Arab"),
+)
+
+# Scripts written (almost) only in one NLLB language, and the default for the others
+_SCRIPT_LANGUAGES = {
+    "Arab": "arb_Arab", "Cyrl": "rus_Cyrl", "Grek": "ell_Grek", "Hebr": "heb_Hebr", "Deva": "hin_Deva",
+    "Beng": "ben_Beng", "Thai": "tha_Thai", "Hang": "kor_Hang", "Kana": "jpn_Jpan", "Hani": "zho_Hans",
+}
+
+# Letters that only occur in one language of a shared script
+_DISTINCTIVE_LETTERS = {
+    "Arab": (("urd_Arab", "ٹڈڑںےھ"), ("pes_Arab", "پچژگکی")),
+    "Cyrl": (("ukr_Cyrl", "іїєґ"), ("bel_Cyrl", "ўі"), ("srp_Cyrl", "ђјљњћџ")),
+}
+
+# Short samples of common Latin-script languages; their character trigrams form the
+# language profiles (built on first use)
+_LATIN_SAMPLES = {
+    "eng_Latn": "The weather was nice, so we went out for a walk with the children. They said that it would be "
+                "the best day of the year and we should not stay at home. What do you think about this? I have "
+                "been working here for three years and I would like to know which of these things are "
+                "important. There is nothing we can do now, but you should call them when you have the time.",
+    "fra_Latn": "Le temps était beau, alors nous sommes sortis nous promener avec les enfants. Ils ont dit que "
+                "ce serait le plus beau jour de l'année et que nous ne devions pas rester à la maison. Qu'est-ce "
+                "que vous en pensez ? Je travaille ici depuis trois ans et je voudrais savoir lesquelles de ces "
+                "choses sont importantes. Il n'y a rien que nous puissions faire maintenant, mais vous devriez "
+                "les appeler quand vous aurez le temps.",
+    "spa_Latn": "El tiempo era bueno, así que salimos a pasear con los niños. Dijeron que sería el mejor día del "
+                "año y que no debíamos quedarnos en casa. ¿Qué piensas de esto? Llevo tres años trabajando aquí "
+                "y me gustaría saber cuáles de estas cosas son importantes. No hay nada que podamos hacer ahora, "
+                "pero deberías llamarlos cuando tengas tiempo.",
+    "deu_Latn": "Das Wetter war schön, also sind wir mit den Kindern spazieren gegangen. Sie sagten, dass es der "
+                "schönste Tag des Jahres sein würde und wir nicht zu Hause bleiben sollten. Was denkst du darüber? "
+                "Ich arbeite seit drei Jahren hier und möchte wissen, welche dieser Dinge wichtig sind. Wir können "
+                "jetzt nichts tun, aber du solltest sie anrufen, wenn du Zeit hast.",
+    "ita_Latn": "Il tempo era bello, così siamo usciti a fare una passeggiata con i bambini. Hanno detto che "
+                "sarebbe stato il giorno più bello dell'anno e che non dovevamo restare a casa. Che cosa ne pensi? "
+                "Lavoro qui da tre anni e vorrei sapere quali di queste cose sono importanti. Non c'è niente che "
+                "possiamo fare adesso, ma dovresti chiamarli quando hai tempo.",
+    "por_Latn": "O tempo estava bom, então saímos para passear com as crianças. Eles disseram que seria o melhor "
+                "dia do ano e que não devíamos ficar em casa. O que você acha disso? Trabalho aqui há três anos e "
+                "gostaria de saber quais destas coisas são importantes. Não há nada que possamos fazer agora, mas "
+                "você deveria ligar para eles quando tiver tempo.",
+    "nld_Latn": "Het weer was mooi, dus zijn we met de kinderen gaan wandelen. Ze zeiden dat het de mooiste dag "
+                "van het jaar zou zijn en dat we niet thuis moesten blijven. Wat vind jij daarvan? Ik werk hier "
+                "al drie jaar en ik wil graag weten welke van deze dingen belangrijk zijn. Er is niets dat we nu "
+                "kunnen doen, maar je moet ze bellen als je tijd hebt.",
+    "tur_Latn": "Hava güzeldi, bu yüzden çocuklarla yürüyüşe çıktık. Yılın en güzel günü olacağını ve evde "
+                "kalmamamız gerektiğini söylediler. Bu konuda ne düşünüyorsun? Üç yıldır burada çalışıyorum ve "
+                "bu şeylerden hangilerinin önemli olduğunu bilmek istiyorum. Şimdi yapabileceğimiz bir şey yok, "
+                "ama vaktin olduğunda onları aramalısın.",
+    "ind_Latn": "Cuacanya bagus, jadi kami pergi berjalan-jalan dengan anak-anak. Mereka bilang itu akan menjadi "
+                "hari terbaik tahun ini dan kami tidak boleh tinggal di rumah. Apa pendapatmu tentang ini? Saya "
+                "sudah bekerja di sini selama tiga tahun dan saya ingin tahu mana dari hal-hal ini yang penting. "
+                "Tidak ada yang bisa kita lakukan sekarang, tetapi kamu harus menelepon mereka jika ada waktu.",
+    "pol_Latn": "Pogoda była ładna, więc poszliśmy na spacer z dziećmi. Powiedzieli, że to będzie najpiękniejszy "
+                "dzień w roku i że nie powinniśmy zostawać w domu. Co o tym myślisz? Pracuję tutaj od trzech lat "
+                "i chciałbym wiedzieć, które z tych rzeczy są ważne. Nie możemy teraz nic zrobić, ale powinieneś "
+                "do nich zadzwonić, kiedy będziesz miał czas.",
+}
+
+# Frequent short words of the same languages; a text's share of them is added to the trigram score
+_LATIN_WORDS = {
+    "eng_Latn": "the and is are was to of in that it you for with this on not have be what do we they can "
+                "will would should there here from at by your my me please thank thanks",
+    "fra_Latn": "le la les et est sont des du un une que qui pas pour dans avec ce cette nous vous ils je "
+                "tu sur mais ou au aux merci beaucoup très bonjour",
+    "spa_Latn": "el la los las y es son del un una que por para con no se lo le su muy pero como más "
+                "esto gracias hola tu mi",
+    "deu_Latn": "der die das und ist sind nicht ein eine zu mit von den dem ich du wir sie es auf für "
+                "auch aber wie danke bitte",
+    "ita_Latn": "il lo la gli le e è sono di del della un una che non per con mi ti si ma come anche "
+                "questo grazie ciao molto",
+    "por_Latn": "o a os as e é são do da dos das um uma que não para com em no na se mas como você "
+                "obrigado obrigada muito isso",
+    "nld_Latn": "de het een en is zijn van dat niet ik je we ze op met voor maar ook als er naar "
+                "dank bedankt wat",
+    "tur_Latn": "bir ve bu da de için ile ne mi ben sen biz o çok ama gibi var yok değil teşekkür "
+                "ederim merhaba nasıl",
+    "ind_Latn": "yang dan di ini itu dengan untuk tidak saya kamu kami mereka ada dari ke akan bisa "
+                "juga terima kasih apa",
+    "pol_Latn": "i w na z że nie to jest się do jak ale co czy mnie jestem dziękuję bardzo proszę tak "
+                "od po",
+}
+
+# Letters used by only one of the Latin-script languages above (a bonus for that language)
+_LATIN_LETTERS = {
+    "spa_Latn": "ñ¿¡", "por_Latn": "ãõ", "fra_Latn": "œêëîïû", "deu_Latn": "äß", "tur_Latn": "ğış",
+    "pol_Latn": "łąęśżźćń", "ita_Latn": "ìò", "nld_Latn": "ĳ",
+}
+
+# Letters needed for a fully confident Latin-script detection; shorter texts scale it down
+_CONFIDENT_LETTERS = 25
+
+# Only the start of long texts is examined
+_MAX_CHARS = 1000
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_URL_RE = re.compile(r"(?:[a-z][a-z0-9+.-]*://|www\.)\S+", re.IGNORECASE)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_WINDOWS_PATH_RE = re.compile(r"(?:[a-zA-Z]:[\\/]|\\\\)[^\n<>\"|?*]*")
+_POSIX_PATH_RE = re.compile(r"~?/[^\s]*")
+_IDENTIFIER_RE = re.compile(r"[\w$.:#@-]+")
+_HEX_RE = re.compile(r"[0-9a-fA-F-]{8,}")
+_CODE_LINE_RE = re.compile(
+    r"^\s*(?:def |class \w|import \w|from \S+ import |return\b|function\b|const |let |var |#include|"
+    r"public |private |package |SELECT |<\w+[ >/])|[;{}]\s*$|=>|==|!=|:=|\w\(.*\)\s*$")
+_CODE_SYMBOLS = set("{}[]();=<>")
+
+
+class Detection:
+    """
+    Result of analysing a text before translation.
+
+    Attributes:
+        src_lang (str): The NLLB code of the detected language (the fallback if unsure).
+        confidence (float): How sure the detection is, from 0 to 1.
+        skip_reason (str or None): Why the text should not be translated ("url",
+            "email", "path", "identifier", "code", "no_text" or "target_language"),
+            or None if it should.
+    """
+    def __init__(self, src_lang, confidence, skip_reason=None):
+        self.src_lang = src_lang
+        self.confidence = confidence
+        self.skip_reason = skip_reason
+
+    def __repr__(self):
+        return f"Detection({self.src_lang!r}, {self.confidence:.2f}, skip_reason={self.skip_reason!r})"
+
+
+class LanguageDetector:
+    """
+    Cheap checks that run before a text is sent to the model.
+
+    - `non_translatable_reason` recognises content that translation would not change
+      (URLs, e-mail addresses, file paths, identifiers and hashes, source code,
+      numbers and symbols).
+    - `detect_language` picks the NLLB source language: by Unicode script for
+      scripts used by one language (with letter hints for Arabic and Cyrillic), and by
+      character trigram profiles for Latin-script languages.
+
+    Both run in well under a millisecond for clipboard-sized texts and need no
+    extra dependencies.
+
+    Latin-script guesses on short texts are unreliable (two-word phrases share
+    most of their trigrams with several languages), so a detection only replaces
+    the configured source language when it is confident and, for Latin-script
+    languages, the text has enough letters. Skipping a copy as already being in
+    the target language needs stricter thresholds still, because a wrong guess
+    would silently drop the copy; below them, the text is translated from
+    `fallback`.
+
+    Attributes:
+        fallback (str): The source language used when detection is unsure.
+        min_confidence (float): The confidence needed to trust a detection.
+        min_letters (int): The letters a Latin-script text needs before its detection is trusted.
+        skip_confidence (float): The confidence needed to skip text in the target language.
+        skip_min_letters (int): The letters a Latin-script text needs before it is skipped
+            as being in the target language.
+    """
+    def __init__(self, fallback: str = "eng_Latn", min_confidence: float = 0.35, min_letters: int = 12,
+                 skip_confidence: float = 0.6, skip_min_letters: int = 20):
+        """
+        Initialize the detector.
+
+        Args:
+            fallback (str, optional): The source language when unsure. Defaults to "eng_Latn".
+            min_confidence (float, optional): Detections below this confidence use
+                `fallback`. Defaults to 0.35.
+            min_letters (int, optional): Latin-script texts with fewer letters use
+                `fallback`. Defaults to 12.
+            skip_confidence (float, optional): The confidence needed to skip text
+                detected as the target language. Defaults to 0.6.
+            skip_min_letters (int, optional): The letters a Latin-script text needs to
+                be skipped as the target language. Defaults to 20.
+        """
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+        self.min_letters = min_letters
+        self.skip_confidence = skip_confidence
+        self.skip_min_letters = skip_min_letters
+        self._profiles = None
+
+    def analyze(self, text: str, tgt_lang: str = None) -> Detection:
+        """
+        Decide whether a text needs translating, and from which language.
+
+        Args:
+            text (str): The text to check.
+            tgt_lang (str, optional): The target language; confidently detected text
+                already in it is skipped. Defaults to None.
+
+        Returns:
+            Detection: The source language, its confidence and the skip reason if any.
+        """
+        reason = self.non_translatable_reason(text)
+        if reason is not None:
+            return Detection(self.fallback, 0.0, reason)
+        src_lang, confidence = self.detect_language(text)
+        # Only Latin-script guesses depend on the amount of text; other scripts identify the language
+        letters = sum(len(word) for word in _WORD_RE.findall(text[:_MAX_CHARS])) \
+            if src_lang.endswith("_Latn") else float("inf")
+        if confidence < self.min_confidence or letters < self.min_letters:
+            return Detection(self.fallback, confidence)
+        if src_lang == tgt_lang:
+            if confidence >= self.skip_confidence and letters >= self.skip_min_letters:
+                return Detection(src_lang, confidence, "target_language")
+            # Not sure enough to drop the copy: translate it with the configured pair
+            return Detection(self.fallback, confidence)
+        return Detection(src_lang, confidence)
+
+    def detect_language(self, text: str) -> tuple:
+        """
+        Identify the language of a text.
+
+        Args:
+            text (str): The text to identify.
+
+        Returns:
+            tuple: (NLLB language code, confidence from 0 to 1). The code is `fallback`
+            with confidence 0 when the text has no letters.
+        """
+        text = text[:_MAX_CHARS]
+        scripts = Counter()
+        for char in text:
+            script = _script_of(char)
+            if script is not None:
+                scripts[script] += 1
+        if not scripts:
+            return self.fallback, 0.0
+
+        script, count = scripts.most_common(1)[0]
+        script_share = count / sum(scripts.values())
+        # Kana marks Japanese even though most of its characters are Han
+        if script == "Hani" and scripts["Kana"]:
+            script = "Kana"
+        if script != "Latn":
+            for code, letters in _DISTINCTIVE_LETTERS.get(script, ()):
+                if any(letter in text for letter in letters):
+                    return code, script_share
+            return _SCRIPT_LANGUAGES.get(script, self.fallback), script_share
+
+        language, confidence = self._closest_latin_language(text)
+        return language, confidence * script_share
+
+    def non_translatable_reason(self, text: str):
+        """
+        Return why a text needs no translation, or None if it does.
+
+        Args:
+            text (str): The text to check.
+
+        Returns:
+            str or None: "no_text", "url", "email", "path", "identifier" or "code".
+        """
+        text = text.strip()
+        if sum(char.isalpha() for char in text[:_MAX_CHARS]) < 2:
+            return "no_text"
+        tokens = text.split()
+        if all(_URL_RE.fullmatch(token) for token in tokens):
+            return "url"
+        if all(_EMAIL_RE.fullmatch(token) for token in tokens):
+            return "email"
+        if "\n" not in text and (_WINDOWS_PATH_RE.fullmatch(text) or _POSIX_PATH_RE.fullmatch(text)):
+            return "path"
+        if len(tokens) == 1 and _looks_like_identifier(text):
+            return "identifier"
+        if _looks_like_code(text):
+            return "code"
+        return None
+
+    def _closest_latin_language(self, text):
+        """
+        Score every Latin-script language by trigram cosine similarity, common words
+        and distinctive letters.
+        """
+        if self._profiles is None:
+            self._profiles = {code: (_normalized(_trigrams(sample)), set(_LATIN_WORDS[code].split()))
+                              for code, sample in _LATIN_SAMPLES.items()}
+        lowered = text.lower()
+        words = _WORD_RE.findall(lowered)
+        trigrams = _normalized(_trigrams(lowered))
+        if not trigrams:
+            return self.fallback, 0.0
+
+        scores = []
+        for code, (profile, common_words) in self._profiles.items():
+            score = sum(weight * profile.get(trigram, 0.0) for trigram, weight in trigrams.items())
+            score += sum(word in common_words for word in words) / len(words)
+            if any(letter in lowered for letter in _LATIN_LETTERS.get(code, "")):
+                score += 0.4
+            scores.append((score, code))
+        scores.sort(reverse=True)
+        (best, language), (second, _) = scores[0], scores[1]
+        if best <= 0:
+            return self.fallback, 0.0
+        # The margin over the runner-up: close scores (or very short texts) mean an unreliable guess
+        letters = sum(len(word) for word in words)
+        return language, (best - second) / best * min(1.0, letters / _CONFIDENT_LETTERS)
+
+
+def _script_of(char):
+    """The script of a character, or None for digits, punctuation and unknown blocks."""
+    code_point = ord(char)
+    if code_point < 0x41:
+        return None
+    for start, end, script in _SCRIPT_RANGES:
+        if start <= code_point <= end:
+            return script if script != "Latn" or char.isalpha() else None
+    return None
+
+
+def _trigrams(text):
+    """Count the character trigrams of every word, padded with spaces."""
+    counts = Counter()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            counts[padded[i:i + 3]] += 1
+    return counts
+
+
+def _normalized(counts):
+    """Scale a count vector to unit length."""
+    norm = math.sqrt(sum(count * count for count in counts.values()))
+    return {key: count / norm for key, count in counts.items()} if norm else {}
+
+
+def _looks_like_identifier(token):
+    """A single token such as snake_case, camelCase, a.dotted.name, a hash or a UUID."""
+    if not _IDENTIFIER_RE.fullmatch(token):
+        return False
+    stripped = token.rstrip(".:")
+    if _HEX_RE.fullmatch(stripped) and any(char.isdigit() for char in stripped):
+        return True
+    return ("_" in stripped or re.search(r"[a-z][A-Z]", stripped) is not None
+            or re.search(r"\w[.:#@$]\w", stripped) is not None)
+
+
+def _looks_like_code(text):
+    """Most lines look like statements and the text is dense in code punctuation."""
+    lines = [line for line in text[:_MAX_CHARS].splitlines() if line.strip()]
+    code_lines = sum(1 for line in lines if _CODE_LINE_RE.search(line))
+    symbols = sum(1 for char in text[:_MAX_CHARS] if char in _CODE_SYMBOLS)
+    return code_lines * 2 >= len(lines) and symbols >= 0.03 * min(len(text), _MAX_CHARS)
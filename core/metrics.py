@@ -0,0 +1,274 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix of every metric name in the Prometheus exposition
+PROMETHEUS_PREFIX = "baligh_"
+
+
+class MetricsSink:
+    """
+    Receives timings and counters from the translation path.
+
+    The base class discards everything, so instrumented code can always call the
+    sink without checking whether metrics are enabled. Implementations:
+
+    - `NullMetrics`: records nothing (the default).
+    - `InMemoryMetrics`: keeps histograms and counters in process and can render
+      them in the Prometheus text format (see `PrometheusExporter`).
+
+    Metric names used by the application:
+
+    - Spans (histograms, in seconds): `tokenize`, `encode`, `generate`, `decode`,
+      `first_token`, `queue_wait`, `signal_delivery`, `request`, `batch`, `model_load`.
+    - Counters: `requests_total`, `input_tokens_total`, `output_tokens_total`,
+      `cache_hits_total`, `cache_misses_total`, `cache_shared_total`,
+      `encoder_cache_hits_total`, `encoder_cache_misses_total`, `tm_exact_hits_total`,
+      `tm_fuzzy_hits_total`, `tm_misses_total`, `segments_reused_total`,
+      `cancellations_total`, `errors_total`, `deadline_stops_total`,
+      `batches_total`, `batched_segments_total`, `rejected_total`, `model_loads_total`,
+      `model_evictions_total`.
+    """
+    def observe(self, name: str, seconds: float):
+        """
+        Record one duration in the histogram `name`.
+
+        Args:
+            name (str): The span name (e.g., "generate").
+            seconds (float): The measured duration.
+        """
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        Add to the counter `name`.
+
+        Args:
+            name (str): The counter name (e.g., "requests_total").
+            amount (int, optional): The amount to add. Defaults to 1.
+        """
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Time the body of a `with` block and record it with `observe`.
+
+        Args:
+            name (str): The span name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+
+class NullMetrics(MetricsSink):
+    """A metrics sink that records nothing."""
+
+
+class InMemoryMetrics(MetricsSink):
+    """
+    Thread-safe in-process histograms and counters.
+
+    Every histogram keeps cumulative bucket counts (for Prometheus) and a window of
+    its most recent values (for exact percentiles in `snapshot`).
+
+    Attributes:
+        buckets (tuple[float]): The histogram bucket upper bounds in seconds.
+        window (int): How many recent values each histogram keeps for percentiles.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 1024):
+        """
+        Initialize empty metrics.
+
+        Args:
+            buckets (tuple[float], optional): The bucket upper bounds in seconds.
+                Defaults to `DEFAULT_BUCKETS`.
+            window (int, optional): Recent values kept per histogram. Defaults to 1024.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(len(self.buckets), self.window)
+            histogram.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            histogram.recent.append(seconds)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> dict:
+        """
+        Return the current counters and a summary of every histogram.
+
+        Returns:
+            dict: {"counters": {name: value}, "histograms": {name: {"count", "sum",
+            "p50", "p95", "p99"}}}, durations in seconds. Percentiles cover the
+            most recent `window` values.
+        """
+        with self._lock:
+            histograms = {}
+            for name, histogram in self._histograms.items():
+                recent = sorted(histogram.recent)
+                histograms[name] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": _percentile(recent, 0.50),
+                    "p95": _percentile(recent, 0.95),
+                    "p99": _percentile(recent, 0.99),
+                }
+            return {"counters": dict(self._counters), "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Spans become `baligh_<name>_seconds` histograms and counters keep their name
+        with the `baligh_` prefix.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                metric = PROMETHEUS_PREFIX + name
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name, histogram in sorted(self._histograms.items()):
+                metric = f"{PROMETHEUS_PREFIX}{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.sum}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """
+    Publishes `InMemoryMetrics` for Prometheus: as a text file, over HTTP, or both.
+
+    The file is rewritten atomically every `interval` seconds (suitable for the node
+    exporter's textfile collector). The HTTP endpoint serves `/metrics` on localhost.
+
+    Attributes:
+        metrics (InMemoryMetrics): The metrics to publish.
+        path (str or None): The exposition file, if any.
+        port (int or None): The HTTP port, if any.
+        interval (float): Seconds between file writes.
+    """
+    def __init__(self, metrics: InMemoryMetrics, path: str = None, port: int = None, interval: float = 15.0):
+        """
+        Configure the exporter; nothing runs until `start()`.
+
+        Args:
+            metrics (InMemoryMetrics): The metrics to publish.
+            path (str, optional): Where to write the exposition file. Defaults to None.
+            port (int, optional): The localhost port for the `/metrics` endpoint.
+                Defaults to None.
+            interval (float, optional): Seconds between file writes. Defaults to 15.
+        """
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._writer = None
+        self._server = None
+
+    def start(self):
+        """Start writing the file and/or serving the endpoint on daemon threads."""
+        if self.path:
+            self._writer = threading.Thread(target=self._write_periodically, daemon=True)
+            self._writer.start()
+        if self.port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            metrics = self.metrics
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = metrics.render_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Stop the endpoint and write the file one last time."""
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+
+    def write(self):
+        """Write the exposition file now (atomically, through a temporary file)."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.metrics.render_prometheus())
+        os.replace(temp_path, self.path)
+
+    def _write_periodically(self):
+        """Rewrite the file every `interval` seconds until stopped, then once more."""
+        while True:
+            stopping = self._stop_event.wait(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Warning: could not write metrics file {self.path}: {e}")
+            if stopping:
+                return
+
+
+class _Histogram:
+    """Bucket counts, total count / sum and recent values of one histogram."""
+    __slots__ = ("bucket_counts", "count", "sum", "recent")
+
+    def __init__(self, num_buckets, window):
+        # One extra slot for values above the last bound (only counted in "+Inf")
+        self.bucket_counts = [0] * (num_buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import NullMetrics
+
+# Rough number of characters per model token, used to estimate a batch's size
+# without tokenizing on the event loop
+CHARS_PER_TOKEN = 4
+
+
+class BatcherOverloaded(Exception):
+    """Raised when the batcher's queue is full; the caller should retry later."""
+
+
+class RequestTooLarge(Exception):
+    """Raised when a request has more segments than the queue can hold; retrying cannot help."""
+
+
+class MicroBatcher:
+    """
+    Groups concurrent translation requests into batched `translate_batch` calls.
+
+    Segments submitted for the same (source, target, max_length, num_beams) are
+    queued together. A dispatcher task waits up to `max_wait_ms` after the first
+    segment of a group arrives, then sends up to `max_batch_size` segments (and at
+    most `max_batch_tokens` estimated tokens) to the engine as one batch. While a
+    batch runs, new requests keep queuing, so under load batches grow and
+    throughput rises with concurrency instead of requests running one by one.
+
+    Up to `concurrency` batches run at once, each on its own worker thread, so an
+    `EnginePool` with several processes is kept busy; the event loop never blocks
+    on the model.
+
+    Attributes:
+        engine (TranslationEngine or EnginePool): The engine that runs the batches.
+        max_wait (float): Seconds to wait for more segments before dispatching.
+        max_batch_size (int): The maximum number of segments per batch.
+        max_batch_tokens (int): The maximum estimated input tokens per batch.
+        max_queue (int): The maximum number of queued segments; beyond it
+            `translate` raises `BatcherOverloaded`.
+        concurrency (int): The number of batches that may run at the same time.
+        metrics (MetricsSink): Receives batch timings and counters.
+    """
+    def __init__(self, engine, max_wait_ms: float = 5, max_batch_size: int = 32, max_batch_tokens: int = 4096,
+                 max_queue: int = 512, concurrency: int = 1, metrics=None):
+        """
+        Initialize the batcher; call `start()` from the event loop before use.
+
+        Args:
+            engine (TranslationEngine or EnginePool): The engine that runs the batches.
+            max_wait_ms (float, optional): Batching window in milliseconds. Defaults to 5.
+            max_batch_size (int, optional): Segments per batch. Defaults to 32.
+            max_batch_tokens (int, optional): Estimated input tokens per batch. Defaults to 4096.
+            max_queue (int, optional): Queued segments before rejecting. Defaults to 512.
+            concurrency (int, optional): Batches run at the same time; use the number of
+                pool workers for an `EnginePool`. Defaults to 1.
+            metrics (MetricsSink, optional): Defaults to `NullMetrics()`.
+        """
+        self.engine = engine
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+        self.metrics = metrics if metrics is not None else NullMetrics()
+
+        # group key => deque of (segment, future, queued_at); insertion order = arrival order
+        self._groups = OrderedDict()
+        self._queued = 0
+        self._wakeup = None
+        self._slots = None
+        self._dispatcher = None
+        self._running = set()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="baligh-batch")
+
+    @property
+    def queued(self) -> int:
+        """The number of segments waiting for a batch."""
+        return self._queued
+
+    def start(self):
+        """Start the dispatcher task on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self):
+        """Stop dispatching, let running batches finish, cancel queued segments and release the threads."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        for group in self._groups.values():
+            for _, future, _ in group:
+                if not future.done():
+                    future.cancel()
+        self._groups.clear()
+        self._queued = 0
+        self._executor.shutdown(wait=True)
+
+    async def translate(self, segments, src_lang, tgt_lang, max_length, num_beams) -> list:
+        """
+        Translate segments as part of whatever batches are being formed.
+
+        Args:
+            segments (list[str]): The sentences to translate.
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            max_length (int): The maximum number of tokens to generate per segment.
+            num_beams (int): The beam search width.
+
+        Returns:
+            list[str]: The translations, in the same order as `segments`.
+
+        Raises:
+            RequestTooLarge: If there are more segments than `max_queue`.
+            BatcherOverloaded: If queuing the segments would exceed `max_queue`.
+        """
+        if not segments:
+            return []
+        if len(segments) > self.max_queue:
+            self.metrics.increment("rejected_total")
+            raise RequestTooLarge(f"{len(segments)} segments, at most {self.max_queue} per request")
+        if self._queued + len(segments) > self.max_queue:
+            self.metrics.increment("rejected_total")
+            raise BatcherOverloaded(f"{self._queued} segments already queued")
+
+        loop = asyncio.get_running_loop()
+        key = (src_lang, tgt_lang, max_length, num_beams)
+        group = self._groups.setdefault(key, deque())
+        futures = []
+        now = time.perf_counter()
+        for segment in segments:
+            future = loop.create_future()
+            group.append((segment, future, now))
+            futures.append(future)
+        self._queued += len(segments)
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    async def _dispatch(self):
+        """Form batches from the oldest waiting group and start them as worker slots free up."""
+        while True:
+            if not self._groups:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Segments keep queuing while every slot is busy, so batches grow under load
+            await self._slots.acquire()
+
+            key, group = next(iter(self._groups.items()))
+            # Give concurrent requests a short window to join the batch
+            remaining = self.max_wait - (time.perf_counter() - group[0][2])
+            if remaining > 0 and len(group) < self.max_batch_size:
+                await asyncio.sleep(remaining)
+
+            batch = self._take_batch(group)
+            if not group:
+                del self._groups[key]
+            else:
+                # The rest of this group waits behind the other groups (fairness between pairs)
+                self._groups.move_to_end(key)
+            self._queued -= len(batch)
+
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.get_running_loop().create_task(self._run_batch(key, batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, key, batch):
+        """Translate one batch on a worker thread and resolve its futures."""
+        loop = asyncio.get_running_loop()
+        try:
+            src_lang, tgt_lang, max_length, num_beams = key
+            texts = [segment for segment, _, _ in batch]
+            self.metrics.increment("batches_total")
+            self.metrics.increment("batched_segments_total", len(texts))
+            try:
+                with self.metrics.span("batch"):
+                    translations = await loop.run_in_executor(
+                        self._executor, self.engine.translate_batch, texts, src_lang, tgt_lang, max_length,
+                        num_beams, self.max_batch_size, self.max_batch_tokens)
+            except Exception as e:
+                print(f"Error translating batch of {len(texts)} segments: {e}")
+                self.metrics.increment("errors_total")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future, _), translation in zip(batch, translations):
+                if not future.done():
+                    future.set_result(translation)
+        finally:
+            self._slots.release()
+
+    def _take_batch(self, group):
+        """Pop segments from the front of a group within the size and token limits."""
+        batch = []
+        tokens = 0
+        while group and len(batch) < self.max_batch_size:
+            estimated = len(group[0][0]) // CHARS_PER_TOKEN + 2
+            if batch and tokens + estimated > self.max_batch_tokens:
+                break
+            batch.append(group.popleft())
+            tokens += estimated
+        return batch
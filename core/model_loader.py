@@ -0,0 +1,218 @@
+import os
+import torch
+from transformers import AutoModelForSeq2SeqLM
+
+# Supported inference precisions
+PRECISIONS = ("fp32", "bf16", "int8")
+
+# Weight files written by `save_pretrained` / shipped with the model
+SAFETENSORS_NAME = "model.safetensors"
+PYTORCH_BIN_NAME = "pytorch_model.bin"
+# State dict of an int8 model, in its `converted-int8` folder
+INT8_STATE_DICT_NAME = "model.pt"
+
+
+def load_model(model_path: str, device: torch.device, precision: str = "fp32"):
+    """
+    Load the translation model in the requested numeric precision.
+
+    - "fp32": the original weights, unchanged.
+    - "bf16": bfloat16 weights, used only if the device supports bf16 math.
+    - "int8": dynamic int8 quantization of every `torch.nn.Linear` layer (CPU only).
+
+    Converted models are saved under `<model_path>/converted-<precision>` the first
+    time, so later startups load them directly instead of converting again. If the
+    folder cannot be written (e.g., a read-only install), the conversion simply runs
+    on every start.
+
+    A `pytorch_model.bin` checkpoint is first converted to safetensors (see
+    `ensure_safetensors`) so the weights are memory-mapped rather than unpickled.
+
+    Args:
+        model_path (str): The path to the pretrained translation model.
+        device (torch.device): The device the model will run on.
+        precision (str, optional): One of `PRECISIONS`. Defaults to "fp32".
+
+    Returns:
+        tuple: The loaded model (in eval mode, not yet moved to `device`) and the
+        precision actually used, which falls back to "fp32" when unsupported.
+
+    Raises:
+        ValueError: If `precision` is not one of `PRECISIONS`.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+    if precision == "bf16" and not bf16_supported(device):
+        print(f"Warning: bf16 is not supported on {device}, falling back to fp32")
+        precision = "fp32"
+    if precision == "int8" and device.type != "cpu":
+        print(f"Warning: dynamic int8 quantization only runs on CPU, falling back to fp32 on {device}")
+        precision = "fp32"
+
+    ensure_safetensors(model_path)
+    if precision == "fp32":
+        return _from_pretrained(model_path).eval(), precision
+
+    converted_dir = os.path.join(model_path, f"converted-{precision}")
+    if os.path.isdir(converted_dir):
+        try:
+            return _load_converted(model_path, converted_dir, precision).eval(), precision
+        except Exception as e:
+            print(f"Warning: could not load converted {precision} model, converting again: {e}")
+
+    model = _convert(_from_pretrained(model_path).eval(), precision)
+    try:
+        _save_converted(model, converted_dir, precision)
+    except Exception as e:
+        print(f"Warning: could not save converted {precision} model: {e}")
+    return model, precision
+
+
+def ensure_safetensors(model_path: str) -> bool:
+    """
+    Convert a `pytorch_model.bin` checkpoint to `model.safetensors`, once.
+
+    Pickled checkpoints are read fully into memory and then copied into the model,
+    so loading them briefly holds two copies of the weights. Safetensors files are
+    memory-mapped instead: loading costs about one copy, is faster, and processes
+    loading the same file share the operating system's page cache.
+
+    The conversion loads the `.bin` one last time and writes the safetensors file
+    next to it (the `.bin` is kept). If the folder is read-only, loading keeps
+    using the `.bin`.
+
+    Args:
+        model_path (str): The path to the pretrained translation model.
+
+    Returns:
+        bool: True if the model folder has safetensors weights after the call.
+    """
+    if _has_safetensors(model_path):
+        return True
+    if not os.path.isfile(os.path.join(model_path, PYTORCH_BIN_NAME)):
+        # Nothing to convert (or a sharded / hub checkpoint, loaded as-is)
+        return False
+
+    from safetensors.torch import save_model
+
+    print(f"Converting {PYTORCH_BIN_NAME} to {SAFETENSORS_NAME} (one-time)...")
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path, use_safetensors=False)
+    temp_path = os.path.join(model_path, SAFETENSORS_NAME + ".tmp")
+    try:
+        # `save_model` drops tied (shared) tensors, which transformers re-ties on load;
+        # the "pt" format tag is required by `from_pretrained`
+        save_model(model, temp_path, metadata={"format": "pt"})
+        os.replace(temp_path, os.path.join(model_path, SAFETENSORS_NAME))
+    except OSError as e:
+        print(f"Warning: could not convert the model to safetensors: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+    return True
+
+
+def bf16_supported(device: torch.device) -> bool:
+    """
+    Check whether bfloat16 inference is fast and available on the device.
+
+    Args:
+        device (torch.device): The device to check.
+
+    Returns:
+        bool: True if the GPU or the CPU (AVX512-BF16 / AMX through oneDNN) supports bf16.
+    """
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    try:
+        return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def _has_safetensors(model_path):
+    """Check whether a model folder holds (possibly sharded) safetensors weights."""
+    return os.path.isdir(model_path) and any(name.endswith(".safetensors") for name in os.listdir(model_path))
+
+
+def _from_pretrained(model_path, **kwargs):
+    """
+    Load a model, memory-mapping safetensors weights when the folder has them.
+
+    `low_cpu_mem_usage` skips the random initialisation of a second set of weights,
+    so the weights are materialised only once.
+    """
+    return AutoModelForSeq2SeqLM.from_pretrained(
+        model_path, low_cpu_mem_usage=True, use_safetensors=_has_safetensors(model_path), **kwargs)
+
+
+def _convert(model, precision):
+    """Convert an fp32 model to bf16 weights or to dynamically quantized int8 `Linear` layers."""
+    if precision == "bf16":
+        return model.to(torch.bfloat16)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _save_converted(model, converted_dir, precision):
+    """
+    Save a converted model next to the original weights.
+
+    bf16 models are stored with `save_pretrained`. transformers cannot re-create
+    quantized modules, so int8 models only store their state dict, which
+    `_load_converted` loads into an empty quantized skeleton of the model.
+    A partially written file is removed if saving fails.
+    """
+    os.makedirs(converted_dir, exist_ok=True)
+    if precision == "bf16":
+        model.save_pretrained(converted_dir)
+        return
+    temp_path = os.path.join(converted_dir, INT8_STATE_DICT_NAME + ".tmp")
+    try:
+        torch.save(model.state_dict(), temp_path)
+        os.replace(temp_path, os.path.join(converted_dir, INT8_STATE_DICT_NAME))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _load_converted(model_path, converted_dir, precision):
+    """Load a model previously written by `_save_converted`."""
+    if precision == "bf16":
+        return _from_pretrained(converted_dir, dtype=torch.bfloat16)
+    state_dict = torch.load(os.path.join(converted_dir, INT8_STATE_DICT_NAME), weights_only=True, mmap=True)
+    model = _quantized_skeleton(model_path)
+    model.load_state_dict(state_dict)
+    return model
+
+
+def _quantized_skeleton(model_path):
+    """
+    Build the int8 model's modules without loading or quantizing any weights.
+
+    The non-quantized parameters are left uninitialized, and every `Linear` is
+    replaced by a 1x1 dynamically quantized placeholder: loading the state dict
+    installs the real packed weights (their sizes come from the state dict, not
+    from the placeholder), so the fp32 weights are never read.
+    """
+    from transformers import AutoConfig
+    try:
+        from transformers.initialization import no_init_weights
+    except ImportError:
+        # transformers < 5
+        from transformers.modeling_utils import no_init_weights
+
+    with no_init_weights():
+        model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(model_path))
+    _replace_linear_layers(model)
+    return model
+
+
+def _replace_linear_layers(module):
+    """Swap every `torch.nn.Linear` under `module` for a placeholder dynamic int8 layer."""
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear):
+            layer = torch.ao.nn.quantized.dynamic.Linear(1, 1, bias_=child.bias is not None, dtype=torch.qint8)
+            layer.in_features, layer.out_features = child.in_features, child.out_features
+            setattr(module, name, layer)
+        else:
+            _replace_linear_layers(child)
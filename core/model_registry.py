@@ -0,0 +1,328 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from .metrics import NullMetrics
+
+# Weight formats in the order `load_model` prefers them; only the first one present is counted
+_TORCH_WEIGHT_EXTENSIONS = (".safetensors", ".bin", ".pt")
+
+
+class ModelRegistry:
+    """
+    Routes every language pair to the cheapest local model that covers it.
+
+    A route names a model folder and the (src_lang, tgt_lang) pairs it translates,
+    e.g. a MarianMT model for English to French only. Pairs no route covers go to
+    the default model (NLLB), which covers every pair. When several routes cover a
+    pair, the one with the lowest `cost` wins; without an explicit cost, the size of
+    the model's weight files is used, so smaller models are preferred.
+
+    Models are loaded on first use and kept in LRU order. Before a model is loaded,
+    the least recently used ones are unloaded until it fits in `memory_budget_mb`
+    (the model being loaded is always allowed, even alone over the budget). A model
+    counts against the budget from the moment its load starts, and a load that does
+    not fit next to other loads in progress waits for them, so concurrent loads of
+    different models cannot overshoot the budget together. Every freshly loaded
+    model runs one short warm-up translation for the pair that triggered the load.
+
+    The registry has the translation methods of `TranslationEngine`, so it can be
+    used wherever an engine is expected.
+
+    Attributes:
+        default_model_path (str): The model used for pairs no route covers.
+        routes (list[dict]): The routes whose model folder exists, each with
+            `model_path`, `pairs` (a set of (src_lang, tgt_lang)) and `cost`.
+        memory_budget_mb (float or None): The memory loaded models may use (None
+            means no limit).
+        model_id (str): Identifies the routing table, backend and precision (used in cache keys).
+        backend (str): The inference backend of the engines.
+        precision (str): The precision the engines load models in.
+        load_times (dict): "tokenizer" / "model" load times of the default model, if preloaded.
+        metrics (MetricsSink): Receives model load timings and load / eviction counters.
+    """
+    def __init__(self, engine_factory, default_model_path: str, routes=(), memory_budget_mb: float = None,
+                 preload_default: bool = True, warmup: bool = True, metrics=None, backend: str = "torch",
+                 precision: str = "fp32"):
+        """
+        Set up the routing table and optionally load the default model.
+
+        Args:
+            engine_factory (Callable[[str], TranslationEngine]): Builds the engine of a
+                model folder.
+            default_model_path (str): The fallback model covering every pair.
+            routes (list[dict], optional): Entries with `model_path`, `pairs` (a list of
+                [src_lang, tgt_lang]) and optionally `cost`. Routes whose folder does
+                not exist are skipped with a warning. Defaults to none.
+            memory_budget_mb (float, optional): Memory budget of the loaded models.
+                Defaults to None (no limit).
+            preload_default (bool, optional): Whether the default model is loaded right
+                away rather than on first use. Defaults to True.
+            warmup (bool, optional): Whether newly loaded models run a warm-up
+                translation. Defaults to True.
+            metrics (MetricsSink, optional): Where load timings and counters are
+                recorded. Defaults to `NullMetrics()`.
+            backend (str, optional): The inference backend `engine_factory` builds
+                engines with. Defaults to "torch".
+            precision (str, optional): The precision `engine_factory` loads models in.
+                Defaults to "fp32".
+        """
+        self.engine_factory = engine_factory
+        self.default_model_path = default_model_path
+        self.memory_budget_mb = memory_budget_mb
+        self.warmup = warmup
+        self.metrics = metrics if metrics is not None else NullMetrics()
+        self.backend = backend
+        self.precision = precision
+
+        self.routes = []
+        for route in routes:
+            model_path = route["model_path"]
+            if not os.path.isdir(model_path):
+                print(f"Warning: skipping the route to '{model_path}': the model folder does not exist")
+                continue
+            cost = route.get("cost")
+            self.routes.append({
+                "model_path": model_path,
+                "pairs": {tuple(pair) for pair in route.get("pairs", ())},
+                "cost": cost if cost is not None else self._weights_bytes(model_path),
+            })
+
+        # The same routes with another backend or precision produce different translations
+        table = [backend, precision, default_model_path] + [
+            [route["model_path"], sorted(route["pairs"]), route["cost"]] for route in self.routes]
+        self.model_id = "registry-" + hashlib.sha1(json.dumps(table).encode("utf-8")).hexdigest()[:12]
+
+        # model path => TranslationEngine; order = recency
+        self._engines = OrderedDict()
+        # model path => memory estimate of the loaded engine, in bytes
+        self._sizes = {}
+        # model path => statistics (see `stats`)
+        self._stats = {}
+        # model path => lock held while it loads, so it is only loaded once
+        self._load_locks = {}
+        # model path => memory estimate of a model being loaded, in bytes
+        self._reserved = {}
+        self._lock = threading.Lock()
+        # Notified (with `_lock` held) whenever a load finishes or fails
+        self._load_finished = threading.Condition(self._lock)
+
+        self.load_times = {}
+        if preload_default:
+            self.load_times = self._engine(default_model_path, None).load_times
+
+    def route(self, src_lang: str, tgt_lang: str) -> str:
+        """
+        Pick the model folder for a language pair.
+
+        Args:
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+
+        Returns:
+            str: The cheapest route covering the pair, or the default model.
+        """
+        candidates = [route for route in self.routes if (src_lang, tgt_lang) in route["pairs"]]
+        if not candidates:
+            return self.default_model_path
+        return min(candidates, key=lambda route: route["cost"])["model_path"]
+
+    def supports_pair(self, src_lang: str, tgt_lang: str) -> bool:
+        """
+        Check whether a route covers the pair or the default model knows both codes.
+
+        Args:
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+
+        Returns:
+            bool: True if the pair can be translated.
+        """
+        if any((src_lang, tgt_lang) in route["pairs"] for route in self.routes):
+            return True
+        return self._engine(self.default_model_path, None).supports_pair(src_lang, tgt_lang)
+
+    def engine_for(self, src_lang: str, tgt_lang: str):
+        """
+        Return the engine of the pair's model, loading it (and evicting others) if needed.
+
+        Args:
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+
+        Returns:
+            TranslationEngine: The loaded engine.
+        """
+        return self._engine(self.route(src_lang, tgt_lang), (src_lang, tgt_lang))
+
+    def stats(self) -> dict:
+        """
+        Per-model statistics.
+
+        Returns:
+            dict: model path => {"loaded", "requests", "loads", "evictions",
+            "load_seconds", "warmup_seconds", "memory_mb", "last_used"}. Load and
+            warm-up times are those of the latest load; `last_used` is a `time.time()`
+            value (None if no request used the model yet).
+        """
+        with self._lock:
+            return {path: {**stats, "loaded": path in self._engines,
+                           "memory_mb": self._sizes.get(path, 0) / (1024 * 1024)}
+                    for path, stats in self._stats.items()}
+
+    def unload_all(self):
+        """Drop every loaded engine (their memory is freed once no translation uses them)."""
+        with self._lock:
+            self._engines.clear()
+            self._sizes.clear()
+
+    def translate(self, text, src_lang, tgt_lang, *args, **kwargs) -> str:
+        """`TranslationEngine.translate` on the pair's model."""
+        return self.engine_for(src_lang, tgt_lang).translate(text, src_lang, tgt_lang, *args, **kwargs)
+
+    def translate_batch(self, texts, src_lang, tgt_lang, *args, **kwargs) -> list:
+        """`TranslationEngine.translate_batch` on the pair's model."""
+        return self.engine_for(src_lang, tgt_lang).translate_batch(texts, src_lang, tgt_lang, *args, **kwargs)
+
+    def translate_document(self, text, src_lang, tgt_lang, *args, **kwargs) -> str:
+        """`TranslationEngine.translate_document` on the pair's model."""
+        return self.engine_for(src_lang, tgt_lang).translate_document(text, src_lang, tgt_lang, *args, **kwargs)
+
+    def translate_stream(self, text, src_lang, tgt_lang, *args, **kwargs):
+        """`TranslationEngine.translate_stream` on the pair's model."""
+        yield from self.engine_for(src_lang, tgt_lang).translate_stream(text, src_lang, tgt_lang, *args, **kwargs)
+
+    def translate_document_stream(self, text, src_lang, tgt_lang, *args, **kwargs):
+        """`TranslationEngine.translate_document_stream` on the pair's model."""
+        yield from self.engine_for(src_lang, tgt_lang).translate_document_stream(text, src_lang, tgt_lang,
+                                                                                  *args, **kwargs)
+
+    def _engine(self, model_path, pair):
+        """Return the engine of `model_path`, loading it first if needed; `pair` is warmed up."""
+        with self._lock:
+            stats = self._stats.setdefault(model_path, {"requests": 0, "loads": 0, "evictions": 0,
+                                                        "load_seconds": None, "warmup_seconds": None,
+                                                        "last_used": None})
+            if pair is not None:
+                stats["requests"] += 1
+                stats["last_used"] = time.time()
+            engine = self._engines.get(model_path)
+            if engine is not None:
+                self._engines.move_to_end(model_path)
+                return engine
+            load_lock = self._load_locks.setdefault(model_path, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                engine = self._engines.get(model_path)
+                if engine is not None:
+                    self._engines.move_to_end(model_path)
+                    return engine
+                self._reserve_locked(model_path, self._weights_bytes(model_path))
+
+            try:
+                start = time.perf_counter()
+                engine = self.engine_factory(model_path)
+                load_seconds = time.perf_counter() - start
+                self.metrics.observe("model_load", load_seconds)
+                self.metrics.increment("model_loads_total")
+
+                warmup_seconds = None
+                if self.warmup and pair is not None:
+                    start = time.perf_counter()
+                    try:
+                        engine.translate("Hello, world.", pair[0], pair[1], 16, 1)
+                    except Exception as e:
+                        print(f"Warning: warm-up of '{model_path}' for {pair[0]} -> {pair[1]} failed: {e}")
+                    warmup_seconds = time.perf_counter() - start
+            except BaseException:
+                with self._lock:
+                    self._release_locked(model_path)
+                raise
+
+            with self._lock:
+                # The reservation becomes the engine's size in one step, so other loads never miss it
+                self._release_locked(model_path)
+                self._engines[model_path] = engine
+                self._sizes[model_path] = self._engine_bytes(engine, model_path)
+                stats.update(loads=stats["loads"] + 1, load_seconds=load_seconds, warmup_seconds=warmup_seconds)
+            return engine
+
+    def _reserve_locked(self, model_path, incoming_bytes):
+        """
+        Make room for a model about to load and count it against the budget until it is registered.
+
+        Least recently used engines are unloaded first. If the model still does not
+        fit while other models are loading, wait until one of those loads finishes
+        (its engine can then be evicted) and try again; with no other load in
+        progress the model is allowed even over the budget.
+        """
+        self._evict_locked(incoming_bytes)
+        while self._reserved and not self._fits_locked(incoming_bytes):
+            self._load_finished.wait()
+            self._evict_locked(incoming_bytes)
+        self._reserved[model_path] = incoming_bytes
+
+    def _release_locked(self, model_path):
+        """Drop the reservation of a finished or failed load and wake the loads waiting for room."""
+        del self._reserved[model_path]
+        self._load_finished.notify_all()
+
+    def _fits_locked(self, incoming_bytes):
+        """Whether `incoming_bytes` more fit next to the loaded and loading models."""
+        if self.memory_budget_mb is None:
+            return True
+        used = sum(self._sizes.values()) + sum(self._reserved.values())
+        return used + incoming_bytes <= self.memory_budget_mb * 1024 * 1024
+
+    def _evict_locked(self, incoming_bytes):
+        """Unload least recently used engines until `incoming_bytes` more fit in the budget."""
+        while self._engines and not self._fits_locked(incoming_bytes):
+            model_path, _ = self._engines.popitem(last=False)
+            self._sizes.pop(model_path, None)
+            self._stats[model_path]["evictions"] += 1
+            self.metrics.increment("model_evictions_total")
+
+    def _weights_bytes(self, model_path):
+        """
+        The size of the weight files an engine of `model_path` would load.
+
+        Model folders often hold the same weights in several formats (e.g.
+        `pytorch_model.bin` next to the `model.safetensors` converted from it), so
+        only the files of the backend and precision in use are counted: the ONNX
+        graphs, the converted bf16 / int8 weights once they exist, or else the
+        first format `load_model` reads.
+        """
+        if self.backend == "onnx":
+            onnx_dir = os.path.join(model_path, "onnx" if self.precision == "fp32" else f"onnx-{self.precision}")
+            size = _files_bytes(onnx_dir, (".onnx", ".onnx_data"))
+            if size:
+                return size
+        elif self.precision != "fp32":
+            size = _files_bytes(os.path.join(model_path, f"converted-{self.precision}"), _TORCH_WEIGHT_EXTENSIONS)
+            if size:
+                return size
+        for extension in _TORCH_WEIGHT_EXTENSIONS:
+            size = _files_bytes(model_path, (extension,))
+            if size:
+                return size
+        return 0
+
+    def _engine_bytes(self, engine, model_path):
+        """The memory taken by a loaded engine's weights (from its torch model when there is one)."""
+        model = getattr(engine.backend, "model", None)
+        if model is not None and hasattr(model, "parameters"):
+            tensors = list(model.parameters()) + list(model.buffers())
+            return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+        return self._weights_bytes(model_path)
+
+
+def _files_bytes(folder, extensions):
+    """The total size of the files with one of `extensions` directly inside `folder`."""
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(folder)
+                   if entry.is_file() and entry.name.endswith(extensions))
+    except OSError:
+        return 0
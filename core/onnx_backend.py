@@ -0,0 +1,435 @@
+import json
+import os
+import time
+import numpy as np
+import onnxruntime as ort
+from .inference_backend import InferenceBackend
+
+ENCODER_FILE = "encoder.onnx"
+DECODER_FILE = "decoder.onnx"
+DECODER_WITH_PAST_FILE = "decoder_with_past.onnx"
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    Inference backend running an NLLB / M2M100 model with ONNX Runtime on the CPU.
+
+    The model is exported once to three graphs stored next to it:
+
+    - `encoder.onnx`: source tokens => encoder hidden states.
+    - `decoder.onnx`: first decoder step; also returns the self- and cross-attention
+      key/value tensors of every layer.
+    - `decoder_with_past.onnx`: one more token, reusing the cached keys/values.
+
+    Decoding (greedy or beam search) is implemented with NumPy, so no PyTorch is
+    needed at runtime once the export exists.
+
+    Attributes:
+        precision (str): "fp32", or "int8" when the graphs are dynamically quantized.
+    """
+    name = "onnx"
+
+    def __init__(self, model_path: str, device=None, precision: str = "fp32", intra_op_threads: int = 0,
+                 inter_op_threads: int = 0):
+        """
+        Load (exporting first if needed) the ONNX graphs of the model.
+
+        Args:
+            model_path (str): The path to the pretrained translation model.
+            device: Ignored; ONNX Runtime runs on the CPU.
+            precision (str, optional): "fp32" or "int8". "bf16" is not supported by
+                ONNX Runtime on the CPU and falls back to "fp32". Defaults to "fp32".
+            intra_op_threads (int, optional): Threads used inside one operator
+                (0 lets ONNX Runtime decide). Defaults to 0.
+            inter_op_threads (int, optional): Threads used across operators
+                (0 lets ONNX Runtime decide). Defaults to 0.
+
+        Raises:
+            ValueError: If the model is not an M2M100 / NLLB model.
+        """
+        if precision not in ("fp32", "int8"):
+            print(f"Warning: the ONNX backend does not support {precision}, falling back to fp32")
+            precision = "fp32"
+        self.precision = precision
+
+        with open(os.path.join(model_path, "config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.num_layers = config["decoder_layers"]
+        self.decoder_start_token_id = config["decoder_start_token_id"]
+        self.eos_token_id = config["eos_token_id"]
+        self.pad_token_id = config["pad_token_id"]
+
+        onnx_dir = os.path.join(model_path, "onnx" if precision == "fp32" else f"onnx-{precision}")
+        if not all(os.path.exists(os.path.join(onnx_dir, name))
+                   for name in (ENCODER_FILE, DECODER_FILE, DECODER_WITH_PAST_FILE)):
+            if precision == "fp32":
+                export_onnx(model_path, onnx_dir)
+            else:
+                quantize_onnx(os.path.join(model_path, "onnx"), onnx_dir, model_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        providers = ["CPUExecutionProvider"]
+        self.encoder = ort.InferenceSession(os.path.join(onnx_dir, ENCODER_FILE), options, providers=providers)
+        self.decoder = ort.InferenceSession(os.path.join(onnx_dir, DECODER_FILE), options, providers=providers)
+        self.decoder_with_past = ort.InferenceSession(os.path.join(onnx_dir, DECODER_WITH_PAST_FILE), options,
+                                                      providers=providers)
+
+    def encode(self, input_ids, attention_mask):
+        return self.encoder.run(None, {"input_ids": input_ids.astype(np.int64),
+                                       "attention_mask": attention_mask.astype(np.int64)})[0]
+
+    def generate(self, input_ids, attention_mask, forced_bos_token_id, max_length, num_beams,
+                 stop_events=(), on_tokens=None, deadline=None, encoder_hidden_states=None) -> list:
+        attention_mask = attention_mask.astype(np.int64)
+        if encoder_hidden_states is None:
+            encoder_hidden_states = self.encode(input_ids, attention_mask)
+
+        start = [self.decoder_start_token_id] + ([forced_bos_token_id] if forced_bos_token_id is not None else [])
+        if num_beams > 1:
+            return self._beam_search(encoder_hidden_states, attention_mask, start, max_length, num_beams,
+                                     stop_events, deadline)
+        return self._greedy(encoder_hidden_states, attention_mask, start, max_length, stop_events, on_tokens,
+                            deadline)
+
+    def _first_step(self, decoder_input_ids, encoder_hidden_states, attention_mask):
+        """Run the first decoder step; returns logits, self-attention and cross-attention caches."""
+        outputs = self.decoder.run(None, {
+            "decoder_input_ids": decoder_input_ids,
+            "encoder_hidden_states": encoder_hidden_states,
+            "encoder_attention_mask": attention_mask,
+        })
+        layers = 2 * self.num_layers
+        return outputs[0], outputs[1:1 + layers], outputs[1 + layers:]
+
+    def _next_step(self, tokens, attention_mask, self_cache, cross_cache):
+        """Feed one token per row; returns logits and the extended self-attention cache."""
+        feed = {"decoder_input_ids": tokens[:, None], "encoder_attention_mask": attention_mask}
+        for i in range(2 * self.num_layers):
+            feed[f"past_self_{i}"] = self_cache[i]
+            feed[f"past_cross_{i}"] = cross_cache[i]
+        outputs = self.decoder_with_past.run(None, feed)
+        return outputs[0], outputs[1:]
+
+    def _greedy(self, encoder_hidden_states, attention_mask, start, max_length, stop_events, on_tokens, deadline):
+        """Greedy decoding of a whole batch."""
+        batch_size = attention_mask.shape[0]
+        sequences = np.tile(np.array(start, dtype=np.int64), (batch_size, 1))
+        logits, self_cache, cross_cache = self._first_step(sequences, encoder_hidden_states, attention_mask)
+        if on_tokens is not None:
+            on_tokens(start)
+
+        finished = np.zeros(batch_size, dtype=bool)
+        while sequences.shape[1] < max_length:
+            tokens = logits.argmax(-1).astype(np.int64)
+            tokens[finished] = self.pad_token_id
+            sequences = np.concatenate([sequences, tokens[:, None]], axis=1)
+            finished |= tokens == self.eos_token_id
+            if on_tokens is not None:
+                on_tokens(tokens.tolist())
+            if finished.all() or sequences.shape[1] >= max_length or _stopped(stop_events, deadline):
+                break
+            logits, self_cache = self._next_step(tokens, attention_mask, self_cache, cross_cache)
+        return sequences.tolist()
+
+    def _beam_search(self, encoder_hidden_states, attention_mask, start, max_length, num_beams, stop_events,
+                     deadline):
+        """Beam search decoding (length penalty 1.0, like `generate`'s defaults)."""
+        batch_size = attention_mask.shape[0]
+        # Every input is repeated once per beam
+        encoder_hidden_states = np.repeat(encoder_hidden_states, num_beams, axis=0)
+        attention_mask = np.repeat(attention_mask, num_beams, axis=0)
+        sequences = np.tile(np.array(start, dtype=np.int64), (batch_size * num_beams, 1))
+        logits, self_cache, cross_cache = self._first_step(sequences, encoder_hidden_states, attention_mask)
+
+        # Only the first beam is live at the start, so the first step picks distinct tokens
+        beam_scores = np.full((batch_size, num_beams), -1e9, dtype=np.float32)
+        beam_scores[:, 0] = 0.0
+        hypotheses = [[] for _ in range(batch_size)]
+        done = np.zeros(batch_size, dtype=bool)
+
+        while True:
+            log_probs = _log_softmax(logits.astype(np.float32))
+            vocab_size = log_probs.shape[-1]
+            scores = (beam_scores[:, :, None] + log_probs.reshape(batch_size, num_beams, vocab_size))
+            scores = scores.reshape(batch_size, num_beams * vocab_size)
+            candidates = np.argsort(-scores, axis=1)[:, :2 * num_beams]
+            # Generated length once the next token is appended; the decoder start token is the
+            # prompt and does not count (the forced BOS does), as in `generate`
+            length = sequences.shape[1]
+
+            next_tokens = np.full((batch_size, num_beams), self.pad_token_id, dtype=np.int64)
+            next_beams = np.zeros((batch_size, num_beams), dtype=np.int64)
+            next_scores = np.full((batch_size, num_beams), -1e9, dtype=np.float32)
+            for b in range(batch_size):
+                # Finished inputs keep a padding beam until the whole batch is done
+                next_beams[b] = b * num_beams
+                if done[b]:
+                    continue
+                slot = 0
+                for rank, candidate in enumerate(candidates[b]):
+                    beam, token = divmod(int(candidate), vocab_size)
+                    score = float(scores[b, candidate])
+                    row = b * num_beams + beam
+                    if token == self.eos_token_id:
+                        if rank < num_beams:
+                            _add_hypothesis(hypotheses[b], num_beams, sequences[row].tolist() + [token],
+                                            score / length)
+                        continue
+                    next_tokens[b, slot], next_beams[b, slot], next_scores[b, slot] = token, row, score
+                    slot += 1
+                    if slot == num_beams:
+                        break
+                # Stop once no running beam can beat the worst kept hypothesis
+                if len(hypotheses[b]) == num_beams and next_scores[b].max() / length <= hypotheses[b][-1][0]:
+                    done[b] = True
+
+            rows = next_beams.reshape(-1)
+            sequences = np.concatenate([sequences[rows], next_tokens.reshape(-1, 1)], axis=1)
+            beam_scores = next_scores
+            if done.all() or sequences.shape[1] >= max_length or _stopped(stop_events, deadline):
+                break
+            self_cache = [cache[rows] for cache in self_cache]
+            logits, self_cache = self._next_step(next_tokens.reshape(-1), attention_mask, self_cache, cross_cache)
+
+        results = []
+        for b in range(batch_size):
+            if not done[b]:
+                for beam in range(num_beams):
+                    _add_hypothesis(hypotheses[b], num_beams, sequences[b * num_beams + beam].tolist(),
+                                    float(beam_scores[b, beam]) / (sequences.shape[1] - 1))
+            results.append(hypotheses[b][0][1])
+        return results
+
+
+def export_onnx(model_path: str, output_dir: str):
+    """
+    Export the encoder and decoder(-with-past) graphs of an NLLB / M2M100 model.
+
+    This needs PyTorch and transformers and only runs once; afterwards the backend
+    loads the `.onnx` files directly.
+
+    Args:
+        model_path (str): The path to the pretrained translation model.
+        output_dir (str): The folder receiving the `.onnx` files.
+
+    Raises:
+        ValueError: If the model is not an M2M100 / NLLB model.
+    """
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path).eval()
+    if model.config.model_type != "m2m_100":
+        raise ValueError(f"The ONNX backend supports NLLB / M2M100 models, not '{model.config.model_type}'")
+    os.makedirs(output_dir, exist_ok=True)
+
+    encoder, decoder, decoder_with_past = _export_modules(model)
+    num_layers = model.config.decoder_layers
+    layers = 2 * num_layers
+
+    input_ids = torch.tensor([[5, 6, 7, model.config.eos_token_id]] * 2)
+    attention_mask = torch.ones_like(input_ids)
+    decoder_input_ids = torch.tensor([[model.config.decoder_start_token_id, 5]] * 2)
+    with torch.no_grad():
+        hidden = encoder(input_ids, attention_mask)
+        past = decoder(decoder_input_ids, hidden, attention_mask)[1:]
+
+        torch.onnx.export(
+            encoder, (input_ids, attention_mask), os.path.join(output_dir, ENCODER_FILE),
+            input_names=["input_ids", "attention_mask"], output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "source"}, "attention_mask": {0: "batch", 1: "source"},
+                          "last_hidden_state": {0: "batch", 1: "source"}},
+            opset_version=17, dynamo=False,
+        )
+
+        self_names = [f"present_self_{i}" for i in range(layers)]
+        cross_names = [f"present_cross_{i}" for i in range(layers)]
+        torch.onnx.export(
+            decoder, (decoder_input_ids, hidden, attention_mask), os.path.join(output_dir, DECODER_FILE),
+            input_names=["decoder_input_ids", "encoder_hidden_states", "encoder_attention_mask"],
+            output_names=["logits"] + self_names + cross_names,
+            dynamic_axes={"decoder_input_ids": {0: "batch", 1: "target"},
+                          "encoder_hidden_states": {0: "batch", 1: "source"},
+                          "encoder_attention_mask": {0: "batch", 1: "source"},
+                          "logits": {0: "batch"},
+                          **{name: {0: "batch", 2: "target"} for name in self_names},
+                          **{name: {0: "batch", 2: "source"} for name in cross_names}},
+            opset_version=17, dynamo=False,
+        )
+
+        past_self_names = [f"past_self_{i}" for i in range(layers)]
+        past_cross_names = [f"past_cross_{i}" for i in range(layers)]
+        torch.onnx.export(
+            decoder_with_past,
+            (decoder_input_ids[:, :1], attention_mask, *past[:layers], *past[layers:]),
+            os.path.join(output_dir, DECODER_WITH_PAST_FILE),
+            input_names=["decoder_input_ids", "encoder_attention_mask"] + past_self_names + past_cross_names,
+            output_names=["logits"] + self_names,
+            dynamic_axes={"decoder_input_ids": {0: "batch"},
+                          "encoder_attention_mask": {0: "batch", 1: "source"},
+                          "logits": {0: "batch"},
+                          **{name: {0: "batch", 2: "past"} for name in past_self_names},
+                          **{name: {0: "batch", 2: "source"} for name in past_cross_names},
+                          **{name: {0: "batch", 2: "target"} for name in self_names}},
+            opset_version=17, dynamo=False,
+        )
+
+
+def quantize_onnx(source_dir: str, output_dir: str, model_path: str):
+    """
+    Write dynamically int8-quantized copies of the exported graphs.
+
+    Args:
+        source_dir (str): The folder with the fp32 graphs (exported first if missing).
+        output_dir (str): The folder receiving the quantized graphs.
+        model_path (str): The model path, used to export the fp32 graphs if needed.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    if not os.path.exists(os.path.join(source_dir, DECODER_WITH_PAST_FILE)):
+        export_onnx(model_path, source_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    for name in (ENCODER_FILE, DECODER_FILE, DECODER_WITH_PAST_FILE):
+        quantize_dynamic(os.path.join(source_dir, name), os.path.join(output_dir, name),
+                         weight_type=QuantType.QInt8)
+
+
+def _export_modules(model):
+    """
+    Build traceable encoder / decoder modules from an M2M100 model's weights.
+
+    The attention is written out explicitly with the key/value cache as plain input
+    and output tensors, so the export does not depend on transformers' cache classes.
+    """
+    import torch
+
+    encoder_model = model.get_encoder()
+    decoder_model = model.get_decoder()
+    heads = model.config.decoder_attention_heads
+    pad = model.config.pad_token_id
+
+    def embed(module, ids):
+        embeddings = module.embed_tokens(ids)
+        # Older transformers versions scale in the encoder/decoder instead of the embedding
+        if not hasattr(module.embed_tokens, "embed_scale"):
+            embeddings = embeddings * getattr(module, "embed_scale", 1.0)
+        return embeddings
+
+    def split_heads(x):
+        batch, length, dim = x.shape
+        return x.view(batch, length, heads, dim // heads).transpose(1, 2)
+
+    def attend(attention, query, key, value, bias):
+        scores = torch.matmul(query * attention.scaling, key.transpose(-1, -2)) + bias
+        context = torch.matmul(torch.softmax(scores, dim=-1), value)
+        batch, _, length, head_dim = context.shape
+        return attention.out_proj(context.transpose(1, 2).reshape(batch, length, heads * head_dim))
+
+    def padding_bias(mask):
+        return (1.0 - mask[:, None, None, :].float()) * torch.finfo(torch.float32).min
+
+    def feed_forward(layer, hidden):
+        residual = hidden
+        hidden = layer.activation_fn(layer.fc1(layer.final_layer_norm(hidden)))
+        return residual + layer.fc2(hidden)
+
+    class Encoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = encoder_model
+
+        def forward(self, input_ids, attention_mask):
+            positions = self.encoder.embed_positions.weights
+            position_ids = (torch.cumsum(input_ids.ne(pad).long(), dim=1) * input_ids.ne(pad).long()) + pad
+            hidden = embed(self.encoder, input_ids) + positions[position_ids]
+            bias = padding_bias(attention_mask)
+            for layer in self.encoder.layers:
+                attention = layer.self_attn
+                normed = layer.self_attn_layer_norm(hidden)
+                hidden = hidden + attend(attention, split_heads(attention.q_proj(normed)),
+                                         split_heads(attention.k_proj(normed)),
+                                         split_heads(attention.v_proj(normed)), bias)
+                hidden = feed_forward(layer, hidden)
+            return self.encoder.layer_norm(hidden)
+
+    class DecoderStep(torch.nn.Module):
+        def __init__(self, with_past):
+            super().__init__()
+            self.decoder = decoder_model
+            self.lm_head = model.lm_head
+            self.with_past = with_past
+
+        def forward(self, decoder_input_ids, encoder_hidden_states, encoder_attention_mask, past_self, past_cross):
+            length = decoder_input_ids.shape[1]
+            past_length = past_self[0].shape[2] if self.with_past else 0
+            position_ids = torch.arange(length, dtype=torch.long) + past_length + pad + 1
+            hidden = embed(self.decoder, decoder_input_ids) + self.decoder.embed_positions.weights[position_ids]
+
+            causal = torch.full((length, length), torch.finfo(torch.float32).min).triu(1)
+            if self.with_past:
+                causal = torch.cat([torch.zeros(length, past_length), causal], dim=1)
+            cross_bias = padding_bias(encoder_attention_mask)
+
+            present_self, present_cross = [], []
+            for i, layer in enumerate(self.decoder.layers):
+                attention = layer.self_attn
+                normed = layer.self_attn_layer_norm(hidden)
+                key = split_heads(attention.k_proj(normed))
+                value = split_heads(attention.v_proj(normed))
+                if self.with_past:
+                    key = torch.cat([past_self[2 * i], key], dim=2)
+                    value = torch.cat([past_self[2 * i + 1], value], dim=2)
+                present_self += [key, value]
+                hidden = hidden + attend(attention, split_heads(attention.q_proj(normed)), key, value, causal)
+
+                attention = layer.encoder_attn
+                normed = layer.encoder_attn_layer_norm(hidden)
+                if self.with_past:
+                    cross_key, cross_value = past_cross[2 * i], past_cross[2 * i + 1]
+                else:
+                    cross_key = split_heads(attention.k_proj(encoder_hidden_states))
+                    cross_value = split_heads(attention.v_proj(encoder_hidden_states))
+                    present_cross += [cross_key, cross_value]
+                hidden = hidden + attend(attention, split_heads(attention.q_proj(normed)), cross_key, cross_value,
+                                         cross_bias)
+                hidden = feed_forward(layer, hidden)
+
+            logits = self.lm_head(self.decoder.layer_norm(hidden[:, -1:]))[:, 0]
+            return (logits, *present_self, *present_cross)
+
+    class Decoder(DecoderStep):
+        def __init__(self):
+            super().__init__(with_past=False)
+
+        def forward(self, decoder_input_ids, encoder_hidden_states, encoder_attention_mask):
+            return super().forward(decoder_input_ids, encoder_hidden_states, encoder_attention_mask, None, None)
+
+    class DecoderWithPast(DecoderStep):
+        def __init__(self):
+            super().__init__(with_past=True)
+
+        def forward(self, decoder_input_ids, encoder_attention_mask, *past):
+            layers = len(past) // 2
+            return super().forward(decoder_input_ids, None, encoder_attention_mask, past[:layers], past[layers:])
+    return Encoder().eval(), Decoder().eval(), DecoderWithPast().eval()
+
+
+def _add_hypothesis(hypotheses, num_beams, tokens, score):
+    """Keep the `num_beams` best finished hypotheses, sorted by descending score."""
+    hypotheses.append((score, tokens))
+    hypotheses.sort(key=lambda hypothesis: hypothesis[0], reverse=True)
+    del hypotheses[num_beams:]
+
+
+def _log_softmax(logits):
+    """Numerically stable log-softmax over the last axis."""
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+
+
+def _stopped(stop_events, deadline=None):
+    """Return True if any stop event is set or the `time.monotonic()` deadline has passed."""
+    return any(event.is_set() for event in stop_events) or (deadline is not None and time.monotonic() >= deadline)
@@ -0,0 +1,175 @@
+import re
+
+# Line prefixes that are kept as-is and never sent to the model (indentation, bullets, numbering)
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·▪‣◦–—>]+|\(?\d{1,3}[.)]|\(?[A-Za-z][.)])?\s*")
+# Sentence terminators (Latin, Arabic and CJK), optional closing quotes/brackets, then the gap
+_SENTENCE_END_RE = re.compile(r"[.!?؟。！？…]+[\"'”’»)\]]*(\s+)")
+# Softer break points used only when a sentence is still too long
+_CLAUSE_END_RE = re.compile(r"[,;:،؛]+(\s+)")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Words ending with a period that do not end a sentence
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "fig"}
+
+
+class SegmentedText:
+    """
+    A text split into translatable segments plus the layout needed to rebuild it.
+
+    The layout is a list of parts: literal strings (line breaks, bullets, indentation,
+    the gaps between sentences) are copied verbatim, while integers point into
+    `segments` and are replaced by their translations on reassembly.
+
+    Attributes:
+        segments (list[str]): The sentences to send to the model, in reading order.
+    """
+    def __init__(self, parts, segments):
+        self._parts = parts
+        self.segments = segments
+
+    def reassemble(self, translations) -> str:
+        """
+        Rebuild the document with every segment replaced by its translation.
+
+        Args:
+            translations (list[str]): One translation per segment, in the same order.
+
+        Returns:
+            str: The translated text with the original line and bullet structure.
+        """
+        if len(translations) != len(self.segments):
+            raise ValueError(f"Expected {len(self.segments)} translations, got {len(translations)}")
+        return "".join(translations[part] if isinstance(part, int) else part for part in self._parts)
+
+    def reassemble_partial(self, translations) -> str:
+        """
+        Rebuild the document up to the last segment that is already translated.
+
+        Args:
+            translations (list[str]): Translations of the first segments, in order.
+
+        Returns:
+            str: The layout and translations up to (and including) the last given segment.
+        """
+        text = []
+        for part in self._parts:
+            if isinstance(part, int):
+                if part >= len(translations):
+                    break
+                text.append(translations[part])
+            else:
+                text.append(part)
+        return "".join(text)
+
+
+def segment_text(text: str, max_segment_chars: int = 400) -> SegmentedText:
+    """
+    Split text into sentences while remembering its paragraph and bullet structure.
+
+    Every line is handled separately so line breaks survive translation. A line's
+    bullet or numbering prefix is kept out of the model input, and the rest is cut
+    into sentences. Sentences longer than `max_segment_chars` are further split at
+    clause boundaries, then at whitespace, so no single input hits the length cap.
+
+    Args:
+        text (str): The text to segment (e.g., a clipboard payload).
+        max_segment_chars (int, optional): The longest segment to produce. Defaults to 400.
+
+    Returns:
+        SegmentedText: The segments and the layout to reassemble them.
+
+    Example:
+        >>> doc = segment_text("- Hello. How are you?\\n- Fine!")
+        >>> doc.segments
+        ['Hello.', 'How are you?', 'Fine!']
+        >>> doc.reassemble(["Bonjour.", "Comment allez-vous ?", "Bien !"])
+        '- Bonjour. Comment allez-vous ?\\n- Bien !'
+    """
+    parts = []
+    segments = []
+    for line in text.splitlines(keepends=True):
+        body = line.rstrip("\r\n")
+        ending = line[len(body):]
+
+        # Keep the bullet / indentation and trailing spaces literally
+        prefix = _BULLET_RE.match(body).group(0)
+        content = body[len(prefix):]
+        stripped = content.rstrip()
+        suffix = content[len(stripped):]
+
+        if prefix:
+            parts.append(prefix)
+        for piece in _split_sentences(stripped, max_segment_chars):
+            if piece.strip():
+                parts.append(len(segments))
+                segments.append(piece)
+            else:
+                parts.append(piece)
+        parts.append(suffix + ending)
+    return SegmentedText([part for part in parts if part != ""], segments)
+
+
+def _split_sentences(text, max_segment_chars):
+    """
+    Split one line into sentences and the whitespace gaps between them.
+
+    Args:
+        text (str): A single line without its bullet prefix.
+        max_segment_chars (int): The longest segment to produce.
+
+    Returns:
+        list[str]: Alternating sentences and gaps (gaps contain only whitespace).
+    """
+    pieces = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        sentence = text[start:match.start(1)]
+        words = sentence.rstrip(".").split()
+        last_word = words[-1] if words else ""
+        # Do not break after abbreviations such as "Dr." or initials such as "J."
+        if sentence.endswith(".") and (last_word.lower() in _ABBREVIATIONS or
+                                       (len(last_word) == 1 and last_word.isupper())):
+            continue
+        pieces.extend(_split_long(sentence, max_segment_chars))
+        pieces.append(match.group(1))
+        start = match.end()
+    if start < len(text):
+        pieces.extend(_split_long(text[start:], max_segment_chars))
+    return pieces
+
+
+def _split_long(sentence, max_segment_chars):
+    """
+    Break a sentence that exceeds `max_segment_chars` at clauses, then at whitespace.
+
+    Args:
+        sentence (str): The sentence to split.
+        max_segment_chars (int): The longest segment to produce.
+
+    Returns:
+        list[str]: Alternating chunks and whitespace gaps.
+    """
+    if len(sentence) <= max_segment_chars:
+        return [sentence]
+
+    for pattern in (_CLAUSE_END_RE, _WHITESPACE_RE):
+        pieces = []
+        chunk_start = 0
+        cut = None
+        for match in pattern.finditer(sentence):
+            gap = match.span(1) if pattern.groups else match.span()
+            # Close the chunk at the previous gap once this one would make it too long
+            if gap[0] - chunk_start > max_segment_chars and cut:
+                pieces += [sentence[chunk_start:cut[0]], sentence[cut[0]:cut[1]]]
+                chunk_start = cut[1]
+            cut = gap
+        if len(sentence) - chunk_start > max_segment_chars and cut and cut[0] > chunk_start:
+            pieces += [sentence[chunk_start:cut[0]], sentence[cut[0]:cut[1]]]
+            chunk_start = cut[1]
+        if pieces:
+            # Chunks that are still too long fall through to the next, finer break points
+            pieces.append(sentence[chunk_start:])
+            return [sub for piece in pieces
+                    for sub in (_split_long(piece, max_segment_chars) if piece.strip() else [piece])]
+
+    # A single unbreakable run (e.g., a very long token) is hard-wrapped
+    return [sentence[i:i + max_segment_chars] for i in range(0, len(sentence), max_segment_chars)]
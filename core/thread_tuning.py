@@ -0,0 +1,219 @@
+import os
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Clipboard-sized inputs the candidates are timed on: a phrase, a sentence and a paragraph
+REPRESENTATIVE_TEXTS = (
+    "Thank you for your quick reply.",
+    "The meeting has been moved to Thursday afternoon because two of the speakers are travelling.",
+    "Please read the attached report before the review. It summarises the results of the last quarter, "
+    "explains why the delivery was delayed and lists the changes we propose for the next release. "
+    "Send your comments to the project team by the end of the week.",
+)
+
+
+def host_key() -> str:
+    """
+    Identify this machine in the `thread_tuning` section of the configuration.
+
+    Returns:
+        str: The host name, processor and number of usable cores (e.g., "laptop/x86_64/8").
+    """
+    return f"{platform.node() or 'unknown'}/{platform.machine() or 'unknown'}/{len(available_cores())}"
+
+
+def available_cores() -> list:
+    """The CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_to_cores(cores):
+    """Restrict the current process to `cores` (Linux natively, elsewhere through psutil if installed)."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        else:
+            import psutil
+            psutil.Process().cpu_affinity(list(cores))
+    except (ImportError, OSError, AttributeError) as e:
+        print(f"Warning: could not pin the process to cores {list(cores)}: {e}")
+
+
+def physical_cores(cores) -> list:
+    """
+    Keep one logical CPU per physical core (drops hyper-threading siblings).
+
+    Uses the Linux sysfs topology; elsewhere `cores` are returned unchanged.
+
+    Args:
+        cores (list[int]): Logical CPU ids.
+
+    Returns:
+        list[int]: The first logical CPU of every physical core among `cores`.
+    """
+    seen, result = set(), []
+    for core in cores:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{core}/topology/thread_siblings_list", "r") as f:
+                siblings = f.read().strip()
+        except OSError:
+            return list(cores)
+        if siblings not in seen:
+            seen.add(siblings)
+            result.append(core)
+    return result
+
+
+def candidate_settings(cores=None) -> list:
+    """
+    The thread count / affinity layouts worth timing on this machine.
+
+    Intra-op thread counts are powers of two up to the number of cores, plus the
+    number of physical and of logical cores. Every count is tried unpinned
+    ("all"), pinned to as many logical cores ("compact") and, on machines with
+    hyper-threading, pinned to one logical CPU per physical core ("physical").
+
+    Only the intra-op thread count and the affinity are tuned: `generate` does not
+    use torch's inter-op pool, so its size is left to `backend_options`.
+
+    Args:
+        cores (list[int], optional): The usable cores. Defaults to `available_cores()`.
+
+    Returns:
+        list[dict]: Settings with `intra_op_threads`, `layout` and `cpu_affinity`
+        (a list of cores, or None for no pinning).
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    physical = physical_cores(cores)
+    counts = {len(cores), len(physical)}
+    count = 1
+    while count < len(cores):
+        counts.add(count)
+        count *= 2
+
+    candidates = []
+    for threads in sorted(counts):
+        layouts = [("all", None)]
+        if threads < len(cores):
+            layouts.append(("compact", cores[:threads]))
+        if len(physical) < len(cores) and threads <= len(physical):
+            layouts.append(("physical", physical[:threads]))
+        for layout, affinity in layouts:
+            candidates.append({"intra_op_threads": threads, "layout": layout, "cpu_affinity": affinity})
+    return candidates
+
+
+def apply_thread_settings(intra_op_threads=0, inter_op_threads=0, cpu_affinity=None):
+    """
+    Configure torch's thread pools and the process' CPU affinity.
+
+    The inter-op pool can only be sized once per process, before any parallel work
+    ran; later attempts print a warning and keep the current size.
+
+    Args:
+        intra_op_threads (int, optional): Threads used inside one operator (0 keeps
+            torch's default). Defaults to 0.
+        inter_op_threads (int, optional): Threads used across operators (0 keeps
+            torch's default). Defaults to 0.
+        cpu_affinity (list[int], optional): The cores the process is pinned to. None
+            keeps the current affinity. Defaults to None.
+    """
+    import torch
+
+    if cpu_affinity:
+        pin_to_cores(cpu_affinity)
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads and torch.get_num_interop_threads() != inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            print(f"Warning: could not set {inter_op_threads} inter-op threads: {e}")
+
+
+def tuned_backend_options(config: dict, backend: str) -> dict:
+    """
+    The backend options from the configuration, with this host's tuned thread settings applied.
+
+    Args:
+        config (dict): The application configuration.
+        backend (str): The inference backend in use.
+
+    Returns:
+        dict: Keyword arguments for the backend (possibly empty).
+    """
+    options = dict(config.get("backend_options", {}).get(backend) or {})
+    tuning = config.get("thread_tuning", {})
+    settings = tuning.get("hosts", {}).get(host_key())
+    if tuning.get("enabled", True) and settings and settings.get("backend", "torch") == backend:
+        for key in ("intra_op_threads", "cpu_affinity"):
+            if key in settings:
+                options[key] = settings[key]
+    return options
+
+
+def tune_threads(engine, src_lang, tgt_lang, candidates=None, texts=REPRESENTATIVE_TEXTS, max_length=256,
+                 num_beams=1, repeat=5, warmup=1, concurrency=1, progress=None) -> list:
+    """
+    Time the engine under every candidate thread layout.
+
+    Each round translates every text in `texts` once per caller; with `concurrency`
+    above one, that many threads translate at the same time, as when translations
+    overlap. The score of a layout is the median duration of `repeat` rounds.
+
+    The process' affinity and intra-op thread count are restored afterwards.
+
+    Args:
+        engine (TranslationEngine): A loaded engine using the "torch" backend.
+        src_lang (str): The source language code of `texts`.
+        tgt_lang (str): The target language code.
+        candidates (list[dict], optional): Settings to try. Defaults to `candidate_settings()`.
+        texts (Iterable[str], optional): The inputs. Defaults to `REPRESENTATIVE_TEXTS`.
+        max_length (int, optional): The generation length cap. Defaults to 256.
+        num_beams (int, optional): The beam width. Defaults to 1.
+        repeat (int, optional): Timed rounds per layout. Defaults to 5.
+        warmup (int, optional): Untimed rounds per layout. Defaults to 1.
+        concurrency (int, optional): Simultaneous callers. Defaults to 1.
+        progress (Callable[[dict], None], optional): Called with every layout's result.
+
+    Returns:
+        list[dict]: The candidates with their `latency_ms` (median of a round), fastest first.
+    """
+    import torch
+
+    candidates = candidates if candidates is not None else candidate_settings()
+    texts = list(texts)
+    original_threads, original_cores = torch.get_num_threads(), available_cores()
+
+    def round_once():
+        if concurrency == 1:
+            for text in texts:
+                engine.translate(text, src_lang, tgt_lang, max_length, num_beams)
+            return
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(lambda text: engine.translate(text, src_lang, tgt_lang, max_length, num_beams),
+                              texts * concurrency))
+
+    results = []
+    try:
+        for candidate in candidates:
+            pin_to_cores(candidate["cpu_affinity"] or original_cores)
+            torch.set_num_threads(candidate["intra_op_threads"])
+            for _ in range(warmup):
+                round_once()
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                round_once()
+                durations.append(time.perf_counter() - start)
+            results.append({**candidate, "latency_ms": statistics.median(durations) * 1000})
+            if progress is not None:
+                progress(results[-1])
+    finally:
+        pin_to_cores(original_cores)
+        torch.set_num_threads(original_threads)
+    return sorted(results, key=lambda result: result["latency_ms"])
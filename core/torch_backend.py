@@ -0,0 +1,127 @@
+import time
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+from transformers.generation import BaseStreamer
+from transformers.modeling_outputs import BaseModelOutput
+from .inference_backend import InferenceBackend
+from .model_loader import load_model
+from .thread_tuning import apply_thread_settings
+
+
+class TorchBackend(InferenceBackend):
+    """
+    Inference backend running the model with PyTorch and `model.generate`.
+
+    Attributes:
+        model (AutoModelForSeq2SeqLM): The loaded translation model.
+        device (torch.device): The computation device ('cpu' or 'cuda').
+        precision (str): The numeric precision the model runs in ("fp32", "bf16" or "int8").
+    """
+    name = "torch"
+
+    def __init__(self, model_path: str, device: torch.device = None, precision: str = "fp32",
+                 intra_op_threads: int = 0, inter_op_threads: int = 0, cpu_affinity=None):
+        """
+        Load the model on the given device.
+
+        Args:
+            model_path (str): The path to the pretrained translation model.
+            device (torch.device, optional): The device to run on. Defaults to the CPU.
+            precision (str, optional): "fp32", "bf16" or "int8" (see `load_model`).
+                Defaults to "fp32".
+            intra_op_threads (int, optional): torch threads used inside one operator
+                (0 keeps torch's default). Defaults to 0.
+            inter_op_threads (int, optional): torch threads used across operators
+                (0 keeps torch's default). Defaults to 0.
+            cpu_affinity (list[int], optional): Cores the process is pinned to.
+                Defaults to None (no pinning).
+        """
+        apply_thread_settings(intra_op_threads, inter_op_threads, cpu_affinity)
+        self.device = device if device is not None else torch.device("cpu")
+        self.model, self.precision = load_model(model_path, self.device, precision)
+        self.model = self.model.to(self.device)
+        self.model.eval()
+
+    def encode(self, input_ids, attention_mask):
+        with torch.no_grad():
+            hidden_states = self.model.get_encoder()(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=torch.from_numpy(attention_mask).to(self.device),
+            ).last_hidden_state
+        return hidden_states.float().cpu().numpy()
+
+    def generate(self, input_ids, attention_mask, forced_bos_token_id, max_length, num_beams,
+                 stop_events=(), on_tokens=None, deadline=None, encoder_hidden_states=None) -> list:
+        stopping_criteria = StoppingCriteriaList()
+        if stop_events:
+            stopping_criteria.append(_CancelCriteria(*stop_events))
+        if deadline is not None:
+            stopping_criteria.append(_DeadlineCriteria(deadline))
+
+        extra = {}
+        if encoder_hidden_states is not None:
+            # `generate` skips the encoder when its outputs are passed in
+            extra["encoder_outputs"] = BaseModelOutput(last_hidden_state=torch.from_numpy(encoder_hidden_states).to(
+                self.device, dtype=self.model.dtype))
+
+        # Runs inference under `torch.no_grad()` for better performance
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=torch.from_numpy(attention_mask).to(self.device),
+                max_length=max_length,
+                forced_bos_token_id=forced_bos_token_id,
+                num_beams=num_beams,
+                do_sample=False,
+                stopping_criteria=stopping_criteria,
+                streamer=_CallbackStreamer(on_tokens) if on_tokens is not None else None,
+                **extra,
+            )
+        return outputs.tolist()
+
+
+class _CancelCriteria(StoppingCriteria):
+    """
+    Stopping criterion that ends generation as soon as any of its events is set.
+
+    Args:
+        *events (threading.Event): The events that request cancellation.
+    """
+    def __init__(self, *events):
+        self.events = events
+
+    def __call__(self, input_ids, scores, **kwargs):
+        stop = any(event.is_set() for event in self.events)
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+
+class _DeadlineCriteria(StoppingCriteria):
+    """
+    Stopping criterion that ends generation once a `time.monotonic()` deadline has passed.
+
+    Args:
+        deadline (float): The `time.monotonic()` value after which generation stops.
+    """
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def __call__(self, input_ids, scores, **kwargs):
+        stop = time.monotonic() >= self.deadline
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+
+class _CallbackStreamer(BaseStreamer):
+    """
+    Streamer that forwards the token ids produced at each generation step to a callback.
+
+    Args:
+        callback (Callable[[list[int]], None]): Receives the new token ids.
+    """
+    def __init__(self, callback):
+        self.callback = callback
+
+    def put(self, value):
+        self.callback(value.reshape(-1).tolist())
+
+    def end(self):
+        pass
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from .metrics import NullMetrics
+
+
+class TranslationCache:
+    """
+    Two-tier cache for finished translations.
+
+    Lookups go to a bounded in-memory LRU first, then to an SQLite database on disk
+    that survives restarts. Both tiers evict by size and by age. Concurrent requests
+    for the same key share one computation instead of running the model twice.
+
+    Attributes:
+        max_memory_entries (int): The capacity of the in-memory LRU.
+        max_disk_entries (int): The capacity of the SQLite tier.
+        max_age (float): The time in seconds after which an entry expires.
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that had to be computed.
+        shared (int): Lookups that joined an identical request already in flight.
+        metrics (MetricsSink): Receives the hit / miss / shared counters.
+    """
+    def __init__(self, db_path=None, max_memory_entries=512, max_disk_entries=50000, max_age_days=30,
+                 metrics=None):
+        """
+        Initialize the cache and open (or create) its SQLite database.
+
+        Args:
+            db_path (str, optional): The SQLite file path. If None, only the
+                in-memory tier is used.
+            max_memory_entries (int, optional): The LRU capacity. Defaults to 512.
+            max_disk_entries (int, optional): The SQLite capacity. Defaults to 50000.
+            max_age_days (float, optional): The entry lifetime in days. Defaults to 30.
+            metrics (MetricsSink, optional): Where hits and misses are counted.
+                Defaults to `NullMetrics()`.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.metrics = metrics if metrics is not None else NullMetrics()
+
+        self._memory = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.RLock()
+        self._db = None
+        self._puts_since_trim = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed_at)")
+            self._trim_disk()
+
+    @staticmethod
+    def make_key(text, src_lang, tgt_lang, max_length, num_beams, model_id) -> str:
+        """
+        Build the cache key for a translation request.
+
+        The text is normalized (Unicode NFC, unified line endings, no trailing
+        whitespace) so trivially different copies of the same text share an entry.
+
+        Args:
+            text (str): The text to translate.
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            max_length (int): The maximum output length.
+            num_beams (int): The beam search width.
+            model_id (str): An identifier of the model that produces the translation.
+
+        Returns:
+            str: A hex digest identifying the request.
+        """
+        normalized = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+        normalized = "\n".join(line.rstrip() for line in normalized.strip().split("\n"))
+        raw = "\x1f".join([normalized, src_lang, tgt_lang, str(max_length), str(num_beams), str(model_id)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key, count_miss: bool = True):
+        """
+        Look up a translation in memory, then on disk.
+
+        Args:
+            key (str): A key from `make_key`.
+            count_miss (bool, optional): Whether a miss is counted. Pass False when a
+                miss is looked up again through `get_or_compute`, so the request is
+                only counted once. Defaults to True.
+
+        Returns:
+            str or None: The cached translation, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translation, created_at = entry
+                if now - created_at <= self.max_age:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.metrics.increment("cache_hits_total")
+                    return translation
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT translation, created_at FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.max_age:
+                    self._db.execute("UPDATE translations SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.metrics.increment("cache_hits_total")
+                    return row[0]
+
+            if count_miss:
+                self.misses += 1
+                self.metrics.increment("cache_misses_total")
+            return None
+
+    def put(self, key, translation):
+        """
+        Store a translation in both tiers.
+
+        Args:
+            key (str): A key from `make_key`.
+            translation (str): The translated text.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)", (key, translation, now, now)
+                )
+                self._db.commit()
+                self._puts_since_trim += 1
+                if self._puts_since_trim >= 100:
+                    self._trim_disk()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached translation, computing it at most once across threads.
+
+        If another thread is already computing the same key, this call waits for
+        that result instead of starting a second generation.
+
+        Args:
+            key (str): A key from `make_key`.
+            compute (Callable[[], str]): Produces the translation on a miss.
+
+        Returns:
+            str: The cached or freshly computed translation.
+
+        Raises:
+            Exception: Whatever `compute` raised (also for callers that waited on it).
+        """
+        with self._lock:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+            else:
+                self.shared += 1
+                self.metrics.increment("cache_shared_total")
+
+        if not owner:
+            return future.result()
+
+        try:
+            translation = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.put(key, translation)
+            future.set_result(translation)
+            return translation
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss counters and current tier sizes.
+
+        Returns:
+            dict: Keys `hits`, `misses`, `shared`, `memory_entries` and `disk_entries`.
+        """
+        with self._lock:
+            disk_entries = 0
+            if self._db is not None:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+    def discard(self, key):
+        """
+        Remove a translation from both tiers.
+
+        Args:
+            key (str): A key from `make_key`.
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations WHERE key = ?", (key,))
+                self._db.commit()
+
+    def close(self):
+        """Close the SQLite database."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, translation, created_at):
+        """Insert into the in-memory LRU and evict the least recently used entries."""
+        self._memory[key] = (translation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        """Delete expired rows, then the least recently used rows above capacity."""
+        self._puts_since_trim = 0
+        self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.max_age,))
+        self._db.execute(
+            "DELETE FROM translations WHERE key IN ("
+            "SELECT key FROM translations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+        self._db.commit()
@@ -1,7 +1,73 @@
 #  AutoTokenizer => convert text to numbers (Tokens) and vice versa.
 # (Sequence-to-Sequence Language Model) => load translation model
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import copy
+import os
+import queue
+import threading
+import time
+from .inference_backend import create_backend
+from .metrics import NullMetrics
+from .text_segmenter import segment_text
+
+# Text tokenized once per source language to find the special tokens wrapped around inputs
+_PROBE_TEXT = "Hello world"
+
+
+class TranslationCancelled(Exception):
+    """Raised when a translation is aborted through its cancel event."""
+
+
+class LanguagePairSession:
+    """
+    The precomputed token ids of one (source, target) language pair.
+
+    Inputs are tokenized without special tokens and wrapped in `prefix_ids` and
+    `suffix_ids` (the source language code and `</s>` for NLLB), so translating
+    never reconfigures the shared tokenizer. Sessions are immutable and can be
+    used from any number of threads at once.
+
+    Attributes:
+        src_lang (str): The source language code.
+        tgt_lang (str): The target language code.
+        prefix_ids (tuple[int]): Special tokens placed before every input.
+        suffix_ids (tuple[int]): Special tokens placed after every input.
+        forced_bos_token_id (int or None): The token forced as the first generated
+            token (the target language code), or None for single-pair models such as
+            MarianMT, whose vocabulary has no language codes.
+    """
+    __slots__ = ("src_lang", "tgt_lang", "prefix_ids", "suffix_ids", "forced_bos_token_id", "_tokenizer")
+
+    def __init__(self, tokenizer, src_lang, tgt_lang, prefix_ids, suffix_ids, forced_bos_token_id):
+        self._tokenizer = tokenizer
+        self.src_lang = src_lang
+        self.tgt_lang = tgt_lang
+        self.prefix_ids = tuple(prefix_ids)
+        self.suffix_ids = tuple(suffix_ids)
+        self.forced_bos_token_id = forced_bos_token_id
+
+    @property
+    def num_special_tokens(self) -> int:
+        """The number of special tokens added to every input."""
+        return len(self.prefix_ids) + len(self.suffix_ids)
+
+    @property
+    def num_output_prefix_tokens(self) -> int:
+        """The tokens every output starts with: the decoder start token and the forced language code."""
+        return 1 if self.forced_bos_token_id is None else 2
+
+    def encode(self, texts) -> list:
+        """
+        Tokenize texts for this pair's source language.
+
+        Args:
+            texts (list[str]): The input texts.
+
+        Returns:
+            list[list[int]]: The token ids of every text, special tokens included.
+        """
+        prefix, suffix = list(self.prefix_ids), list(self.suffix_ids)
+        encoded = self._tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+        return [prefix + ids + suffix for ids in encoded]
 
 
 class TranslationEngine:
@@ -10,33 +76,132 @@ class TranslationEngine:
 
     This class loads and manages a sequence-to-sequence (Seq2Seq) language model
     (such as NLLB or MarianMT) and provides a clean API for text translation.
+    Tokenization, batching and decoding happen here; running the model is delegated
+    to an `InferenceBackend` (PyTorch or ONNX Runtime).
+
+    The engine is safe to call from several threads at once: the language settings
+    of a request live in a `LanguagePairSession`, and the shared tokenizer is never
+    reconfigured after loading.
 
     Attributes:
         tokenizer (AutoTokenizer): Converts text to tokens and back.
-        model (AutoModelForSeq2SeqLM): The loaded translation model.
-        device (torch.device): The computation device ('cpu' or 'cuda').
+        backend (InferenceBackend): Runs the model and generates token ids.
+        precision (str): The numeric precision the model runs in ("fp32", "bf16" or "int8").
+        model_id (str): A short identifier of the loaded model, backend and precision
+            (used in cache keys).
+        language_codes (frozenset[str]): The language code tokens of the tokenizer
+            (e.g., "fra_Latn"); empty for models without any (e.g., MarianMT).
+        load_times (dict): Seconds spent loading the "tokenizer" and the "model".
+        metrics (MetricsSink): Receives tokenize / generate / decode timings and token counts.
+        generation_budget (GenerationBudget or None): Limits every input's output length
+            according to its own length (on top of `max_length`).
+        encoder_cache (EncoderCache or None): Keeps encoder outputs, so translating the
+            same text into another language only runs the decoder.
+        translation_memory (TranslationMemory or None): Answers documents' segments
+            that were (nearly) translated before, without running the model.
     """
-    def __init__(self, model_path: str, device: torch.device):
+    def __init__(self, model_path: str, device=None, precision: str = "fp32", backend: str = "torch",
+                 backend_options: dict = None, metrics=None, generation_budget=None, encoder_cache=None,
+                 translation_memory=None):
         """
         Initialize the translation engine by loading the model and tokenizer.
 
         Args:
             model_path (str): The path to the pretrained translation model.
-            device (torch.device): The device to run the model on (CPU or GPU).
+            device (torch.device, optional): The device to run the model on (CPU or GPU).
+                Only used by the "torch" backend. Defaults to the CPU.
+            precision (str, optional): "fp32", "bf16" or "int8" (see `load_model`).
+                Unsupported choices fall back to "fp32". Defaults to "fp32".
+            backend (str, optional): The inference backend, "torch" or "onnx".
+                Defaults to "torch".
+            backend_options (dict, optional): Extra backend settings (e.g.,
+                `intra_op_threads` for ONNX Runtime). Defaults to None.
+            metrics (MetricsSink, optional): Where stage timings and token counts are
+                recorded. Defaults to `NullMetrics()`.
+            generation_budget (GenerationBudget, optional): Derives each input's output
+                budget from its length and learns length ratios per language pair.
+                Defaults to None (only `max_length` applies).
+            encoder_cache (EncoderCache, optional): Reuses encoder outputs across target
+                languages. Defaults to None (the encoder runs for every translation).
+            translation_memory (TranslationMemory, optional): Segment-level memory
+                used by `translate_document` and `translate_document_stream`.
+                Defaults to None.
 
         Raises:
             OSError: If the model files cannot be found or loaded.
+            ValueError: If `precision` or `backend` is not known.
         """
-        # load model
+        self.metrics = metrics if metrics is not None else NullMetrics()
+        self.generation_budget = generation_budget
+        self.encoder_cache = encoder_cache
+        self.translation_memory = translation_memory
+
+        # load model (transformers / torch are imported here, so importing this module stays cheap)
+        start = time.perf_counter()
+        from transformers import AutoTokenizer
         self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
-        self.device = device
+        # Language codes are the special tokens that are not one of the named ones (<s>, </s>, ...)
+        named = {getattr(self.tokenizer, f"{name}_token", None) for name in ("bos", "eos", "unk", "sep", "pad",
+                                                                            "cls", "mask")}
+        self.language_codes = frozenset(self.tokenizer.all_special_tokens) - named
+        tokenizer_loaded = time.perf_counter()
+        self.backend = create_backend(backend, model_path, device, precision, **(backend_options or {}))
+        self.load_times = {"tokenizer": tokenizer_loaded - start, "model": time.perf_counter() - tokenizer_loaded}
+        self.precision = self.backend.precision
+        self.model_id = f"{os.path.basename(os.path.normpath(model_path))}:{backend}-{self.precision}"
 
-        self.model = self.model.to(device)
-        self.model.eval()
+        # (src_lang, tgt_lang) => LanguagePairSession, created on first use
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        # A private copy of the tokenizer whose source language may be switched (under the lock)
+        self._probe_tokenizer = None
+
+    # method to check the language codes of a request.
+    def supports_pair(self, src_lang, tgt_lang) -> bool:
+        """
+        Check whether the model knows both language codes.
+
+        Args:
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+
+        Returns:
+            bool: True if both are language codes of the tokenizer, or if the model
+            takes no language codes at all (then any pair is passed through).
+        """
+        return not self.language_codes or (src_lang in self.language_codes and tgt_lang in self.language_codes)
+
+    # method to get the precomputed token ids of a language pair.
+    def session(self, src_lang, tgt_lang) -> LanguagePairSession:
+        """
+        Return the (cached) session of a language pair.
+
+        Args:
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+
+        Returns:
+            LanguagePairSession: The pair's precomputed token ids.
+        """
+        session = self._sessions.get((src_lang, tgt_lang))
+        if session is not None:
+            return session
+        with self._sessions_lock:
+            session = self._sessions.get((src_lang, tgt_lang))
+            if session is None:
+                prefix_ids, suffix_ids = self._source_special_tokens(src_lang)
+                forced_bos_token_id = self.tokenizer.convert_tokens_to_ids(tgt_lang)
+                if forced_bos_token_id == self.tokenizer.unk_token_id:
+                    # Not a language code of this vocabulary (e.g., a MarianMT model)
+                    forced_bos_token_id = None
+                session = LanguagePairSession(self.tokenizer, src_lang, tgt_lang, prefix_ids, suffix_ids,
+                                              forced_bos_token_id)
+                self._sessions[(src_lang, tgt_lang)] = session
+        return session
 
     # method to translate.
-    def translate(self, text, src_lang, tgt_lang, max_length=500, num_beams=3) -> str:
+    def translate(self, text, src_lang, tgt_lang, max_length=500, num_beams=3, cancel_event=None,
+                  deadline=None) -> str:
         """
         Translate text from one language to another using the loaded model.
 
@@ -48,10 +213,17 @@ class TranslationEngine:
                 Defaults to 500.
             num_beams (int, optional): The beam search width for translation quality.
                 Higher values increase accuracy but slow down performance. Defaults to 1.
+            cancel_event (threading.Event, optional): When set, generation stops at the
+                next decoding step and `TranslationCancelled` is raised.
+            deadline (float, optional): A `time.monotonic()` value. Once it passes,
+                generation stops and the best output so far is returned.
 
         Returns:
             str: The translated text.
 
+        Raises:
+            TranslationCancelled: If `cancel_event` was set before generation finished.
+
         Example:
             >>> engine = TranslationEngine("path/to/model", torch.device("cpu"))
             >>> result = engine.translate("Hello world!", "eng_Latn", "arb_Arab")
@@ -60,28 +232,533 @@ class TranslationEngine:
 
         Notes:
             - Uses `forced_bos_token_id` to set the target language explicitly.
-            - Runs inference under `torch.no_grad()` for better performance.
-        """
-        # Set source and target languages for the tokenizer
-        self.tokenizer.src_lang = src_lang
-        self.tokenizer.tgt_lang = tgt_lang
-
-        # Encode input text
-        inputs = self.tokenizer(text, return_tensors="pt")
-        target_lang_id = self.tokenizer.convert_tokens_to_ids(tgt_lang)
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-        # Perform translation
-        with torch.no_grad():
-            outputs = self.model.generate(
-                input_ids=inputs['input_ids'],
-                attention_mask=inputs['attention_mask'],
-                max_length=max_length,
-                forced_bos_token_id=target_lang_id,
-                num_beams=num_beams,
-                do_sample=False,
-            )
-
-            # Decode translated text
-            translated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            return translated_text
+        """
+        return self.translate_batch([text], src_lang, tgt_lang, max_length, num_beams,
+                                    cancel_event=cancel_event, deadline=deadline)[0]
+
+    # method to translate many texts at once.
+    def translate_batch(self, texts, src_lang, tgt_lang, max_length=500, num_beams=3,
+                        batch_size=16, max_batch_tokens=4096, cancel_event=None, deadline=None) -> list:
+        """
+        Translate a list of texts, grouping inputs of similar length into padded batches.
+
+        Inputs are tokenized once, sorted by token length and split into buckets.
+        Each bucket is padded only up to its own longest input and translated with a
+        single `generate` call, so short segments never pay for the padding of long ones.
+
+        Args:
+            texts (list[str]): The input texts to translate.
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+            max_length (int, optional): The maximum number of tokens to generate.
+                Defaults to 500.
+            num_beams (int, optional): The beam search width. Defaults to 3.
+            batch_size (int, optional): The maximum number of inputs per bucket.
+                Defaults to 16.
+            max_batch_tokens (int, optional): The maximum number of padded input tokens
+                per bucket (bucket size × longest input). Defaults to 4096.
+            cancel_event (threading.Event, optional): When set, generation stops at the
+                next decoding step and `TranslationCancelled` is raised.
+            deadline (float, optional): A `time.monotonic()` value. Once it passes,
+                generation stops and the best output so far is returned.
+
+        Returns:
+            list[str]: The translated texts, in the same order as `texts`.
+
+        Raises:
+            TranslationCancelled: If `cancel_event` was set before generation finished.
+
+        Example:
+            >>> engine.translate_batch(["Hello!", "How are you?"], "eng_Latn", "fra_Latn")
+            ["Bonjour !", "Comment allez-vous ?"]
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.translate_encoded(self.encode(texts, src_lang), src_lang, tgt_lang, max_length, num_beams,
+                                      batch_size, max_batch_tokens, cancel_event, deadline)
+
+    # method to tokenize texts ahead of generation.
+    def encode(self, texts, src_lang) -> list:
+        """
+        Tokenize texts for `translate_encoded`, without padding.
+
+        Splitting tokenization from generation lets a caller tokenize the next batch
+        on another thread while the current one is generating.
+
+        Args:
+            texts (list[str]): The input texts.
+            src_lang (str): The source language code (e.g., "eng_Latn").
+
+        Returns:
+            list[list[int]]: The token ids of every text, language code and `</s>` included.
+        """
+        # Only the source side of the session matters for tokenization
+        session = self.session(src_lang, src_lang)
+        with self.metrics.span("tokenize"):
+            encoded = session.encode(texts)
+        self.metrics.increment("input_tokens_total", sum(len(ids) for ids in encoded))
+        return encoded
+
+    # method to translate already tokenized texts.
+    def translate_encoded(self, encoded, src_lang, tgt_lang, max_length=500, num_beams=3, batch_size=16,
+                          max_batch_tokens=4096, cancel_event=None, deadline=None) -> list:
+        """
+        Translate inputs tokenized by `encode`, bucketing them by length like `translate_batch`.
+
+        With a `generation_budget`, each bucket may generate only as many tokens as
+        its longest input warrants (never more than `max_length`), and outputs that
+        end on their own update the language pair's length ratio.
+
+        Args:
+            encoded (list[list[int]]): The token ids from `encode`.
+            src_lang (str): The source language code the inputs were encoded with.
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+            max_length (int, optional): The maximum number of tokens to generate.
+                Defaults to 500.
+            num_beams (int, optional): The beam search width. Defaults to 3.
+            batch_size (int, optional): The maximum number of inputs per bucket.
+                Defaults to 16.
+            max_batch_tokens (int, optional): The maximum number of padded input tokens
+                per bucket. Defaults to 4096.
+            cancel_event (threading.Event, optional): When set, generation stops at the
+                next decoding step and `TranslationCancelled` is raised.
+            deadline (float, optional): A `time.monotonic()` value. Once it passes,
+                generation stops and the best output so far is returned.
+
+        Returns:
+            list[str]: The translated texts, in the same order as `encoded`.
+
+        Raises:
+            TranslationCancelled: If `cancel_event` was set before generation finished.
+        """
+        session = self.session(src_lang, tgt_lang)
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        stop_events = (cancel_event,) if cancel_event is not None else ()
+
+        results = [""] * len(encoded)
+        for bucket in _length_buckets(order, encoded, batch_size, max_batch_tokens):
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranslationCancelled()
+
+            # Pad the bucket only as far as its longest input
+            with self.metrics.span("tokenize"):
+                inputs = self._pad([encoded[i] for i in bucket])
+
+            # Perform translation
+            input_lengths = [len(encoded[i]) - session.num_special_tokens for i in bucket]
+            bucket_max_length = self._budget_max_length(src_lang, tgt_lang, max(input_lengths), max_length)
+            with self.metrics.span("generate"):
+                encoder_hidden_states = self._encoder_states(src_lang, [encoded[i] for i in bucket], inputs)
+                outputs = self.backend.generate(
+                    inputs['input_ids'],
+                    inputs['attention_mask'],
+                    forced_bos_token_id=session.forced_bos_token_id,
+                    max_length=bucket_max_length,
+                    num_beams=num_beams,
+                    stop_events=stop_events,
+                    deadline=deadline,
+                    encoder_hidden_states=encoder_hidden_states,
+                )
+            self.metrics.increment("output_tokens_total", sum(len(ids) for ids in outputs))
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranslationCancelled()
+            if deadline is not None and time.monotonic() >= deadline:
+                self.metrics.increment("deadline_stops_total")
+            self._learn_lengths(src_lang, tgt_lang, input_lengths, outputs)
+
+            # Decode translated texts back into their original positions
+            with self.metrics.span("decode"):
+                decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            for index, translated_text in zip(bucket, decoded):
+                results[index] = translated_text
+        return results
+
+    # method to translate long, multi-sentence text.
+    def translate_document(self, text, src_lang, tgt_lang, max_length=500, num_beams=3,
+                           max_segment_chars=400, cancel_event=None, deadline=None, history=None) -> str:
+        """
+        Translate arbitrarily long text sentence by sentence, keeping its layout.
+
+        The text is split into sentences (see `segment_text`), the sentences are
+        translated together with `translate_batch`, and the result is reassembled with
+        the original line breaks, bullets and indentation. Cost grows linearly with the
+        length of the text and no sentence is truncated by `max_length`.
+
+        Args:
+            text (str): The input text to translate.
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+            max_length (int, optional): The maximum number of tokens to generate per
+                sentence. Defaults to 500.
+            num_beams (int, optional): The beam search width. Defaults to 3.
+            max_segment_chars (int, optional): The longest sentence sent to the model
+                in one piece. Defaults to 400.
+            cancel_event (threading.Event, optional): When set, generation stops at the
+                next decoding step and `TranslationCancelled` is raised.
+            deadline (float, optional): A `time.monotonic()` value. Once it passes,
+                generation stops and the best output so far is returned.
+            history (DocumentHistory, optional): The previous document for these
+                settings; translations of its unchanged sentences are reused, and this
+                document replaces it. Defaults to None.
+
+        Returns:
+            str: The translated text.
+
+        Raises:
+            TranslationCancelled: If `cancel_event` was set before generation finished.
+        """
+        document = segment_text(text, max_segment_chars)
+        known = self._known_segments(document.segments, src_lang, tgt_lang, max_length, num_beams, history)
+        translations = self._translate_segments(document.segments, known, src_lang, tgt_lang, max_length,
+                                                num_beams, cancel_event, deadline)
+        self._record_document(history, document.segments, translations, src_lang, tgt_lang, max_length,
+                              num_beams, deadline)
+        return document.reassemble(translations)
+
+    # method to stream a translation token by token.
+    def translate_stream(self, text, src_lang, tgt_lang, max_length=500, num_beams=1, cancel_event=None,
+                         deadline=None):
+        """
+        Translate text and yield the decoded output incrementally as tokens are generated.
+
+        Generation runs on a helper thread; every time a new token changes the decoded
+        text, the translation so far is yielded. The last value is the full translation.
+        Closing the generator early stops generation.
+
+        Args:
+            text (str): The input text to translate.
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+            max_length (int, optional): The maximum number of tokens to generate.
+                Defaults to 500.
+            num_beams (int, optional): The beam search width. Streaming needs greedy
+                decoding; with more than one beam the full translation is yielded once.
+                Defaults to 1.
+            cancel_event (threading.Event, optional): When set, generation stops at the
+                next decoding step and `TranslationCancelled` is raised.
+            deadline (float, optional): A `time.monotonic()` value. Once it passes,
+                generation stops and the best output so far is returned.
+
+        Yields:
+            str: The translation decoded so far.
+
+        Raises:
+            TranslationCancelled: If `cancel_event` was set before generation finished.
+
+        Example:
+            >>> for partial in engine.translate_stream("Hello world!", "eng_Latn", "fra_Latn"):
+            ...     print(partial)
+            "Bonjour"
+            "Bonjour le monde !"
+        """
+        if num_beams > 1:
+            yield self.translate(text, src_lang, tgt_lang, max_length, num_beams, cancel_event=cancel_event,
+                                 deadline=deadline)
+            return
+
+        session = self.session(src_lang, tgt_lang)
+        with self.metrics.span("tokenize"):
+            inputs = self._pad(session.encode([text]))
+        self.metrics.increment("input_tokens_total", inputs["input_ids"].size)
+        input_length = inputs["input_ids"].shape[1] - session.num_special_tokens
+        max_length = self._budget_max_length(src_lang, tgt_lang, input_length, max_length)
+
+        streamer = _PartialTextStreamer(self.tokenizer)
+        stop_event = threading.Event()
+        events = [stop_event] if cancel_event is None else [stop_event, cancel_event]
+        outcome = {}
+
+        def generate():
+            start = time.perf_counter()
+            try:
+                encoder_hidden_states = self._encoder_states(src_lang, inputs["input_ids"].tolist(), inputs)
+                outcome["output"] = self.backend.generate(
+                    inputs['input_ids'],
+                    inputs['attention_mask'],
+                    forced_bos_token_id=session.forced_bos_token_id,
+                    max_length=max_length,
+                    num_beams=1,
+                    stop_events=events,
+                    on_tokens=streamer.put,
+                    deadline=deadline,
+                    encoder_hidden_states=encoder_hidden_states,
+                )
+                self.metrics.increment("output_tokens_total", len(outcome["output"][0]))
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                self.metrics.observe("generate", time.perf_counter() - start)
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True)
+        start = time.perf_counter()
+        thread.start()
+        partial = ""
+        try:
+            for text_so_far in streamer:
+                if not partial:
+                    self.metrics.observe("first_token", time.perf_counter() - start)
+                partial = text_so_far
+                yield partial
+        finally:
+            # Stops generation if the caller closed the generator early
+            stop_event.set()
+            thread.join()
+
+        if "error" in outcome:
+            raise outcome["error"]
+        if cancel_event is not None and cancel_event.is_set():
+            raise TranslationCancelled()
+        if deadline is not None and time.monotonic() >= deadline:
+            self.metrics.increment("deadline_stops_total")
+        self._learn_lengths(src_lang, tgt_lang, [input_length], outcome["output"])
+        with self.metrics.span("decode"):
+            translated_text = self.tokenizer.decode(outcome["output"][0], skip_special_tokens=True)
+        if translated_text != partial:
+            yield translated_text
+
+    # method to stream a long text: first sentence token by token, the rest as one batch.
+    def translate_document_stream(self, text, src_lang, tgt_lang, max_length=500, num_beams=1,
+                                  max_segment_chars=400, cancel_event=None, deadline=None, history=None):
+        """
+        Translate long text, yielding progressively more complete translations.
+
+        The first sentence is streamed token by token so the user sees words almost
+        immediately; the remaining sentences are then translated as one batch. The
+        last value yielded is the complete translation with the original layout.
+
+        Args:
+            text (str): The input text to translate.
+            src_lang (str): The source language code (e.g., "eng_Latn").
+            tgt_lang (str): The target language code (e.g., "fra_Latn").
+            max_length (int, optional): The maximum number of tokens to generate per
+                sentence. Defaults to 500.
+            num_beams (int, optional): The beam search width. Defaults to 1.
+            max_segment_chars (int, optional): The longest sentence sent to the model
+                in one piece. Defaults to 400.
+            cancel_event (threading.Event, optional): When set, generation stops at the
+                next decoding step and `TranslationCancelled` is raised.
+            deadline (float, optional): A `time.monotonic()` value. Once it passes,
+                generation stops and the best output so far is returned.
+            history (DocumentHistory, optional): See `translate_document`.
+
+        Yields:
+            str: The translation so far.
+
+        Raises:
+            TranslationCancelled: If `cancel_event` was set before generation finished.
+        """
+        document = segment_text(text, max_segment_chars)
+        if not document.segments:
+            yield document.reassemble([])
+            return
+
+        known = self._known_segments(document.segments, src_lang, tgt_lang, max_length, num_beams, history)
+        first = known[0]
+        if first is not None:
+            yield document.reassemble_partial([first])
+        else:
+            first = ""
+            for first in self.translate_stream(document.segments[0], src_lang, tgt_lang, max_length, num_beams,
+                                               cancel_event=cancel_event, deadline=deadline):
+                yield document.reassemble_partial([first])
+            self._remember_segments([document.segments[0]], [first], src_lang, tgt_lang, deadline)
+
+        translations = [first] + self._translate_segments(document.segments[1:], known[1:], src_lang, tgt_lang,
+                                                          max_length, num_beams, cancel_event, deadline)
+        self._record_document(history, document.segments, translations, src_lang, tgt_lang, max_length,
+                              num_beams, deadline)
+        yield document.reassemble(translations)
+
+    def _known_segments(self, segments, src_lang, tgt_lang, max_length, num_beams, history):
+        """
+        Translations available without the model: unchanged segments of the previous
+        document first, then the translation memory. None marks segments still to translate.
+        """
+        if history is not None:
+            known = history.reuse(segments, src_lang, tgt_lang, max_length, num_beams)
+            reused = sum(translation is not None for translation in known)
+            if reused:
+                self.metrics.increment("segments_reused_total", reused)
+        else:
+            known = [None] * len(segments)
+        if self.translation_memory is not None:
+            known = [self.translation_memory.lookup(segment, src_lang, tgt_lang) if translation is None
+                     else translation for segment, translation in zip(segments, known)]
+        return known
+
+    def _translate_segments(self, segments, known, src_lang, tgt_lang, max_length, num_beams, cancel_event,
+                            deadline):
+        """`translate_batch` for the segments whose translation is not `known` yet."""
+        # Repeated segments are translated once
+        missing = list(dict.fromkeys(segment for segment, result in zip(segments, known) if result is None))
+        if not missing:
+            return list(known)
+        translations = self.translate_batch(missing, src_lang, tgt_lang, max_length, num_beams,
+                                            cancel_event=cancel_event, deadline=deadline)
+        self._remember_segments(missing, translations, src_lang, tgt_lang, deadline)
+        translated = dict(zip(missing, translations))
+        return [translated[segment] if result is None else result for segment, result in zip(segments, known)]
+
+    @staticmethod
+    def _record_document(history, segments, translations, src_lang, tgt_lang, max_length, num_beams, deadline):
+        """Make this document the one the next text is diffed against (unless the deadline may have cut it)."""
+        if history is None or (deadline is not None and time.monotonic() >= deadline):
+            return
+        history.record(segments, translations, src_lang, tgt_lang, max_length, num_beams)
+
+    def _remember_segments(self, segments, translations, src_lang, tgt_lang, deadline):
+        """Store finished translations in the translation memory (not ones the deadline may have cut short)."""
+        if self.translation_memory is None or (deadline is not None and time.monotonic() >= deadline):
+            return
+        for segment, translation in zip(segments, translations):
+            self.translation_memory.add(segment, src_lang, tgt_lang, translation)
+
+    def _encoder_states(self, src_lang, rows, inputs):
+        """
+        Return the padded encoder hidden states of a bucket, or None without an encoder cache.
+
+        Only the rows missing from the cache go through the encoder (as one batch of
+        their own); the rest are copied from the cache.
+        """
+        if self.encoder_cache is None:
+            return None
+        import numpy as np
+
+        keys = [self.encoder_cache.make_key(src_lang, ids, self.model_id) for ids in rows]
+        states = [self.encoder_cache.get(key) for key in keys]
+        missing = [i for i, found in enumerate(states) if found is None]
+        self.metrics.increment("encoder_cache_hits_total", len(rows) - len(missing))
+        if missing:
+            self.metrics.increment("encoder_cache_misses_total", len(missing))
+            width = max(len(rows[i]) for i in missing)
+            with self.metrics.span("encode"):
+                hidden_states = self.backend.encode(inputs["input_ids"][missing, :width],
+                                                    inputs["attention_mask"][missing, :width])
+            for row, i in enumerate(missing):
+                states[i] = hidden_states[row, :len(rows[i])].copy()
+                self.encoder_cache.put(keys[i], states[i])
+
+        padded = np.zeros((len(rows), inputs["input_ids"].shape[1], states[0].shape[-1]), dtype=states[0].dtype)
+        for i, found in enumerate(states):
+            padded[i, :len(found)] = found
+        return padded
+
+    def _budget_max_length(self, src_lang, tgt_lang, input_length, max_length):
+        """
+        Return the `generate` max_length for an input of `input_length` tokens.
+
+        The output starts with the decoder start token and the language code and
+        needs room for `</s>`; the result never exceeds `max_length`.
+        """
+        if self.generation_budget is None:
+            return max_length
+        budget = self.generation_budget.max_new_tokens(src_lang, tgt_lang, input_length)
+        return min(max_length, budget + self.session(src_lang, tgt_lang).num_output_prefix_tokens + 1)
+
+    def _learn_lengths(self, src_lang, tgt_lang, input_lengths, outputs):
+        """Feed the lengths of outputs that ended with `</s>` (not cut off) to the generation budget."""
+        if self.generation_budget is None:
+            return
+        eos, pad = self.tokenizer.eos_token_id, self.tokenizer.pad_token_id
+        prefix = self.session(src_lang, tgt_lang).num_output_prefix_tokens
+        for input_length, output in zip(input_lengths, outputs):
+            end = len(output)
+            while end > prefix and output[end - 1] == pad:
+                end -= 1
+            if end > prefix and output[end - 1] == eos:
+                self.generation_budget.observe(src_lang, tgt_lang, input_length, end - prefix - 1)
+
+    def _source_special_tokens(self, src_lang):
+        """
+        Find the special tokens the tokenizer wraps around `src_lang` inputs; the caller
+        must hold `_sessions_lock`.
+
+        Returns:
+            tuple: (prefix ids, suffix ids).
+        """
+        for (session_src, _), session in self._sessions.items():
+            if session_src == src_lang:
+                return session.prefix_ids, session.suffix_ids
+
+        if self._probe_tokenizer is None:
+            self._probe_tokenizer = copy.deepcopy(self.tokenizer)
+        if hasattr(self._probe_tokenizer, "src_lang"):
+            self._probe_tokenizer.src_lang = src_lang
+        full = self._probe_tokenizer(_PROBE_TEXT)["input_ids"]
+        plain = self._probe_tokenizer(_PROBE_TEXT, add_special_tokens=False)["input_ids"]
+        for start in range(len(full) - len(plain) + 1):
+            if full[start:start + len(plain)] == plain:
+                return full[:start], full[start + len(plain):]
+        raise ValueError(f"Cannot locate the special tokens the tokenizer adds for '{src_lang}'")
+
+    def _pad(self, rows):
+        """Right-pad token id lists into `input_ids` / `attention_mask` int64 arrays."""
+        import numpy as np
+
+        length = max(len(ids) for ids in rows)
+        input_ids = np.full((len(rows), length), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(rows), length), dtype=np.int64)
+        for row, ids in enumerate(rows):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+class _PartialTextStreamer:
+    """
+    Collects generated tokens and queues the decoded text after each step.
+
+    Iterating over the streamer yields the text decoded so far until `end()` is called.
+
+    Args:
+        tokenizer (AutoTokenizer): The tokenizer used to decode tokens.
+    """
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.token_ids = []
+        self.text = ""
+        self.queue = queue.Queue()
+
+    def put(self, token_ids):
+        self.token_ids.extend(token_ids)
+        text = self.tokenizer.decode(self.token_ids, skip_special_tokens=True)
+        if text != self.text:
+            self.text = text
+            self.queue.put(text)
+
+    def end(self):
+        self.queue.put(None)
+
+    def __iter__(self):
+        while True:
+            text = self.queue.get()
+            if text is None:
+                return
+            yield text
+
+
+def _length_buckets(order, encoded, batch_size, max_batch_tokens):
+    """
+    Split length-sorted input indices into buckets for batched generation.
+
+    Args:
+        order (list[int]): Input indices sorted by ascending token length.
+        encoded (list[list[int]]): The token ids of every input.
+        batch_size (int): The maximum number of inputs per bucket.
+        max_batch_tokens (int): The maximum padded size (count × longest) of a bucket.
+
+    Yields:
+        list[int]: The input indices of one bucket.
+    """
+    bucket = []
+    for index in order:
+        # Inputs are sorted, so the newest one is always the longest in the bucket
+        padded_size = (len(bucket) + 1) * len(encoded[index])
+        if bucket and (len(bucket) >= batch_size or padded_size > max_batch_tokens):
+            yield bucket
+            bucket = []
+        bucket.append(index)
+    if bucket:
+        yield bucket
@@ -0,0 +1,221 @@
+import hashlib
+import random
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from .metrics import NullMetrics
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+
+# Length of the character shingles segments are compared by
+SHINGLE_SIZE = 3
+
+
+class TranslationMemory:
+    """
+    Segment-level translation memory with exact and fuzzy (near-duplicate) lookup.
+
+    Segments are normalized (Unicode NFC, collapsed whitespace) and stored per
+    language pair. A lookup first tries an exact match, then looks for a stored
+    segment whose character-trigram Jaccard similarity reaches `threshold`:
+
+    - Every segment gets a MinHash signature of `num_perm` values, split into
+      `bands` bands for locality-sensitive hashing. Segments sharing any band are
+      candidates, so a lookup only compares against a handful of entries.
+    - Candidates are then scored by their exact Jaccard similarity (from stored
+      shingle hashes), and a fuzzy match must contain the same numbers as the query,
+      so "3 files" is never answered with the translation of "4 files".
+
+    Fuzzy matching is off by default: sentences differing by one word can be
+    nearly identical as trigram sets ("was not restarted" / "was now restarted"),
+    so a threshold below 1.0 may answer a segment with the translation of a
+    different sentence. Enable it only for content where that is acceptable.
+
+    The memory keeps the `max_entries` most recently used segments.
+
+    Attributes:
+        threshold (float): The minimum Jaccard similarity of a fuzzy match (1.0
+            disables fuzzy matching).
+        num_perm (int): The MinHash signature length.
+        bands (int): The number of LSH bands (must divide `num_perm`).
+        max_entries (int): The capacity of the memory.
+        metrics (MetricsSink): Receives the exact / fuzzy hit and miss counters.
+    """
+    def __init__(self, threshold: float = 1.0, num_perm: int = 64, bands: int = 16, max_entries: int = 20000,
+                 metrics=None, seed: int = 1):
+        """
+        Initialize an empty memory.
+
+        Args:
+            threshold (float, optional): Minimum similarity of a fuzzy match. Defaults to 1.0
+                (exact matches only).
+            num_perm (int, optional): MinHash signature length. Defaults to 64.
+            bands (int, optional): LSH bands; `num_perm` must be a multiple. Defaults to 16.
+            max_entries (int, optional): Segments kept. Defaults to 20000.
+            metrics (MetricsSink, optional): Where hits and misses are counted.
+                Defaults to `NullMetrics()`.
+            seed (int, optional): Seed of the MinHash functions. Defaults to 1.
+
+        Raises:
+            ValueError: If `num_perm` is not a multiple of `bands`.
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        import numpy as np
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.max_entries = max_entries
+        self.metrics = metrics if metrics is not None else NullMetrics()
+
+        # Multiply-shift hash functions: h(x) = (a * x + b) >> 32 over 64-bit integers, a odd
+        generator = random.Random(seed)
+        self._multipliers = np.array([generator.getrandbits(64) | 1 for _ in range(num_perm)], dtype=np.uint64)
+        self._increments = np.array([generator.getrandbits(64) for _ in range(num_perm)], dtype=np.uint64)
+
+        # (src_lang, tgt_lang, normalized segment) => _Entry; order = recency
+        self._entries = OrderedDict()
+        # (src_lang, tgt_lang, band index, band bytes) => set of entry keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, segment: str, src_lang: str, tgt_lang: str):
+        """
+        Find the translation of a segment or of a near-duplicate of it.
+
+        Args:
+            segment (str): The source segment.
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+
+        Returns:
+            str or None: The stored translation, or None if nothing is similar enough.
+        """
+        normalized = _normalize(segment)
+        key = (src_lang, tgt_lang, normalized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.metrics.increment("tm_exact_hits_total")
+                return entry.translation
+        if self.threshold >= 1.0:
+            self.metrics.increment("tm_misses_total")
+            return None
+
+        shingles = self._shingle_hashes(normalized)
+        signature = self._signature(shingles)
+        numbers = _DIGITS_RE.findall(normalized)
+        best_key, best_similarity = None, self.threshold
+        with self._lock:
+            for candidate_key in self._candidates(src_lang, tgt_lang, signature):
+                candidate = self._entries[candidate_key]
+                if candidate.numbers != numbers:
+                    continue
+                similarity = _jaccard(shingles, candidate.shingles)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = candidate_key, similarity
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.metrics.increment("tm_fuzzy_hits_total")
+                return self._entries[best_key].translation
+        self.metrics.increment("tm_misses_total")
+        return None
+
+    def add(self, segment: str, src_lang: str, tgt_lang: str, translation: str):
+        """
+        Store the translation of a segment.
+
+        Args:
+            segment (str): The source segment.
+            src_lang (str): The source language code.
+            tgt_lang (str): The target language code.
+            translation (str): Its translation.
+        """
+        normalized = _normalize(segment)
+        if not normalized:
+            return
+        shingles = self._shingle_hashes(normalized)
+        entry = _Entry(translation, shingles, self._signature(shingles), _DIGITS_RE.findall(normalized))
+        key = (src_lang, tgt_lang, normalized)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for bucket in self._bucket_keys(src_lang, tgt_lang, entry.signature):
+                self._buckets.setdefault(bucket, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _candidates(self, src_lang, tgt_lang, signature):
+        """Keys of the entries sharing at least one LSH band with `signature`."""
+        candidates = set()
+        for bucket in self._bucket_keys(src_lang, tgt_lang, signature):
+            candidates.update(self._buckets.get(bucket, ()))
+        return candidates
+
+    def _bucket_keys(self, src_lang, tgt_lang, signature):
+        rows = self.num_perm // self.bands
+        return [(src_lang, tgt_lang, band, signature[band * rows:(band + 1) * rows].tobytes())
+                for band in range(self.bands)]
+
+    def _remove(self, key):
+        """Drop an entry and its LSH buckets; the caller must hold the lock."""
+        entry = self._entries.pop(key)
+        for bucket in self._bucket_keys(key[0], key[1], entry.signature):
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def _shingle_hashes(self, normalized):
+        """Sorted unique 64-bit hashes of the segment's character shingles."""
+        import numpy as np
+
+        text = normalized.lower()
+        if len(text) < SHINGLE_SIZE:
+            shingles = {text}
+        else:
+            shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+        return np.unique(np.array([_stable_hash(shingle) for shingle in shingles], dtype=np.uint64))
+
+    def _signature(self, shingles):
+        """The MinHash signature: per hash function, the minimum over all shingles."""
+        hashed = (self._multipliers[:, None] * shingles[None, :] + self._increments[:, None]) >> 32
+        return hashed.min(axis=1)
+
+
+class _Entry:
+    """A stored translation with the data needed for fuzzy matching."""
+    __slots__ = ("translation", "shingles", "signature", "numbers")
+
+    def __init__(self, translation, shingles, signature, numbers):
+        self.translation = translation
+        self.shingles = shingles
+        self.signature = signature
+        self.numbers = numbers
+
+
+def _normalize(segment):
+    """Unicode NFC with whitespace runs collapsed to one space and trimmed."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", segment)).strip()
+
+
+def _stable_hash(shingle):
+    """A 64-bit hash of a shingle; unlike `hash()` it is not salted per process, so runs are reproducible."""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _jaccard(a, b):
+    """Jaccard similarity of two sorted unique hash arrays."""
+    import numpy as np
+
+    common = np.intersect1d(a, b, assume_unique=True).size
+    return common / (a.size + b.size - common)
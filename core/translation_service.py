@@ -1,69 +1,318 @@
+import itertools
+import threading
+import time
+from collections import deque
 from PyQt5.QtCore import QThread, pyqtSignal
-from .translation_engine import TranslationEngine
+from .translation_engine import TranslationCancelled
+from .translation_cache import TranslationCache
+from .metrics import NullMetrics
 
 
-class TranslationThread(QThread):
+class TranslationRequest:
     """
-     Background worker thread for performing translation without blocking the UI.
+    A single translation job queued on the `TranslationWorker`.
 
-     This thread runs the translation task using the provided TranslationEngine
-     and emits the result asynchronously once the translation is complete.
+    Parameters
+    ----------
+    request_id : int
+        Monotonically increasing id used to recognise stale results.
+    text : str
+        The input text to be translated.
+    src_lang : str
+        The source language code (e.g., "eng_Latn").
+    tgt_lang : str
+        The target language code (e.g., "arb_Arab").
+    max_length : int
+        The maximum length of the translated output sequence.
+    num_beams : int
+        The number of beams for beam search (controls translation quality vs speed).
+    cache_key : str or None
+        The cache key of this request, if a cache is used.
+    interactive : bool
+        Whether the request was triggered by the user. A new interactive request
+        supersedes every request submitted before it.
+    stream : bool
+        Whether partial translations should be emitted while generating.
+    prefetch : bool
+        Whether this is a speculative translation into another language. Prefetch
+        requests only run when no other request is queued.
+
+    Attributes
+    ----------
+    cancel_event : threading.Event
+        Set when the request is superseded; aborts generation mid-way.
+    created_at : float
+        `time.perf_counter()` when the request was created (for queue wait timing).
+    """
+    def __init__(self, request_id, text, src_lang, tgt_lang, max_length, num_beams, cache_key=None,
+                 interactive=True, stream=False, prefetch=False):
+        self.request_id = request_id
+        self.text = text
+        self.src_lang = src_lang
+        self.tgt_lang = tgt_lang
+        self.max_length = max_length
+        self.num_beams = num_beams
+        self.cache_key = cache_key
+        self.interactive = interactive
+        self.stream = stream
+        self.prefetch = prefetch
+        self.cancel_event = threading.Event()
+        self.created_at = time.perf_counter()
+
+
+class TranslationWorker(QThread):
+    """
+     Long-lived background thread that owns the engine and serves a request queue.
+
+     The engine is built on this thread, so the UI can appear before the model is
+     loaded; requests submitted meanwhile simply wait in the queue. Right after
+     loading, one short dummy translation per warm-up language pair runs so the
+     first real request does not pay one-off allocation costs.
+
+     Only one `generate` call runs at a time. When an interactive request is
+     submitted, all queued requests are dropped and the running one is aborted
+     through its cancel event, so the newest text always gets the CPU.
 
      Signals
      -------
-     finished : pyqtSignal(str)
-         Emitted when the translation is finished, carrying the translated text.
+     finished : pyqtSignal(int, str)
+         Emitted when a request completes, carrying its request id and the translated text.
+     partial : pyqtSignal(int, str)
+         Emitted for streaming requests whenever more of the translation is available.
+     engine_loaded : pyqtSignal()
+         Emitted once the engine is ready to translate.
+     engine_failed : pyqtSignal(str)
+         Emitted with the error message if the engine could not be built.
 
      Parameters
      ----------
-     engine : TranslationEngine
-         The translation engine responsible for performing the translation.
-     text : str
-         The input text to be translated.
-     src_lang : str
-         The source language code (e.g., "en" for English).
-     tgt_lang : str
-         The target language code (e.g., "ar" for Arabic).
-     max_length : int
-         The maximum length of the translated output sequence.
-     num_beams : int
-         The number of beams for beam search (controls translation quality vs speed).
+     engine_factory : callable
+         Builds the `TranslationEngine`; called once on the worker thread.
+     cache : TranslationCache or None
+         Cache consulted (and filled) around the engine call.
+     warmup_pairs : list of (str, str)
+         (src_lang, tgt_lang) pairs to warm up after loading.
+     warmup_num_beams : int
+         Beam width used by the warm-up translations.
+     metrics : MetricsSink or None
+         Receives queue wait times and cancellation / error counters.
+     deadline_seconds : float or None
+         Wall-clock limit per request, counted from when the worker picks it up. When
+         it passes, generation stops and the partial translation is delivered (but not
+         cached). None means no limit.
+     history : DocumentHistory or None
+         The last translated documents; sentences a new text shares with them are
+         not translated again.
      """
-    finished = pyqtSignal(str)
+    finished = pyqtSignal(int, str)
+    partial = pyqtSignal(int, str)
+    engine_loaded = pyqtSignal()
+    engine_failed = pyqtSignal(str)
+
+    def __init__(self, engine_factory, cache=None, warmup_pairs=(), warmup_num_beams=1, metrics=None,
+                 deadline_seconds=None, history=None):
+        super().__init__()
+        self.engine_factory = engine_factory
+        self.engine = None
+        self.cache = cache
+        self.warmup_pairs = list(warmup_pairs)
+        self.warmup_num_beams = warmup_num_beams
+        self.metrics = metrics if metrics is not None else NullMetrics()
+        self.deadline_seconds = deadline_seconds
+        self.history = history
+        # request id => perf_counter() at emit time, read by the GUI thread on delivery
+        self.emitted_at = {}
+        self._pending = deque()
+        self._current = None
+        self._stopping = False
+        self._condition = threading.Condition()
 
-    def __init__(self, engine, text, src_lang, tgt_lang, max_length, num_beams):
+    def submit(self, request: TranslationRequest):
         """
-        Initialize the translation service.
+        Queue a request, superseding older work if the request is interactive.
 
         Parameters
         ----------
-        engine : TranslationEngine
-            The translation engine used to perform translations.
+        request : TranslationRequest
+            The request to run.
         """
-        super().__init__()
-        self.engine = engine
-        self.text = text
-        self.src_lang = src_lang
-        self.tgt_lang = tgt_lang
-        self.max_length = max_length
-        self.num_beams = num_beams
+        with self._condition:
+            if request.interactive:
+                self._cancel_all_locked()
+            self._pending.append(request)
+            self._condition.notify()
+
+    def adopt_prefetch(self, cache_key):
+        """
+        Keep the running prefetch request for `cache_key` and cancel everything else.
+
+        Called for a new interactive request whose translation is already being
+        prefetched, so that work is not thrown away and started over.
+
+        Parameters
+        ----------
+        cache_key : str
+            The cache key of the interactive request.
+
+        Returns
+        -------
+        int or None
+            The id of the adopted request, or None if no matching prefetch is running
+            (nothing is cancelled then).
+        """
+        with self._condition:
+            current = self._current
+            if (current is None or not current.prefetch or current.cache_key != cache_key
+                    or current.cancel_event.is_set()):
+                return None
+            current.prefetch = False
+            self._cancel_all_locked(keep=current)
+            return current.request_id
+
+    def cancel_all(self):
+        """Drop every queued request and abort the one currently generating."""
+        with self._condition:
+            self._cancel_all_locked()
+
+    def stop(self):
+        """Cancel outstanding work and ask the thread to exit."""
+        with self._condition:
+            self._cancel_all_locked()
+            self._stopping = True
+            self._condition.notify()
 
     def run(self):
         """
-        Executes the translation task in a separate thread.
+        Serve requests until `stop()` is called.
 
-        This method is automatically called when the thread starts.
-        It performs translation using the engine and emits the
-        resulting text via the `finished` signal.
+        This method is automatically called when the thread starts. It first loads
+        and warms up the engine. Each request is then split into sentences,
+        translated as one batch and emitted via `finished`. Cancelled requests are
+        discarded without emitting anything.
         """
-        result = self.engine.translate(
-            self.text,
-            self.src_lang,
-            self.tgt_lang,
-            self.max_length,
-            self.num_beams
-        )
-        self.finished.emit(result)
+        try:
+            self.engine = self.engine_factory()
+        except Exception as e:
+            print(f"Error loading translation engine: {e}")
+            self.engine_failed.emit(str(e))
+            return
+        self.engine_loaded.emit()
+        self._warm_up()
+
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                request = self._current = self._take_next_locked()
+            if not request.prefetch:
+                self.metrics.observe("queue_wait", time.perf_counter() - request.created_at)
+
+            try:
+                result = self._translate(request)
+            except TranslationCancelled:
+                continue
+            except Exception as e:
+                print(f"Error translating request {request.request_id}: {e}")
+                self.metrics.increment("errors_total")
+                continue
+            finally:
+                with self._condition:
+                    self._current = None
+
+            if not request.cancel_event.is_set():
+                self.emitted_at[request.request_id] = time.perf_counter()
+                self.finished.emit(request.request_id, result)
+
+    def _warm_up(self):
+        """
+        Run one short translation per warm-up pair.
+
+        Warm-up yields to real work: it stops as soon as a request is queued.
+        """
+        for src_lang, tgt_lang in self.warmup_pairs:
+            with self._condition:
+                if self._pending or self._stopping:
+                    return
+                request = self._current = TranslationRequest(0, "Hello, world.", src_lang, tgt_lang, 16,
+                                                             self.warmup_num_beams, interactive=False)
+            try:
+                self.engine.translate(request.text, src_lang, tgt_lang, request.max_length, request.num_beams,
+                                      cancel_event=request.cancel_event)
+            except TranslationCancelled:
+                pass
+            except Exception as e:
+                print(f"Warning: warm-up for {src_lang} -> {tgt_lang} failed: {e}")
+            finally:
+                with self._condition:
+                    self._current = None
+
+    def _translate(self, request):
+        """Translate one request, going through the cache when one is set."""
+        if self.cache is not None and request.cache_key is None:
+            request.cache_key = TranslationCache.make_key(request.text, request.src_lang, request.tgt_lang,
+                                                          request.max_length, request.num_beams,
+                                                          self.engine.model_id)
+
+        deadline = None
+        if self.deadline_seconds:
+            deadline = time.monotonic() + self.deadline_seconds
+
+        def translate():
+            if request.stream:
+                translated = ""
+                for translated in self.engine.translate_document_stream(
+                        request.text,
+                        request.src_lang,
+                        request.tgt_lang,
+                        request.max_length,
+                        request.num_beams,
+                        cancel_event=request.cancel_event,
+                        deadline=deadline,
+                        history=self.history):
+                    self.partial.emit(request.request_id, translated)
+                return translated
+            return self.engine.translate_document(
+                request.text,
+                request.src_lang,
+                request.tgt_lang,
+                request.max_length,
+                request.num_beams,
+                cancel_event=request.cancel_event,
+                deadline=deadline,
+                history=self.history
+            )
+
+        if self.cache is not None and request.cache_key is not None:
+            result = self.cache.get_or_compute(request.cache_key, translate)
+            if deadline is not None and time.monotonic() >= deadline:
+                # Possibly cut short by the deadline; do not serve it again from the cache
+                self.cache.discard(request.cache_key)
+            return result
+        return translate()
+
+    def _take_next_locked(self):
+        """Pop the oldest queued request, taking prefetch requests only when nothing else waits."""
+        for request in self._pending:
+            if not request.prefetch:
+                self._pending.remove(request)
+                return request
+        return self._pending.popleft()
+
+    def _cancel_all_locked(self, keep=None):
+        """Cancel queued and running requests (except `keep`); the caller must hold the condition."""
+        cancelled = len(self._pending)
+        for pending in self._pending:
+            pending.cancel_event.set()
+        self._pending.clear()
+        if self._current is not None and self._current is not keep and not self._current.cancel_event.is_set():
+            self._current.cancel_event.set()
+            # Warm-up and prefetch requests are not counted
+            if self._current.request_id != 0 and not self._current.prefetch:
+                cancelled += 1
+        if cancelled:
+            self.metrics.increment("cancellations_total", cancelled)
 
 
 class TranslationService:
@@ -71,22 +320,82 @@ class TranslationService:
     High-level service that manages asynchronous translation tasks.
 
     This class provides an easy-to-use interface for running translations
-    in background threads and updating the UI when translation is complete.
+    on a background worker and updating the UI when translation is complete.
+    Every request gets an id; results of requests superseded by a newer
+    interactive request are never delivered.
+
+    The engine is loaded in the background: the service can be used right away,
+    and requests made before the model is ready are queued until it is.
 
     Attributes
     ----------
-    engine : TranslationEngine
-        The translation engine instance used for all translation operations.
-    thread : TranslationThread or None
-        The currently running translation thread, if any.
+    engine : TranslationEngine or None
+        The translation engine instance used for all translation operations,
+        or None while it is still loading.
+    worker : TranslationWorker
+        The persistent background thread that loads and runs the engine.
+    cache : TranslationCache or None
+        Cache of finished translations, shared with the worker.
+    metrics : MetricsSink
+        Receives request counts, signal delivery and end-to-end request timings.
+    prefetch_targets : list of str
+        Target languages the latest interactive text is speculatively translated into.
     """
-    def __init__(self, engine: TranslationEngine):
-        self.engine = engine
-        self.thread = None
+    def __init__(self, engine_factory, cache: TranslationCache = None, warmup_pairs=(), warmup_num_beams=1,
+                 metrics=None, deadline_seconds=None, prefetch_targets=(), history=None):
+        """
+        Start the worker thread, which begins loading the engine immediately.
 
-    def translate_async(self, text, src_lang, tgt_lang, max_length, num_beams, callback):
+        Parameters
+        ----------
+        engine_factory : callable
+            Builds the `TranslationEngine`; called once on the worker thread.
+        cache : TranslationCache, optional
+            Cache of finished translations.
+        warmup_pairs : list of (str, str), optional
+            (src_lang, tgt_lang) pairs to warm up once the engine is loaded.
+        warmup_num_beams : int, optional
+            Beam width used by the warm-up translations.
+        metrics : MetricsSink, optional
+            Where stage timings and counters are recorded. Defaults to `NullMetrics()`.
+        deadline_seconds : float, optional
+            Wall-clock limit per request; see `TranslationWorker`. Defaults to None.
+        prefetch_targets : list of str, optional
+            Once an interactive translation is delivered, the same text is translated
+            into these target languages in the background and stored in the cache, so
+            switching language is answered instantly. Needs a cache. Defaults to none.
+        history : DocumentHistory, optional
+            Enables incremental re-translation: when a text is an edited version of the
+            previous one, only its new or changed sentences are translated. Defaults to None.
         """
-        Run a translation asynchronously in a separate thread.
+        self.engine = None
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else NullMetrics()
+        self.prefetch_targets = list(prefetch_targets) if cache is not None else []
+        self._callbacks = {}
+        self._partial_callbacks = {}
+        self._submitted_at = {}
+        self._request_ids = itertools.count(1)
+        self._latest_interactive_id = 0
+        # (request id, text, src_lang, tgt_lang, max_length, num_beams) of the latest interactive request
+        self._prefetch_after = None
+
+        self.worker = TranslationWorker(engine_factory, cache, warmup_pairs, warmup_num_beams, self.metrics,
+                                        deadline_seconds, history)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.partial.connect(self._on_partial)
+        self.worker.engine_loaded.connect(self._on_engine_loaded)
+        self.worker.start()
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the engine has finished loading."""
+        return self.engine is not None
+
+    def translate_async(self, text, src_lang, tgt_lang, max_length, num_beams, callback, interactive=True,
+                        partial_callback=None):
+        """
+        Run a translation asynchronously on the background worker.
 
         Parameters
         ----------
@@ -102,12 +411,116 @@ class TranslationService:
             Number of beams for beam search.
         callback : callable
             Function to call when translation finishes. Receives one argument — the translated text.
+        interactive : bool, optional
+            Whether the user is waiting for this result. Interactive requests cancel
+            all earlier requests. Defaults to True.
+        partial_callback : callable, optional
+            If given, the translation is streamed: this function receives the
+            translation so far each time more words are decoded. Defaults to None.
+
+        Returns
+        -------
+        int
+            The id assigned to the request.
 
         Notes
         -----
-        - This method starts a new background thread for translation.
-        - Once the translation completes, the provided callback is invoked automatically.
+        - Cached translations are delivered immediately, without queueing.
+        - If the translation is already being prefetched, that work is kept and
+          delivered instead of starting over.
+        - Requests made while the engine is loading wait in the queue.
+        - Once the translation completes, the provided callback is invoked automatically,
+          unless a newer interactive request was made in the meantime.
+        """
+        request_id = next(self._request_ids)
+        self.metrics.increment("requests_total")
+        cache_key = None
+        if self.cache is not None and self.engine is not None:
+            cache_key = TranslationCache.make_key(text, src_lang, tgt_lang, max_length, num_beams,
+                                                  self.engine.model_id)
+
+        if interactive:
+            # Everything before this request is stale now
+            self._latest_interactive_id = request_id
+            self._callbacks.clear()
+            self._partial_callbacks.clear()
+            self._submitted_at.clear()
+            adopted_id = self.worker.adopt_prefetch(cache_key) if cache_key is not None else None
+            if adopted_id is not None:
+                self._latest_interactive_id = adopted_id
+                self._callbacks[adopted_id] = callback
+                self._submitted_at[adopted_id] = time.perf_counter()
+                self._prefetch_after = (adopted_id, text, src_lang, tgt_lang, max_length, num_beams)
+                return adopted_id
+            self.worker.cancel_all()
+            self._prefetch_after = (request_id, text, src_lang, tgt_lang, max_length, num_beams)
+
+        if cache_key is not None:
+            # A miss is counted once, by the worker's `get_or_compute`
+            cached = self.cache.get(cache_key, count_miss=False)
+            if cached is not None:
+                callback(cached)
+                if interactive:
+                    self._prefetch(*self._prefetch_after[1:])
+                return request_id
+
+        self._callbacks[request_id] = callback
+        self._submitted_at[request_id] = time.perf_counter()
+        if partial_callback is not None:
+            self._partial_callbacks[request_id] = partial_callback
+        self.worker.submit(TranslationRequest(request_id, text, src_lang, tgt_lang, max_length, num_beams,
+                                              cache_key, interactive, stream=partial_callback is not None))
+        return request_id
+
+    def shutdown(self):
+        """Stop the background worker and wait for it to exit."""
+        self.worker.stop()
+        self.worker.wait()
+
+    def _on_engine_loaded(self):
+        """Remember the engine once the worker has built it."""
+        self.engine = self.worker.engine
+
+    def _on_finished(self, request_id, translated):
+        """Deliver a finished translation unless it was superseded."""
+        delivered_at = time.perf_counter()
+        emitted_at = self.worker.emitted_at.pop(request_id, None)
+        if emitted_at is not None:
+            self.metrics.observe("signal_delivery", delivered_at - emitted_at)
+        submitted_at = self._submitted_at.pop(request_id, None)
+        callback = self._callbacks.pop(request_id, None)
+        self._partial_callbacks.pop(request_id, None)
+        if callback is None or request_id < self._latest_interactive_id:
+            return
+        if submitted_at is not None:
+            self.metrics.observe("request", delivered_at - submitted_at)
+        callback(translated)
+        if self._prefetch_after is not None and self._prefetch_after[0] == request_id:
+            self._prefetch(*self._prefetch_after[1:])
+
+    def _prefetch(self, text, src_lang, tgt_lang, max_length, num_beams):
+        """
+        Queue low-priority translations of `text` into the other prefetch targets.
+
+        The targets are queued as one request each rather than as one batch: the
+        engine forces a single target language per `generate` call, and separate
+        requests let a new interactive request preempt the prefetch between two
+        targets, or adopt the one already running for the language switched to.
         """
-        self.thread = TranslationThread(self.engine, text, src_lang, tgt_lang, max_length, num_beams)
-        self.thread.finished.connect(callback)
-        self.thread.start()
+        if self.engine is None:
+            return
+        for target in self.prefetch_targets:
+            # The text is already in its source language and shown in the target one
+            if target in (src_lang, tgt_lang):
+                continue
+            cache_key = TranslationCache.make_key(text, src_lang, target, max_length, num_beams,
+                                                  self.engine.model_id)
+            self.worker.submit(TranslationRequest(next(self._request_ids), text, src_lang, target, max_length,
+                                                  num_beams, cache_key, interactive=False, prefetch=True))
+
+    def _on_partial(self, request_id, translated):
+        """Deliver a partial translation unless the request was superseded."""
+        partial_callback = self._partial_callbacks.get(request_id)
+        if partial_callback is None or request_id < self._latest_interactive_id:
+            return
+        partial_callback(translated)
@@ -1,38 +1,165 @@
+import time
+_STARTED_AT = time.perf_counter()
+
 import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
 import sys
-import torch
 from PyQt5.QtWidgets import QApplication
 from baligh.ui.main_window import TranslatorWindow
-from baligh.core import TranslationEngine
-from baligh.core import TranslationService
-from baligh.services.config_loader import load_config
+from baligh.ui.ui_constants import LANGUAGE_MAP
+from baligh.core.translation_service import TranslationService
+from baligh.core.translation_cache import TranslationCache
+from baligh.core.metrics import InMemoryMetrics, NullMetrics, PrometheusExporter
+from baligh.core.generation_budget import GenerationBudget
+from baligh.core.encoder_cache import EncoderCache
+from baligh.core.language_detection import LanguageDetector
+from baligh.core.translation_memory import TranslationMemory
+from baligh.core.document_history import DocumentHistory
+from baligh.core.thread_tuning import tuned_backend_options
+from baligh.core.model_registry import ModelRegistry
+from baligh.services.config_loader import load_config, resolve_path
 from baligh.services.clipboard_service import ClipboardService
 from baligh.services.keyboard_service import KeyboardService
+from baligh.services.startup_profiler import StartupProfiler
 import ctypes
 
+# torch / transformers are imported lazily when the engine is built (see create_engine)
+_IMPORTS_DONE_AT = time.perf_counter()
+
 
 def main():
+    profiler = StartupProfiler.from_environment(_STARTED_AT)
+    profiler.record("import", _IMPORTS_DONE_AT - _STARTED_AT)
+
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(u"ai_translator.app")
     app = QApplication(sys.argv)
 
     # ------------------- Load Configuration -------------------
-    config = load_config()
+    with profiler.stage("config"):
+        config = load_config()
+
+    # ------------------- Initialize UI -------------------
+    # The window comes up first; the model loads in the background.
+    with profiler.stage("ui"):
+        window = TranslatorWindow()
+        window.config = config
+        window.show()
+        window.isLeftToRight()
+        window.show_model_loading()
+
+    # ------------------- Initialize Metrics -------------------
+    metrics_config = config.get("metrics", {})
+    metrics = NullMetrics()
+    if metrics_config.get("enabled", False):
+        metrics = InMemoryMetrics()
+        prometheus_file = metrics_config.get("prometheus_file")
+        metrics_exporter = PrometheusExporter(
+            metrics,
+            path=resolve_path(prometheus_file) if prometheus_file else None,
+            port=metrics_config.get("prometheus_port"),
+            interval=metrics_config.get("interval_seconds", 15),
+        )
+        metrics_exporter.start()
+        app.aboutToQuit.connect(metrics_exporter.stop)
+
+    # ------------------- Initialize Generation Budget -------------------
+    budget_config = config.get("generation_budget", {})
+    generation_budget = None
+    if budget_config.get("enabled", True):
+        generation_budget = GenerationBudget(
+            default_ratio=budget_config.get("default_ratio", 1.3),
+            margin=budget_config.get("margin", 1.5),
+            slack_tokens=budget_config.get("slack_tokens", 10),
+            path=resolve_path(budget_config.get("path", "cache/length_ratios.json")),
+        )
+        app.aboutToQuit.connect(generation_budget.save)
+
+    # ------------------- Initialize Encoder Cache -------------------
+    encoder_cache_config = config.get("encoder_cache", {})
+    encoder_cache = None
+    if encoder_cache_config.get("enabled", True):
+        encoder_cache = EncoderCache(max_bytes=int(encoder_cache_config.get("max_mb", 64) * 1024 * 1024))
+
+    # ------------------- Initialize Translation Memory -------------------
+    memory_config = config.get("translation_memory", {})
+    translation_memory = None
+    if memory_config.get("enabled", True):
+        translation_memory = TranslationMemory(threshold=memory_config.get("threshold", 1.0),
+                                               max_entries=memory_config.get("max_entries", 20000),
+                                               metrics=metrics)
 
     # ------------------- Initialize Translation Engine -------------------
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    engine = TranslationEngine(model_path=config["model_path"], device=device)
-    translation_service = TranslationService(engine)
+    def build_engine(model_path):
+        from baligh.core.inference_backend import default_device
+        from baligh.core.translation_engine import TranslationEngine
 
-    # ------------------- Initialize UI -------------------
-    window = TranslatorWindow()
+        backend = config.get("backend", "torch")
+        return TranslationEngine(model_path=model_path, device=default_device(backend),
+                                 precision=config.get("precision", "fp32"), backend=backend,
+                                 backend_options=tuned_backend_options(config, backend),
+                                 metrics=metrics, generation_budget=generation_budget,
+                                 encoder_cache=encoder_cache, translation_memory=translation_memory)
+
+    # With routes, each language pair goes to the cheapest model covering it (see ModelRegistry)
+    models_config = config.get("models", {})
+
+    def create_engine():
+        routes = [{**route, "model_path": resolve_path(route["model_path"])}
+                  for route in models_config.get("routes", [])]
+        if not routes:
+            return build_engine(config["model_path"])
+        return ModelRegistry(build_engine, config["model_path"], routes,
+                             memory_budget_mb=models_config.get("memory_budget_mb"),
+                             preload_default=models_config.get("preload_default", True),
+                             warmup=models_config.get("warmup", True), metrics=metrics,
+                             backend=config.get("backend", "torch"), precision=config.get("precision", "fp32"))
+
+    # ------------------- Initialize Translation Cache -------------------
+    cache_config = config.get("cache", {})
+    cache = None
+    if cache_config.get("enabled", True):
+        cache = TranslationCache(
+            db_path=resolve_path(cache_config.get("path", "cache/translations.sqlite3")),
+            max_memory_entries=cache_config.get("memory_entries", 512),
+            max_disk_entries=cache_config.get("disk_entries", 50000),
+            max_age_days=cache_config.get("max_age_days", 30),
+            metrics=metrics,
+        )
+
+    # ------------------- Initialize Translation Service -------------------
+    warmup_pairs = []
+    if config.get("warmup", True):
+        warmup_pairs = [(config["src_lang"], tgt_lang) for tgt_lang in LANGUAGE_MAP.values()
+                        if tgt_lang != config["src_lang"]]
+    prefetch_targets = list(LANGUAGE_MAP.values()) if config.get("prefetch", False) else []
+    history = DocumentHistory() if config.get("incremental", True) else None
+    translation_service = TranslationService(create_engine, cache=cache, warmup_pairs=warmup_pairs,
+                                             warmup_num_beams=config["num_beams"], metrics=metrics,
+                                             deadline_seconds=config.get("deadline_seconds"),
+                                             prefetch_targets=prefetch_targets, history=history)
+    translation_service.worker.engine_loaded.connect(window.on_model_loaded)
+
+    def report_startup():
+        for stage, seconds in translation_service.engine.load_times.items():
+            profiler.record(f"{stage} load", seconds)
+        profiler.report()
+
+    translation_service.worker.engine_loaded.connect(report_startup)
+    translation_service.worker.engine_failed.connect(window.on_model_failed)
     window.translation_service = translation_service
-    window.config = config
-    window.show()
-    window.isLeftToRight()
+    app.aboutToQuit.connect(translation_service.shutdown)
+
+    # ------------------- Language Detection -------------------
+    detection_config = config.get("language_detection", {})
+    if detection_config.get("enabled", True):
+        window.language_detector = LanguageDetector(fallback=config["src_lang"],
+                                                    min_confidence=detection_config.get("min_confidence", 0.35),
+                                                    min_letters=detection_config.get("min_letters", 12),
+                                                    skip_confidence=detection_config.get("skip_confidence", 0.6),
+                                                    skip_min_letters=detection_config.get("skip_min_letters", 20))
 
     # ------------------- Clipboard Handling -------------------
     def on_clipboard_text_copied(text: str):
@@ -40,7 +167,14 @@ def main():
             return
         window.on_clipboard_text_copied(text)
 
-    window.clipboard_service = ClipboardService(callback=on_clipboard_text_copied)
+    clipboard_config = config.get("clipboard", {})
+    window.clipboard_service = ClipboardService(
+        callback=on_clipboard_text_copied,
+        interval=clipboard_config.get("poll_interval_ms", 300),
+        backend=clipboard_config.get("backend", "auto"),
+        debounce_ms=clipboard_config.get("debounce_ms", 75),
+        watch_selection=clipboard_config.get("watch_selection", False),
+    )
 
     # Link Toggle to enable/disable monitoring
     window.clipboard_toggle_action.triggered.connect(
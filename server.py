@@ -0,0 +1,309 @@
+"""
+Headless HTTP translation server (no Qt).
+
+Serves one warm `TranslationEngine` (or an `EnginePool` of several engine
+processes, with `--workers`) to other local tools over a small JSON API.
+Concurrent requests for the same language pair are merged into micro-batches
+(see `MicroBatcher`); when too much work is queued the server answers 429.
+
+    python -m baligh.server [--host 127.0.0.1] [--port 8765]
+
+Endpoints:
+    POST /translate   {"text": "...", "src_lang": "eng_Latn", "tgt_lang": "fra_Latn",
+                       "max_length": 500, "num_beams": 1}  =>  {"translation": "..."}
+                      ("texts": [...] instead of "text" returns {"translations": [...]})
+    GET  /health      {"status": "ok", "queued": <segments waiting>}
+    GET  /metrics     Prometheus text format (when metrics are enabled in config.json)
+    GET  /models      Per-model statistics (when `models.routes` is set in config.json)
+"""
+import argparse
+import asyncio
+import json
+import sys
+from http import HTTPStatus
+from baligh.core.engine_pool import EnginePool
+from baligh.core.generation_budget import GenerationBudget
+from baligh.core.metrics import InMemoryMetrics, NullMetrics
+from baligh.core.micro_batcher import BatcherOverloaded, MicroBatcher, RequestTooLarge
+from baligh.core.model_registry import ModelRegistry
+from baligh.core.text_segmenter import segment_text
+from baligh.core.thread_tuning import tuned_backend_options
+from baligh.core.translation_cache import TranslationCache
+from baligh.services.config_loader import load_config, resolve_path
+
+
+class TranslationServer:
+    """
+    asyncio HTTP/1.1 server exposing a `MicroBatcher` as a JSON API.
+
+    Attributes:
+        batcher (MicroBatcher): Forms batches and runs them on the engine.
+        cache (TranslationCache or None): Cache of finished translations.
+        metrics (MetricsSink): Receives request counters and timings.
+        defaults (dict): Default `src_lang`, `tgt_lang`, `max_length` and `num_beams`.
+        max_request_bytes (int): Larger request bodies are rejected with 413.
+    """
+    def __init__(self, batcher: MicroBatcher, defaults: dict, cache: TranslationCache = None, metrics=None,
+                 max_request_bytes: int = 1 << 20):
+        self.batcher = batcher
+        self.defaults = defaults
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else NullMetrics()
+        self.max_request_bytes = max_request_bytes
+
+    async def serve(self, host: str, port: int):
+        """Start the batcher and accept connections until cancelled."""
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Baligh translation server listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def translate(self, texts, src_lang, tgt_lang, max_length, num_beams) -> list:
+        """
+        Translate whole texts: split them into sentences, batch, and reassemble.
+
+        Cached texts are answered without touching the model.
+
+        Raises:
+            RequestTooLarge: If the texts have more segments than the batcher's queue holds.
+            BatcherOverloaded: If the batcher's queue is full.
+        """
+        model_id = self.batcher.engine.model_id
+        keys = [TranslationCache.make_key(text, src_lang, tgt_lang, max_length, num_beams, model_id)
+                for text in texts] if self.cache is not None else [None] * len(texts)
+        results = [self.cache.get(key) if key is not None else None for key in keys]
+
+        documents = {index: segment_text(text) for index, (text, result) in enumerate(zip(texts, results))
+                     if result is None}
+        segments = [segment for document in documents.values() for segment in document.segments]
+        translations = iter(await self.batcher.translate(segments, src_lang, tgt_lang, max_length, num_beams))
+        for index, document in documents.items():
+            results[index] = document.reassemble([next(translations) for _ in document.segments])
+            if keys[index] is not None:
+                self.cache.put(keys[index], results[index])
+        return results
+
+    async def _handle_connection(self, reader, writer):
+        """Serve HTTP requests on one connection (keep-alive aware)."""
+        try:
+            while True:
+                request = await _read_request(reader, self.max_request_bytes)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, content_type = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await _write_response(writer, status, payload, content_type, keep_alive)
+                if not keep_alive:
+                    break
+        except _HttpError as e:
+            await _write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        """Dispatch a request and return (status, payload, content type)."""
+        path = path.split("?")[0]
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok", "queued": self.batcher.queued}, "application/json"
+        if path == "/metrics" and method == "GET" and isinstance(self.metrics, InMemoryMetrics):
+            return HTTPStatus.OK, self.metrics.render_prometheus(), "text/plain; version=0.0.4"
+        if path == "/models" and method == "GET" and isinstance(self.batcher.engine, ModelRegistry):
+            return HTTPStatus.OK, self.batcher.engine.stats(), "application/json"
+        if path == "/translate":
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}, "application/json"
+            return await self._translate_request(body)
+        return HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {path}"}, "application/json"
+
+    async def _translate_request(self, body):
+        """Handle POST /translate."""
+        self.metrics.increment("requests_total")
+        try:
+            data = json.loads(body.decode("utf-8"))
+            single = "text" in data
+            texts = [data["text"]] if single else data["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("'text' must be a string or 'texts' a list of strings")
+            src_lang = _language_code(data.get("src_lang", self.defaults["src_lang"]), "src_lang")
+            tgt_lang = _language_code(data.get("tgt_lang", self.defaults["tgt_lang"]), "tgt_lang")
+            if not self.batcher.engine.supports_pair(src_lang, tgt_lang):
+                raise ValueError(f"the model does not translate {src_lang} -> {tgt_lang}")
+            max_length = _positive_int(data.get("max_length", self.defaults["max_length"]), "max_length")
+            num_beams = _positive_int(data.get("num_beams", self.defaults["num_beams"]), "num_beams")
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError, AttributeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"invalid request: {e}"}, "application/json"
+
+        try:
+            with self.metrics.span("request"):
+                translations = await self.translate(texts, src_lang, tgt_lang, max_length, num_beams)
+        except RequestTooLarge as e:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"request too large: {e}"}, "application/json"
+        except BatcherOverloaded as e:
+            return HTTPStatus.TOO_MANY_REQUESTS, {"error": f"server busy: {e}"}, "application/json"
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, "application/json"
+        if single:
+            return HTTPStatus.OK, {"translation": translations[0]}, "application/json"
+        return HTTPStatus.OK, {"translations": translations}, "application/json"
+
+
+def _language_code(value, name):
+    """Validate a request's language code type (whether the model knows it is checked by the engine)."""
+    if not isinstance(value, str):
+        raise ValueError(f"'{name}' must be a language code string, got {value!r}")
+    return value
+
+
+def _positive_int(value, name):
+    """Validate a request's integer generation parameter (booleans and floats are rejected)."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"'{name}' must be a positive integer, got {value!r}")
+    return value
+
+
+class _HttpError(Exception):
+    """A malformed or oversized request; answered with `status` and the connection closed."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def _read_request(reader, max_body_bytes):
+    """Read one HTTP request; return (method, path, headers, body) or None at EOF."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0) or 0)
+    if length > max_body_bytes:
+        raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body larger than {max_body_bytes} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+async def _write_response(writer, status, payload, content_type="application/json", keep_alive=True):
+    """Write one HTTP response."""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, ensure_ascii=False)
+    body = payload.encode("utf-8")
+    head = [f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if status == HTTPStatus.TOO_MANY_REQUESTS:
+        head.append("Retry-After: 1")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+def main(argv=None) -> int:
+    config = load_config()
+    server_config = config.get("server", {})
+    parser = argparse.ArgumentParser(description="Serve translations over a local HTTP API.")
+    parser.add_argument("--host", default=server_config.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=server_config.get("port", 8765))
+    parser.add_argument("--model", default=config["model_path"], help="The model folder to serve")
+    parser.add_argument("--workers", type=int, default=server_config.get("workers", 1),
+                        help="Engine processes (CPU only); 0 picks one per four cores")
+    args = parser.parse_args(argv)
+
+    metrics = InMemoryMetrics() if config.get("metrics", {}).get("enabled", False) else NullMetrics()
+    backend = config.get("backend", "torch")
+    engine_kwargs = {"model_path": args.model, "precision": config.get("precision", "fp32"), "backend": backend,
+                     "backend_options": config.get("backend_options", {}).get(backend)}
+    generation_budget = None
+    if args.workers == 1:
+        from baligh.core.inference_backend import default_device
+        from baligh.core.translation_engine import TranslationEngine
+
+        device = default_device(backend)
+        budget_config = config.get("generation_budget", {})
+        if budget_config.get("enabled", True):
+            generation_budget = GenerationBudget(
+                default_ratio=budget_config.get("default_ratio", 1.3),
+                margin=budget_config.get("margin", 1.5),
+                slack_tokens=budget_config.get("slack_tokens", 10),
+                path=resolve_path(budget_config.get("path", "cache/length_ratios.json")),
+            )
+        # Pool workers size their own threads; this host's tuned settings apply to a single engine
+        engine_kwargs["backend_options"] = tuned_backend_options(config, backend)
+
+        def build_engine(model_path):
+            return TranslationEngine(device=device, metrics=metrics, generation_budget=generation_budget,
+                                     **{**engine_kwargs, "model_path": model_path})
+
+        models_config = config.get("models", {})
+        routes = [{**route, "model_path": resolve_path(route["model_path"])}
+                  for route in models_config.get("routes", [])]
+        if routes:
+            engine = ModelRegistry(build_engine, args.model, routes,
+                                   memory_budget_mb=models_config.get("memory_budget_mb"),
+                                   preload_default=models_config.get("preload_default", True),
+                                   warmup=models_config.get("warmup", True), metrics=metrics,
+                                   backend=backend, precision=engine_kwargs["precision"])
+        else:
+            engine = build_engine(args.model)
+        concurrency = 1
+    else:
+        engine = EnginePool(engine_kwargs, num_workers=args.workers or None,
+                            threads_per_worker=server_config.get("threads_per_worker") or None)
+        concurrency = engine.num_workers
+        print(f"Started {engine.num_workers} engine workers on cores {engine.core_slices}")
+
+    cache_config = config.get("cache", {})
+    cache = None
+    if cache_config.get("enabled", True):
+        cache = TranslationCache(
+            db_path=resolve_path(cache_config.get("path", "cache/translations.sqlite3")),
+            max_memory_entries=cache_config.get("memory_entries", 512),
+            max_disk_entries=cache_config.get("disk_entries", 50000),
+            max_age_days=cache_config.get("max_age_days", 30),
+            metrics=metrics,
+        )
+
+    batcher = MicroBatcher(engine,
+                           max_wait_ms=server_config.get("max_wait_ms", 5),
+                           max_batch_size=server_config.get("max_batch_size", 32),
+                           max_batch_tokens=server_config.get("max_batch_tokens", 4096),
+                           max_queue=server_config.get("max_queue", 512),
+                           concurrency=concurrency,
+                           metrics=metrics)
+    defaults = {key: config[key] for key in ("src_lang", "tgt_lang", "max_length", "num_beams")}
+    server = TranslationServer(batcher, defaults, cache, metrics,
+                               max_request_bytes=server_config.get("max_request_bytes", 1 << 20))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if cache is not None:
+            cache.close()
+        if generation_budget is not None:
+            generation_budget.save()
+        if isinstance(engine, EnginePool):
+            engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
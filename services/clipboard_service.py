@@ -1,61 +1,141 @@
+import hashlib
 from PyQt5.QtCore import QTimer
-import pyperclip
+from PyQt5.QtGui import QClipboard, QGuiApplication
+
+# Clipboard backends: "qt" reacts to QClipboard change signals, "poll" reads the
+# clipboard through pyperclip every `interval` ms
+BACKENDS = ("auto", "qt", "poll")
 
 
 class ClipboardService:
     """
     Monitors the system clipboard and triggers a callback when new text is copied.
 
-    This service periodically checks the clipboard for changes using a QTimer.
-    When it detects a new text value, it calls the provided callback function,
-    allowing integration with translation or text-processing pipelines.
+    By default the service listens to Qt's `QClipboard.dataChanged` signal (and,
+    if `watch_selection` is set, to `selectionChanged` for the X11 primary
+    selection), so nothing runs while the clipboard is idle. Where Qt is not told
+    about changes made by other applications while this one is in the background
+    (macOS, Wayland), the service falls back to polling the clipboard through
+    pyperclip every `interval` milliseconds.
+
+    Changes are debounced: a burst of copies within `debounce_ms` is read once,
+    after the last of them. New text is recognised by its hash, so the previous
+    clipboard content does not have to be kept around.
 
     Attributes:
         callback (Callable[[str], None]): Function to call when new text is detected.
-        last_clipboard_text (str): Stores the most recently processed clipboard text.
-        timer (QTimer): Periodic timer to check clipboard content.
+        last_clipboard_hash (bytes or None): Digest of the most recently processed text.
+        backend (str): The active backend, "qt" or "poll".
+        timer (QTimer): Fires the (debounced or periodic) clipboard check.
     """
 
-    def __init__(self, callback, interval: int = 300):
+    def __init__(self, callback, interval: int = 300, backend: str = "auto", debounce_ms: int = 75,
+                 watch_selection: bool = False):
         """
         Initialize the clipboard monitoring service.
 
         Args:
             callback (Callable[[str], None]): Function to call when new clipboard text is detected.
                 The function should accept a single string argument representing the copied text.
-            interval (int, optional): The polling interval in milliseconds. Defaults to 300.
+            interval (int, optional): The polling interval in milliseconds, used by the
+                "poll" backend. Defaults to 300.
+            backend (str, optional): "qt", "poll" or "auto" (Qt signals where the
+                platform delivers them reliably, polling elsewhere). Defaults to "auto".
+            debounce_ms (int, optional): How long the "qt" backend waits for further
+                changes before reading the clipboard. Defaults to 75.
+            watch_selection (bool, optional): Also react to the X11 primary selection
+                (text highlighted with the mouse). Defaults to False.
+
+        Raises:
+            ValueError: If `backend` is not one of `BACKENDS`.
 
         Example:
             >>> def handle_text(text):
             ...     print(f"New clipboard text: {text}")
             >>> service = ClipboardService(callback=handle_text, interval=500)
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown clipboard backend '{backend}', expected one of {BACKENDS}")
         self.callback = callback
-        self.last_clipboard_text = ""
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_clipboard)
+        self.last_clipboard_hash = None
         self.interval = interval
+        self.debounce_ms = debounce_ms
+        self.watch_selection = watch_selection
+        self.backend = _resolve_backend(backend)
+        self.clipboard = QGuiApplication.clipboard() if self.backend == "qt" else None
+        self._pending_mode = QClipboard.Clipboard
+
+        self.timer = QTimer()
+        if self.backend == "qt":
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self._read_pending)
+        else:
+            self.timer.timeout.connect(self.check_clipboard)
         self.running = False
         self.start()
 
     def start(self):
-        if not self.running:
+        if self.running:
+            return
+        if self.backend == "qt":
+            self.clipboard.dataChanged.connect(self._on_clipboard_changed)
+            if self.watch_selection and self.clipboard.supportsSelection():
+                self.clipboard.selectionChanged.connect(self._on_selection_changed)
+        else:
             self.timer.start(self.interval)
-            self.running = True
+        self.running = True
 
     def stop(self):
-        if self.running:
-            self.timer.stop()
-            self.running = False
+        if not self.running:
+            return
+        self.timer.stop()
+        if self.backend == "qt":
+            self.clipboard.dataChanged.disconnect(self._on_clipboard_changed)
+            if self.watch_selection and self.clipboard.supportsSelection():
+                self.clipboard.selectionChanged.disconnect(self._on_selection_changed)
+        self.running = False
 
     def check_clipboard(self):
         """
-        Check the system clipboard for new text.
+        Check the system clipboard for new text (the "poll" backend).
 
         If the clipboard contains text that differs from the last processed
         text and is longer than two characters, the callback function is triggered.
         """
-        text = pyperclip.paste().strip()
-        if text and text != self.last_clipboard_text and len(text) > 2:
-            self.last_clipboard_text = text
+        import pyperclip
+        self._process(pyperclip.paste())
+
+    def _on_clipboard_changed(self):
+        self._schedule(QClipboard.Clipboard)
+
+    def _on_selection_changed(self):
+        self._schedule(QClipboard.Selection)
+
+    def _schedule(self, mode):
+        """(Re)start the debounce timer; only the last change of a burst is read."""
+        self._pending_mode = mode
+        self.timer.start(self.debounce_ms)
+
+    def _read_pending(self):
+        self._process(self.clipboard.text(self._pending_mode))
+
+    def _process(self, text):
+        """Trigger the callback if `text` is new and longer than two characters."""
+        text = text.strip()
+        if len(text) <= 2:
+            return
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        if digest != self.last_clipboard_hash:
+            self.last_clipboard_hash = digest
             self.callback(text)
+
+
+def _resolve_backend(backend):
+    """Pick the backend for "auto" and fall back to polling when Qt has no clipboard."""
+    if backend == "auto":
+        # Qt only sees other applications' copies reliably on Windows and X11
+        backend = "qt" if QGuiApplication.platformName() in ("windows", "xcb") else "poll"
+    if backend == "qt" and QGuiApplication.instance() is None:
+        print("Warning: no Qt application for clipboard signals; polling the clipboard instead")
+        backend = "poll"
+    return backend
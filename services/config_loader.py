@@ -23,3 +23,39 @@ def load_config():
     """
     with open(config_path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+def save_config(config: dict):
+    """
+    Write configuration settings back to the 'config.json' file.
+
+    The file is replaced atomically, so an interrupted write never leaves a
+    truncated configuration behind.
+
+    Args:
+        config (dict): The complete configuration to store.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    temp_path = config_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(temp_path, config_path)
+
+
+def resolve_path(path: str) -> str:
+    """
+    Resolve a path from the configuration file.
+
+    Relative paths are interpreted relative to the application directory
+    (the folder that contains 'config.json'); absolute paths are returned unchanged.
+
+    Args:
+        path (str): The path as written in the configuration.
+
+    Returns:
+        str: An absolute path.
+    """
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
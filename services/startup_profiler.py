@@ -0,0 +1,178 @@
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+# Set this environment variable (or pass --profile-startup) to print the startup report
+PROFILE_ENV_VAR = "BALIGH_PROFILE_STARTUP"
+PROFILE_FLAG = "--profile-startup"
+
+
+class StartupProfiler:
+    """
+    Collects how long each startup stage takes and prints a breakdown.
+
+    Stages are recorded in the order they finish. When the profiler is disabled,
+    timing still happens (it is cheap) but nothing is printed.
+
+    Attributes:
+        enabled (bool): Whether `report()` prints anything.
+        stages (list[tuple[str, float]]): (stage name, seconds) pairs.
+    """
+    def __init__(self, enabled: bool, started_at: float = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled (bool): Whether the report should be printed.
+            started_at (float, optional): `time.perf_counter()` value taken at the very
+                start of the process. Defaults to now.
+        """
+        self.enabled = enabled
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.stages = []
+
+    @classmethod
+    def from_environment(cls, started_at: float = None):
+        """
+        Create a profiler enabled by `--profile-startup` or `BALIGH_PROFILE_STARTUP=1`.
+
+        Args:
+            started_at (float, optional): See `__init__`.
+
+        Returns:
+            StartupProfiler: The profiler.
+        """
+        enabled = PROFILE_FLAG in sys.argv or os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+        return cls(enabled, started_at)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time the body of a `with` block as one stage.
+
+        Args:
+            name (str): The stage name shown in the report.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """
+        Record a stage measured elsewhere (e.g., on the model loading thread).
+
+        Args:
+            name (str): The stage name shown in the report.
+            seconds (float): The stage duration.
+        """
+        self.stages.append((name, seconds))
+
+    def report(self) -> str:
+        """
+        Print (if enabled) and return the startup breakdown.
+
+        Returns:
+            str: One line per stage plus the total time since process start.
+        """
+        lines = ["Startup timing:"]
+        for name, seconds in self.stages:
+            lines.append(f"  {name:<20} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<20} {(time.perf_counter() - self.started_at) * 1000:8.1f} ms")
+        text = "\n".join(lines)
+        if self.enabled:
+            print(text)
+        return text
+
+
+# Modules the entry point must not import: they are loaded on the engine's thread, after the UI appears
+HEAVY_MODULES = ("torch", "transformers", "onnxruntime")
+
+# The top-level package, whatever the folder of the checkout is called
+_PACKAGE = __package__.split(".")[0]
+
+
+def measure_import_time(module: str = f"{_PACKAGE}.main", runs: int = 3) -> float:
+    """
+    Measure how long importing a module takes in a fresh interpreter.
+
+    Each run uses a new process so nothing is already cached in `sys.modules`;
+    the fastest run is returned to reduce noise.
+
+    Args:
+        module (str, optional): The module to import. Defaults to the entry point.
+        runs (int, optional): How many processes to start. Defaults to 3.
+
+    Returns:
+        float: The fastest import time in milliseconds.
+
+    Raises:
+        subprocess.CalledProcessError: If the import fails.
+    """
+    code = (f"import time; start = time.perf_counter(); import {module}; "
+            f"print((time.perf_counter() - start) * 1000)")
+    return min(float(_run_fresh(code).splitlines()[-1]) for _ in range(runs))
+
+
+def heavy_modules_imported(module: str = f"{_PACKAGE}.main", heavy=HEAVY_MODULES) -> list:
+    """
+    List the heavy modules that importing a module pulls in, in a fresh interpreter.
+
+    Unlike an import time, this does not depend on how fast the machine is.
+
+    Args:
+        module (str, optional): The module to import. Defaults to the entry point.
+        heavy (Iterable[str], optional): The modules to look for. Defaults to `HEAVY_MODULES`.
+
+    Returns:
+        list[str]: The modules of `heavy` found in `sys.modules` after the import.
+
+    Raises:
+        subprocess.CalledProcessError: If the import fails.
+    """
+    code = (f"import sys; import {module}; "
+            f"print(','.join(name for name in {list(heavy)!r} if name in sys.modules))")
+    output = _run_fresh(code).splitlines()[-1].strip()
+    return output.split(",") if output else []
+
+
+def _run_fresh(code):
+    """Run Python code in a new interpreter that can import this package; return its stdout."""
+    # The folder containing the package, found from where it was imported (its name may differ from the
+    # checkout's, e.g. through a symlink or an installed copy)
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(sys.modules[_PACKAGE].__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_parent, env.get("PYTHONPATH")]))
+    return subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True,
+                          text=True).stdout
+
+
+def check_import_budget() -> int:
+    """
+    Compare the entry point's import time against `startup_budget.import_ms` in config.json,
+    and check that it imports none of the `HEAVY_MODULES`.
+
+    Meant to be run in CI: `python -m baligh.services.startup_profiler`.
+
+    Returns:
+        int: 0 if the import time is within budget and no `HEAVY_MODULES` are
+        imported, 1 otherwise.
+    """
+    from baligh.services.config_loader import load_config
+
+    budget_ms = load_config().get("startup_budget", {}).get("import_ms", 1500)
+    import_ms = measure_import_time()
+    within_budget = import_ms <= budget_ms
+    print(f"Import of baligh.main took {import_ms:.1f} ms (budget {budget_ms} ms): "
+          f"{'OK' if within_budget else 'OVER BUDGET'}")
+    heavy = heavy_modules_imported()
+    if heavy:
+        print(f"Importing baligh.main also imported {', '.join(heavy)}")
+    return 0 if within_budget and not heavy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(check_import_budget())
@@ -0,0 +1,115 @@
+import json
+import os
+
+import pytest
+
+from baligh.core.bulk_pipeline import BulkTranslator
+
+
+class StubEngine:
+    """Translates by upper-casing and records every sentence sent to the "model"."""
+    model_id = "stub"
+
+    def __init__(self):
+        self.translated = []
+
+    def encode(self, texts, src_lang):
+        return list(texts)
+
+    def translate_encoded(self, encoded, src_lang, tgt_lang, max_length, num_beams, batch_size, max_batch_tokens):
+        self.translated.extend(encoded)
+        return [text.upper() for text in encoded]
+
+    def translate_batch(self, texts, src_lang, tgt_lang, max_length, num_beams):
+        self.translated.extend(texts)
+        return [text.upper() for text in texts]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def translator(engine, **kwargs):
+    return BulkTranslator(engine, "eng_Latn", "fra_Latn", batch_size=kwargs.pop("batch_size", 2), **kwargs)
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+
+def test_text_file_keeps_lines_and_translates_each_sentence_once(tmp_path):
+    source = write_lines(tmp_path / "in.txt", ["Hello there. Bye.", "", "Hello there.", "- Bye."])
+    engine = StubEngine()
+    stats = translator(engine).translate_file(source, str(tmp_path / "out.txt"))
+
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "HELLO THERE. BYE.\n\nHELLO THERE.\n- BYE.\n"
+    assert sorted(engine.translated) == ["Bye.", "Hello there."]
+    assert (stats["records"], stats["segments"], stats["translated_segments"]) == (4, 4, 2)
+    assert not os.path.exists(str(tmp_path / "out.txt") + ".checkpoint.json")
+
+
+def test_sentences_leaving_the_dedup_window_are_translated_again(tmp_path):
+    source = write_lines(tmp_path / "in.txt", ["Apple.", "Pear.", "Apple."])
+    engine = StubEngine()
+    stats = translator(engine, batch_size=1, dedup_entries=1).translate_file(source, str(tmp_path / "out.txt"))
+
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "APPLE.\nPEAR.\nAPPLE.\n"
+    assert engine.translated.count("Apple.") == 2
+    assert stats["translated_segments"] == 3
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(tmp_path):
+    lines = [f"Sentence number {i}." for i in range(10)]
+    source = write_lines(tmp_path / "in.txt", lines)
+    output = str(tmp_path / "out.txt")
+
+    def interrupt(stats):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        translator(StubEngine()).translate_file(source, output, checkpoint_every=4, progress=interrupt)
+    checkpoint_path = output + ".checkpoint.json"
+    with open(checkpoint_path, encoding="utf-8") as f:
+        assert json.load(f)["records_done"] == 4
+
+    engine = StubEngine()
+    stats = translator(engine).translate_file(source, output, checkpoint_every=4)
+    assert stats["resumed_from"] == 4
+    assert engine.translated == lines[4:]
+    with open(output, encoding="utf-8") as f:
+        assert f.read() == "".join(line.upper() + "\n" for line in lines)
+    assert not os.path.exists(checkpoint_path)
+
+
+def test_checkpoint_of_another_job_is_rejected(tmp_path):
+    source = write_lines(tmp_path / "in.txt", [f"Line {i}." for i in range(4)])
+    output = str(tmp_path / "out.txt")
+
+    def interrupt(stats):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        translator(StubEngine()).translate_file(source, output, checkpoint_every=2, progress=interrupt)
+    other = BulkTranslator(StubEngine(), "eng_Latn", "deu_Latn")
+    with pytest.raises(ValueError):
+        other.translate_file(source, output)
+
+
+def test_jsonl_field_is_translated_into_the_output_field(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text('{"id": 1, "text": "Hi."}\n\n{"id": 2}\n', encoding="utf-8")
+    translator(StubEngine()).translate_file(str(source), str(tmp_path / "out.jsonl"), output_field="text_fr")
+
+    lines = (tmp_path / "out.jsonl").read_text(encoding="utf-8").split("\n")
+    assert json.loads(lines[0]) == {"id": 1, "text": "Hi.", "text_fr": "HI."}
+    assert lines[1] == ""
+    assert json.loads(lines[2]) == {"id": 2, "text_fr": ""}
+
+
+@pytest.mark.parametrize("line", ['"just a string"', '["a", "list"]', '{"text": 5}', "{not json"])
+def test_jsonl_lines_that_are_not_objects_report_their_line(tmp_path, line):
+    source = tmp_path / "in.jsonl"
+    source.write_text('{"text": "Fine."}\n' + line + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="line 2"):
+        translator(StubEngine()).translate_file(str(source), str(tmp_path / "out.jsonl"))
@@ -0,0 +1,82 @@
+from baligh.core.document_history import DocumentHistory
+from baligh.core.metrics import InMemoryMetrics
+from baligh.core.translation_engine import TranslationEngine
+
+SETTINGS = ("eng_Latn", "fra_Latn", 128, 1)
+
+
+class CountingEngine(TranslationEngine):
+    """The document methods of the real engine over a fake model that upper-cases and counts segments."""
+    def __init__(self):
+        self.metrics = InMemoryMetrics()
+        self.translation_memory = None
+        self.translated = []
+
+    def translate_batch(self, texts, src_lang, tgt_lang, max_length=500, num_beams=3, **kwargs):
+        self.translated.extend(texts)
+        return [text.upper() for text in texts]
+
+    def translate_stream(self, text, src_lang, tgt_lang, max_length=500, num_beams=1, **kwargs):
+        self.translated.append(text)
+        yield text.upper()
+
+
+def test_nothing_is_reused_without_a_previous_document():
+    assert DocumentHistory().reuse(["One.", "Two."], *SETTINGS) == [None, None]
+
+
+def test_only_edited_and_inserted_segments_are_missing():
+    history = DocumentHistory()
+    history.record(["One.", "Two.", "Three.", "Four."], ["1", "2", "3", "4"], *SETTINGS)
+    # "Two." was edited, "New." inserted and "Four." deleted
+    assert history.reuse(["One.", "Two!", "Three.", "New."], *SETTINGS) == ["1", None, "3", None]
+
+
+def test_documents_are_kept_per_settings():
+    history = DocumentHistory(max_documents=1)
+    history.record(["One."], ["Un."], *SETTINGS)
+    assert history.reuse(["One."], "eng_Latn", "deu_Latn", 128, 1) == [None]
+    assert history.reuse(["One."], "eng_Latn", "fra_Latn", 128, 4) == [None]
+
+    history.record(["One."], ["Eins."], "eng_Latn", "deu_Latn", 128, 1)
+    assert history.reuse(["One."], *SETTINGS) == [None]  # evicted
+    history.clear()
+    assert history.reuse(["One."], "eng_Latn", "deu_Latn", 128, 1) == [None]
+
+
+def test_edited_document_only_retranslates_changed_segments():
+    engine, history = CountingEngine(), DocumentHistory()
+    text = "First sentence. Second sentence.\n- Third sentence."
+    assert engine.translate_document(text, "eng_Latn", "fra_Latn", 128, 1, history=history) == \
+        "FIRST SENTENCE. SECOND SENTENCE.\n- THIRD SENTENCE."
+    assert len(engine.translated) == 3
+
+    engine.translated.clear()
+    edited = "First sentence. Second sentence, edited.\n- Third sentence.\n- Fourth sentence."
+    assert engine.translate_document(edited, "eng_Latn", "fra_Latn", 128, 1, history=history) == \
+        "FIRST SENTENCE. SECOND SENTENCE, EDITED.\n- THIRD SENTENCE.\n- FOURTH SENTENCE."
+    assert engine.translated == ["Second sentence, edited.", "Fourth sentence."]
+    assert engine.metrics.snapshot()["counters"]["segments_reused_total"] == 2
+
+    engine.translated.clear()
+    engine.translate_document(edited, "eng_Latn", "fra_Latn", 128, 1, history=history)
+    assert engine.translated == []
+
+
+def test_history_is_not_shared_across_settings():
+    engine, history = CountingEngine(), DocumentHistory()
+    engine.translate_document("One. Two.", "eng_Latn", "fra_Latn", 128, 1, history=history)
+    engine.translated.clear()
+    engine.translate_document("One. Two.", "eng_Latn", "fra_Latn", 128, 4, history=history)
+    assert engine.translated == ["One.", "Two."]
+
+
+def test_stream_reuses_an_unchanged_first_sentence():
+    engine, history = CountingEngine(), DocumentHistory()
+    list(engine.translate_document_stream("One. Two. Three.", "eng_Latn", "fra_Latn", 128, history=history))
+
+    engine.translated.clear()
+    outputs = list(engine.translate_document_stream("One. Two. Three, edited.", "eng_Latn", "fra_Latn", 128,
+                                                    history=history))
+    assert engine.translated == ["Three, edited."]
+    assert outputs == ["ONE. ", "ONE. TWO. THREE, EDITED."]
@@ -0,0 +1,35 @@
+import pytest
+
+from baligh.core.engine_pool import _worker_engine_kwargs
+
+
+def test_workers_get_their_thread_count_in_the_backend_options():
+    engine_kwargs = {"model_path": "model", "backend": "onnx",
+                     "backend_options": {"intra_op_threads": 16, "inter_op_threads": 1, "cpu_affinity": [0, 1]}}
+    assert _worker_engine_kwargs(engine_kwargs, 2) == {
+        "model_path": "model", "backend": "onnx", "backend_options": {"intra_op_threads": 2, "inter_op_threads": 1}}
+    assert _worker_engine_kwargs({"backend_options": None}, 3) == {"backend_options": {"intra_op_threads": 3}}
+    # The caller's options are left alone
+    assert engine_kwargs["backend_options"]["intra_op_threads"] == 16
+
+
+@pytest.mark.parametrize("backend", ["torch", "onnx"])
+def test_pool_matches_a_single_engine(tmp_path_factory, backend):
+    pytest.importorskip("onnxruntime")
+    torch = pytest.importorskip("torch")
+    from baligh.benchmarks.fixture import SRC_LANG, TGT_LANG, build_tiny_model, sample_text
+    from baligh.core.engine_pool import EnginePool
+    from baligh.core.translation_engine import TranslationEngine
+
+    model_path = build_tiny_model(str(tmp_path_factory.mktemp("tiny-nllb")))
+    texts = [sample_text(5, offset) for offset in range(4)]
+    expected = TranslationEngine(model_path=model_path, device=torch.device("cpu"), backend=backend) \
+        .translate_batch(texts, SRC_LANG, TGT_LANG, 16, 1)
+
+    pool = EnginePool({"model_path": model_path, "precision": "fp32", "backend": backend}, num_workers=2,
+                      threads_per_worker=2)
+    try:
+        assert pool.model_id.endswith(f":{backend}-fp32")
+        assert pool.translate_batch(texts, SRC_LANG, TGT_LANG, 16, 1) == expected
+    finally:
+        pool.shutdown()
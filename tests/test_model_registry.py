@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from baligh.core.model_registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class FakeEngine:
+    backend = None  # no torch model: the registry counts the weight files
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+
+class BlockingFactory:
+    """Builds fake engines; a model listed in `blocked` finishes loading only once released."""
+    def __init__(self, *blocked):
+        self.started = {path: threading.Event() for path in blocked}
+        self.release = {path: threading.Event() for path in blocked}
+        self.loading, self.max_loading = 0, 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model_path):
+        with self._lock:
+            self.loading += 1
+            self.max_loading = max(self.max_loading, self.loading)
+        try:
+            if model_path in self.started:
+                self.started[model_path].set()
+                assert self.release[model_path].wait(5)
+            return FakeEngine(model_path)
+        finally:
+            with self._lock:
+                self.loading -= 1
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    def make(name, size_mb):
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / "model.safetensors").write_bytes(b"\0" * int(size_mb * MB))
+        return str(folder)
+    return make
+
+
+def registry(factory, default, routes, budget_mb):
+    return ModelRegistry(factory, default, routes, memory_budget_mb=budget_mb, preload_default=False, warmup=False)
+
+
+def loaded(reg):
+    return sorted(path for path, stats in reg.stats().items() if stats["loaded"])
+
+
+def test_least_recently_used_model_is_evicted(model_dir):
+    default, fr, de = model_dir("default", 1), model_dir("fr", 1), model_dir("de", 1)
+    reg = registry(FakeEngine, default, [{"model_path": fr, "pairs": [["eng_Latn", "fra_Latn"]]},
+                                         {"model_path": de, "pairs": [["eng_Latn", "deu_Latn"]]}], 2.5)
+    reg.engine_for("eng_Latn", "fra_Latn")
+    reg.engine_for("eng_Latn", "deu_Latn")
+    reg.engine_for("eng_Latn", "fra_Latn")
+    reg.engine_for("eng_Latn", "spa_Latn")  # the default model; "de" is the least recently used
+    assert loaded(reg) == sorted([default, fr])
+    assert reg.stats()[de]["evictions"] == 1
+
+
+def test_concurrent_loads_stay_within_the_budget(model_dir):
+    default, fr = model_dir("default", 1), model_dir("fr", 1)
+    factory = BlockingFactory(default)
+    reg = registry(factory, default, [{"model_path": fr, "pairs": [["eng_Latn", "fra_Latn"]]}], 1.5)
+
+    first = threading.Thread(target=reg.engine_for, args=("eng_Latn", "spa_Latn"))
+    first.start()
+    assert factory.started[default].wait(5)
+    second = threading.Thread(target=reg.engine_for, args=("eng_Latn", "fra_Latn"))
+    second.start()
+    # Both models do not fit together: the second load waits for the first one
+    second.join(0.2)
+    assert second.is_alive()
+    factory.release[default].set()
+    first.join(5)
+    second.join(5)
+
+    assert factory.max_loading == 1
+    assert loaded(reg) == [fr]
+    assert reg.stats()[default]["evictions"] == 1
+
+
+def test_loads_that_fit_run_concurrently(model_dir):
+    default, fr = model_dir("default", 1), model_dir("fr", 1)
+    factory = BlockingFactory(default, fr)
+    reg = registry(factory, default, [{"model_path": fr, "pairs": [["eng_Latn", "fra_Latn"]]}], 2.5)
+
+    threads = [threading.Thread(target=reg.engine_for, args=pair)
+               for pair in (("eng_Latn", "spa_Latn"), ("eng_Latn", "fra_Latn"))]
+    for thread in threads:
+        thread.start()
+    assert factory.started[default].wait(5) and factory.started[fr].wait(5)
+    for path in (default, fr):
+        factory.release[path].set()
+    for thread in threads:
+        thread.join(5)
+    assert factory.max_loading == 2
+    assert loaded(reg) == sorted([default, fr])
+
+
+def test_failed_load_releases_its_reservation(model_dir):
+    default, fr = model_dir("default", 1), model_dir("fr", 1)
+
+    def factory(model_path):
+        if model_path == fr:
+            raise OSError("corrupt weights")
+        return FakeEngine(model_path)
+
+    reg = registry(factory, default, [{"model_path": fr, "pairs": [["eng_Latn", "fra_Latn"]]}], 1.5)
+    with pytest.raises(OSError):
+        reg.engine_for("eng_Latn", "fra_Latn")
+    start = time.monotonic()
+    reg.engine_for("eng_Latn", "spa_Latn")
+    assert time.monotonic() - start < 1
+    assert loaded(reg) == [default]
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+
+from baligh.benchmarks.fixture import SRC_LANG, TGT_LANG, build_tiny_model, sample_text
+from baligh.core.translation_engine import TranslationEngine
+
+
+@pytest.fixture(scope="module")
+def engines(tmp_path_factory):
+    model_path = build_tiny_model(str(tmp_path_factory.mktemp("tiny-nllb")))
+    device = torch.device("cpu")
+    return (TranslationEngine(model_path=model_path, device=device, backend="torch"),
+            TranslationEngine(model_path=model_path, device=device, backend="onnx"))
+
+
+@pytest.mark.parametrize("num_beams", [1, 2, 4])
+@pytest.mark.parametrize("max_length", [16, 48])
+def test_onnx_matches_torch(engines, num_beams, max_length):
+    torch_engine, onnx_engine = engines
+    for num_words in (3, 8, 20):
+        for offset in range(5):
+            text = sample_text(num_words, offset)
+            expected = torch_engine.translate(text, SRC_LANG, TGT_LANG, max_length, num_beams)
+            assert onnx_engine.translate(text, SRC_LANG, TGT_LANG, max_length, num_beams) == expected
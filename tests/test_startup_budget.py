@@ -0,0 +1,6 @@
+from baligh.services.startup_profiler import HEAVY_MODULES, heavy_modules_imported
+
+
+def test_entry_point_does_not_import_heavy_modules():
+    # Checked by module rather than by milliseconds, so slow or shared machines do not make it flaky
+    assert heavy_modules_imported() == [], f"importing baligh.main must not import any of {HEAVY_MODULES}"
@@ -0,0 +1,74 @@
+import pytest
+
+from baligh.core.text_segmenter import segment_text
+
+LAYOUTS = [
+    "One sentence.",
+    "First sentence. Second one! Third?",
+    "Paragraph one.\n\nParagraph two, after a blank line.\n",
+    "- Bullet one. More text.\n* Bullet two\n• Bullet three\n",
+    "1. First step.\n2) Second step.\n(a) Sub-item.\n",
+    "    Indented line.\n\tTabbed line.\n",
+    "Trailing spaces.   \nWindows line endings.\r\nOld Mac ending.\rEnd",
+    "Dr. Smith met Mr. J. Doe, e.g. at noon. Then they left.",
+    "\n\n  \nText after empty lines.\n\n\n",
+    "> Quoted reply. Second sentence.\n",
+    "مرحبا بكم. كيف حالك؟ شكرا.",
+    "这是第一句。这是第二句！",
+]
+
+
+@pytest.mark.parametrize("text", LAYOUTS)
+def test_reassembling_the_segments_restores_the_text(text):
+    doc = segment_text(text)
+    assert doc.reassemble(doc.segments) == text
+
+
+@pytest.mark.parametrize("text", LAYOUTS)
+def test_layout_is_kept_around_translations(text):
+    doc = segment_text(text)
+    translated = doc.reassemble([f"<{i}>" for i in range(len(doc.segments))])
+    # Everything but the segments is copied verbatim
+    expected = text
+    for i, segment in enumerate(doc.segments):
+        expected = expected.replace(segment, f"<{i}>", 1)
+    assert translated == expected
+
+
+def test_bullets_and_blank_lines_stay_out_of_segments():
+    doc = segment_text("- Hello. How are you?\n\n2. Fine!\n")
+    assert doc.segments == ["Hello.", "How are you?", "Fine!"]
+    assert doc.reassemble(["Bonjour.", "Comment allez-vous ?", "Bien !"]) == \
+        "- Bonjour. Comment allez-vous ?\n\n2. Bien !\n"
+
+
+def test_abbreviations_and_initials_do_not_end_sentences():
+    doc = segment_text("Dr. Smith met Mr. J. Doe, e.g. at noon. Then they left.")
+    assert doc.segments == ["Dr. Smith met Mr. J. Doe, e.g. at noon.", "Then they left."]
+
+
+def test_long_sentences_are_split_below_the_limit():
+    text = ", ".join(f"clause number {i} of a very long sentence" for i in range(40)) + "."
+    doc = segment_text(text, max_segment_chars=100)
+    assert len(doc.segments) > 1
+    assert all(len(segment) <= 100 for segment in doc.segments)
+    assert doc.reassemble(doc.segments) == text
+
+
+def test_unbreakable_runs_are_hard_wrapped():
+    text = "x" * 250
+    doc = segment_text(text, max_segment_chars=100)
+    assert [len(segment) for segment in doc.segments] == [100, 100, 50]
+    assert doc.reassemble(doc.segments) == text
+
+
+def test_partial_reassembly_stops_after_the_last_translation():
+    doc = segment_text("- One. Two.\n- Three.")
+    assert doc.reassemble_partial(["Un."]) == "- Un. "
+    assert doc.reassemble_partial(["Un.", "Deux.", "Trois."]) == "- Un. Deux.\n- Trois."
+
+
+def test_wrong_number_of_translations_is_rejected():
+    doc = segment_text("One. Two.")
+    with pytest.raises(ValueError):
+        doc.reassemble(["Un."])
@@ -0,0 +1,158 @@
+import threading
+import types
+
+import pytest
+
+from baligh.core import translation_cache
+from baligh.core.translation_cache import TranslationCache
+
+
+class FakeClock:
+    """Stands in for the `time` module of the cache, so entries can be aged."""
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(translation_cache, "time", types.SimpleNamespace(time=fake.time))
+    return fake
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache" / "translations.sqlite3")
+
+
+def key(text):
+    return TranslationCache.make_key(text, "eng_Latn", "fra_Latn", 128, 1, "model")
+
+
+def test_key_normalization():
+    assert key("caf\u00e9") == key("cafe\u0301")  # NFC and NFD forms
+    assert key("line one\r\nline two\rline three") == key("line one\nline two\nline three")
+    assert key("  trailing   \nspaces\t\n") == key("trailing\nspaces")
+    assert key("hello") != key("Hello")
+    assert key("hello") != TranslationCache.make_key("hello", "eng_Latn", "deu_Latn", 128, 1, "model")
+    assert key("hello") != TranslationCache.make_key("hello", "eng_Latn", "fra_Latn", 128, 1, "other")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TranslationCache(max_memory_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # "b" is now the least recently used
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_disk_tier_survives_memory_eviction_and_restart(db_path):
+    cache = TranslationCache(db_path, max_memory_entries=1)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.stats()["memory_entries"] == 1
+    assert cache.get("a") == "A"
+    cache.close()
+
+    reopened = TranslationCache(db_path)
+    assert reopened.get("b") == "B"
+    reopened.close()
+
+
+def test_entries_expire_in_both_tiers(clock, db_path):
+    cache = TranslationCache(db_path, max_age_days=1)
+    cache.put("old", "OLD")
+    clock.now += 2 * 24 * 3600
+    cache.put("new", "NEW")
+    assert cache.get("old") is None
+    assert cache.get("new") == "NEW"
+    cache.close()
+
+    # Expired rows are deleted from disk as well
+    reopened = TranslationCache(db_path, max_age_days=1)
+    assert reopened.stats()["disk_entries"] == 1
+    assert reopened.get("old") is None
+    reopened.close()
+
+
+def test_disk_tier_keeps_most_recently_used_rows(clock, db_path):
+    cache = TranslationCache(db_path, max_memory_entries=1, max_disk_entries=3)
+    for name in "abcde":
+        clock.now += 1
+        cache.put(name, name.upper())
+    clock.now += 1
+    assert cache.get("a") == "A"  # read from disk, which refreshes its access time
+    cache.close()
+
+    reopened = TranslationCache(db_path, max_disk_entries=3)
+    assert reopened.stats()["disk_entries"] == 3
+    assert [reopened.get(name) for name in "abcde"] == ["A", None, None, "D", "E"]
+    reopened.close()
+
+
+def test_get_or_compute_shares_one_computation():
+    cache = TranslationCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "T"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+    second.start()
+    while cache.shared == 0:
+        second.join(0.01)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == ["T", "T"]
+    assert len(calls) == 1
+    assert cache.get("k") == "T"
+
+
+def test_get_or_compute_does_not_cache_errors():
+    cache = TranslationCache()
+
+    def fail():
+        raise RuntimeError("model failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", fail)
+    # Nothing is cached and the next call computes again
+    assert cache.get_or_compute("k", lambda: "T") == "T"
+
+
+def test_each_miss_is_counted_once():
+    cache = TranslationCache()
+    # The service's fast path peeks without counting the miss; get_or_compute counts it
+    assert cache.get("k", count_miss=False) is None
+    assert cache.get_or_compute("k", lambda: "T") == "T"
+    assert cache.get("k", count_miss=False) == "T"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    assert cache.get("missing") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_discard_removes_both_tiers(db_path):
+    cache = TranslationCache(db_path)
+    cache.put("k", "T")
+    cache.discard("k")
+    assert cache.get("k") is None
+    assert cache.stats()["disk_entries"] == 0
+    cache.close()
@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from baligh.core.metrics import InMemoryMetrics
+from baligh.core.translation_memory import TranslationMemory
+
+SENTENCE = "The quarterly report was sent to every member of the board on Monday."
+# Trigram Jaccard similarity to SENTENCE: 0.889
+NEAR_DUPLICATE = "The quarterly report was sent to every member of the board on Monday morning."
+# Trigram Jaccard similarity to SENTENCE: 0.845
+ONE_WORD_CHANGED = "The quarterly report was sent to every member of the board on Tuesday."
+UNRELATED = "Please restart the server before the maintenance window opens."
+
+
+def memory(threshold=0.8, **kwargs):
+    tm = TranslationMemory(threshold=threshold, **kwargs)
+    tm.add(SENTENCE, "eng_Latn", "fra_Latn", "FR")
+    return tm
+
+
+def counters(metrics):
+    return metrics.snapshot()["counters"]
+
+
+def test_exact_match_ignores_whitespace():
+    metrics = InMemoryMetrics()
+    tm = memory(threshold=1.0, metrics=metrics)
+    assert tm.lookup("  The quarterly report was sent\nto every member of the board on Monday. ",
+                     "eng_Latn", "fra_Latn") == "FR"
+    assert counters(metrics) == {"tm_exact_hits_total": 1}
+
+
+def test_default_threshold_only_matches_exactly():
+    tm = TranslationMemory()
+    tm.add(SENTENCE, "eng_Latn", "fra_Latn", "FR")
+    assert tm.lookup(NEAR_DUPLICATE, "eng_Latn", "fra_Latn") is None
+
+
+def test_near_duplicate_is_found():
+    metrics = InMemoryMetrics()
+    tm = memory(metrics=metrics)
+    assert tm.lookup(NEAR_DUPLICATE, "eng_Latn", "fra_Latn") == "FR"
+    assert tm.lookup(ONE_WORD_CHANGED, "eng_Latn", "fra_Latn") == "FR"
+    assert counters(metrics) == {"tm_fuzzy_hits_total": 2}
+
+
+@pytest.mark.parametrize("threshold, expected", [(0.84, "FR"), (0.85, None), (0.88, None)])
+def test_threshold_is_respected(threshold, expected):
+    assert memory(threshold).lookup(ONE_WORD_CHANGED, "eng_Latn", "fra_Latn") == expected
+
+
+def test_unrelated_text_misses():
+    metrics = InMemoryMetrics()
+    tm = memory(threshold=0.5, metrics=metrics)
+    assert tm.lookup(UNRELATED, "eng_Latn", "fra_Latn") is None
+    assert counters(metrics) == {"tm_misses_total": 1}
+
+
+def test_fuzzy_match_needs_the_same_numbers():
+    tm = TranslationMemory(threshold=0.5)
+    tm.add("3 files were copied to the backup disk.", "eng_Latn", "fra_Latn", "3 fichiers")
+    assert tm.lookup("3 files were copied to the backup disk!", "eng_Latn", "fra_Latn") == "3 fichiers"
+    assert tm.lookup("4 files were copied to the backup disk.", "eng_Latn", "fra_Latn") is None
+
+
+def test_language_pairs_are_kept_apart():
+    tm = memory()
+    assert tm.lookup(SENTENCE, "eng_Latn", "deu_Latn") is None
+    assert tm.lookup(NEAR_DUPLICATE, "eng_Latn", "deu_Latn") is None
+
+
+def test_most_similar_entry_wins():
+    tm = memory()
+    tm.add(NEAR_DUPLICATE, "eng_Latn", "fra_Latn", "FR morning")
+    assert tm.lookup(NEAR_DUPLICATE.replace("morning", "morning!"), "eng_Latn", "fra_Latn") == "FR morning"
+
+
+def test_least_recently_used_entries_are_dropped():
+    tm = TranslationMemory(max_entries=2)
+    tm.add("One.", "eng_Latn", "fra_Latn", "Un.")
+    tm.add("Two.", "eng_Latn", "fra_Latn", "Deux.")
+    assert tm.lookup("One.", "eng_Latn", "fra_Latn") == "Un."
+    tm.add("Three.", "eng_Latn", "fra_Latn", "Trois.")
+    assert len(tm) == 2
+    assert tm.lookup("Two.", "eng_Latn", "fra_Latn") is None
+    assert tm.lookup("One.", "eng_Latn", "fra_Latn") == "Un."
+
+
+def test_signatures_do_not_depend_on_the_process():
+    code = ("from baligh.core.translation_memory import TranslationMemory\n"
+            "tm = TranslationMemory(seed=7)\n"
+            f"print(tm._signature(tm._shingle_hashes({SENTENCE!r})).tolist())")
+    signatures = set()
+    for hash_seed in ("1", "2"):
+        env = {**os.environ, "PYTHONHASHSEED": hash_seed, "PYTHONPATH": os.pathsep.join(sys.path)}
+        signatures.add(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                                      text=True, check=True).stdout)
+    assert len(signatures) == 1
@@ -0,0 +1,74 @@
+"""
+Bulk file translation from the command line, with the model the desktop app uses.
+
+    python -m baligh.translate_file corpus.txt corpus.fr.txt --tgt-lang fra_Latn
+    python -m baligh.translate_file data.jsonl data.fr.jsonl --field text --output-field text_fr
+
+Plain text files are translated line by line; JSONL files field by field. An
+interrupted job resumes from its checkpoint when started again with the same arguments.
+"""
+import argparse
+import sys
+from baligh.core.bulk_pipeline import FORMATS, BulkTranslator
+from baligh.core.thread_tuning import tuned_backend_options
+from baligh.services.config_loader import load_config
+
+
+def main(argv=None) -> int:
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Translate a text or JSONL file.")
+    parser.add_argument("input", help="The file to translate")
+    parser.add_argument("output", help="Where to write the translation")
+    parser.add_argument("--format", default="auto", choices=("auto",) + FORMATS,
+                        help="Input format (default: by file extension)")
+    parser.add_argument("--field", default="text", help="JSONL field to translate (default: text)")
+    parser.add_argument("--output-field", help="JSONL field to write (default: replace --field)")
+    parser.add_argument("--src-lang", default=config["src_lang"])
+    parser.add_argument("--tgt-lang", default=config["tgt_lang"])
+    parser.add_argument("--max-length", type=int, default=config["max_length"])
+    parser.add_argument("--num-beams", type=int, default=config["num_beams"])
+    parser.add_argument("--model", default=config["model_path"], help="The model folder to use")
+    parser.add_argument("--batch-size", type=int, default=32, help="Distinct sentences per batch")
+    parser.add_argument("--max-batch-tokens", type=int, default=4096, help="Padded input tokens per batch")
+    parser.add_argument("--dedup-entries", type=int, default=100000,
+                        help="How many sentence translations are remembered for duplicates")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--checkpoint-every", type=int, default=500, help="Records between checkpoints")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    from baligh.core.inference_backend import default_device
+    from baligh.core.translation_engine import TranslationEngine
+
+    backend = config.get("backend", "torch")
+    engine = TranslationEngine(model_path=args.model, device=default_device(backend), precision=config.get("precision", "fp32"),
+                               backend=backend, backend_options=tuned_backend_options(config, backend))
+
+    translator = BulkTranslator(engine, args.src_lang, args.tgt_lang, args.max_length, args.num_beams,
+                                batch_size=args.batch_size, max_batch_tokens=args.max_batch_tokens,
+                                dedup_entries=args.dedup_entries)
+
+    def report(stats):
+        print(f"{stats['records']} records done ({stats['segments']} sentences read, "
+              f"{stats['translated_segments']} distinct sentences translated)", flush=True)
+
+    try:
+        stats = translator.translate_file(args.input, args.output, args.format, args.field, args.output_field,
+                                          checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                                          resume=not args.restart, progress=report)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume from the last checkpoint.")
+        return 130
+
+    if stats["resumed_from"]:
+        print(f"Resumed after record {stats['resumed_from']}.")
+    print(f"Translated {stats['records']} records in {stats['seconds']:.1f} s "
+          f"({stats['translated_segments']} of {stats['segments']} sentences sent to the model).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Find the fastest torch intra-op thread count and CPU affinity for this machine.
+
+    python -m baligh.tune_threads
+    python -m baligh.tune_threads --concurrency 2 --dry-run
+
+The model from config.json translates a few clipboard-sized texts under every
+candidate layout (see `candidate_settings`). The fastest one is stored under
+`thread_tuning.hosts` in config.json, keyed by this host, and applied whenever
+an engine is built on this machine.
+"""
+import argparse
+import sys
+import time
+from baligh.core.thread_tuning import available_cores, candidate_settings, host_key, tune_threads
+from baligh.services.config_loader import load_config, save_config
+
+
+def main(argv=None) -> int:
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Tune torch threads and CPU affinity for this machine.")
+    parser.add_argument("--model", default=config["model_path"], help="The model folder to use")
+    parser.add_argument("--src-lang", default=config["src_lang"])
+    parser.add_argument("--tgt-lang", default=config["tgt_lang"])
+    parser.add_argument("--num-beams", type=int, default=config["num_beams"])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per layout")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed rounds per layout")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Translations running at the same time during a round (default 1)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the results without saving them")
+    args = parser.parse_args(argv)
+
+    import torch
+    from baligh.core.translation_engine import TranslationEngine
+
+    # Tuning is for the CPU; the engine starts with torch's defaults so every layout gets a fair run
+    engine = TranslationEngine(model_path=args.model, device=torch.device("cpu"),
+                               precision=config.get("precision", "fp32"), backend="torch")
+
+    def report(result):
+        print(f"threads={result['intra_op_threads']:<3} layout={result['layout']:<8} "
+              f"{result['latency_ms']:9.1f} ms", flush=True)
+
+    candidates = candidate_settings()
+    print(f"Timing {len(candidates)} layouts on {host_key()}...")
+    results = tune_threads(engine, args.src_lang, args.tgt_lang, candidates, num_beams=args.num_beams,
+                           repeat=args.repeat, warmup=args.warmup, concurrency=args.concurrency, progress=report)
+    best = results[0]
+    print(f"Best: {best['intra_op_threads']} intra-op thread(s), layout '{best['layout']}', "
+          f"{best['latency_ms']:.1f} ms per round")
+    # torch's default: one thread per usable core, no pinning
+    default = next((result for result in results if result["layout"] == "all"
+                    and result["intra_op_threads"] == len(available_cores())), None)
+    if default is not None and default is not best:
+        print(f"Default ({default['intra_op_threads']} threads): {default['latency_ms']:.1f} ms per round "
+              f"({default['latency_ms'] / best['latency_ms'] - 1:+.0%} slower)")
+
+    if args.dry_run:
+        return 0
+    config.setdefault("thread_tuning", {}).setdefault("hosts", {})[host_key()] = {
+        "backend": "torch",
+        "intra_op_threads": best["intra_op_threads"],
+        "cpu_affinity": best["cpu_affinity"],
+        "layout": best["layout"],
+        "latency_ms": round(best["latency_ms"], 1),
+        "concurrency": args.concurrency,
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        save_config(config)
+    except OSError as e:
+        print(f"Error: could not save the configuration: {e}")
+        return 1
+    print("Saved to config.json; it applies the next time the engine starts.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
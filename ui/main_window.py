@@ -29,6 +29,7 @@ class TranslatorWindow(QWidget):
         self.last_text = LAST_TRANSLATED_TEXT
         self.translation_service = None
         self.config = None
+        self.language_detector = None
         self.current_language = None
         self.clipboard_enabled = CLIPBOARD_ENABLED_DEFAULT
         self._hovering = HOVER_DEFAULT
@@ -216,14 +217,19 @@ class TranslatorWindow(QWidget):
             Automatically translates any new text copied to the clipboard.
         Technical:
             - Checks if clipboard translation is enabled.
+            - Ignores copies that need no translation (URLs, paths, code, numbers,
+              text already in the target language) when a `language_detector` is set.
             - Expands window and triggers translation.
             - Stops any running animation before starting a new one.
         """
         if not self.clipboard_enabled:
             return
 
-        self.last_text = text
         tgt_lang = self.language_map.get(self.current_language, "arb_Arab")
+        detection = self.language_detector.analyze(text, tgt_lang) if self.language_detector else None
+        if detection is not None and detection.skip_reason is not None:
+            return
+        self.last_text = text
 
         # Ensure that the window is always visible and maximized
         if self.isHidden():
@@ -237,7 +243,7 @@ class TranslatorWindow(QWidget):
         self.animator.expand_right(self.full_width)
 
         # Translation of the text
-        self.translate_text(text, tgt_lang)
+        self.translate_text(text, tgt_lang, detection)
 
     def expand_if_collapsed(self):
         """
@@ -263,7 +269,7 @@ class TranslatorWindow(QWidget):
                 self.animator.animation.stop()
             self.animator.expand_right(self.full_width)
 
-    def translate_text(self, text: str, tgt_lang: str):
+    def translate_text(self, text: str, tgt_lang: str, detection=None):
         """
         Perform asynchronous translation of the given text.
 
@@ -271,22 +277,78 @@ class TranslatorWindow(QWidget):
             Translates the given text and shows the result in the translation box.
         Technical:
             - Uses `translation_service.translate_async()` for non-blocking translation.
-            - Displays a placeholder text before translation finishes.
+            - The source language is detected by `language_detector` (unless a `detection`
+              is passed in); without a detector, `src_lang` from the config is used.
+              Text that needs no translation is shown as it is.
+            - Displays a placeholder text before translation finishes (a "loading model"
+              notice if the engine is still loading; the request is queued until it is ready).
+            - When `streaming` is enabled in the config, shows partial results as they are decoded.
             - Triggers delayed collapse after completion.
         """
+        if detection is None and self.language_detector is not None:
+            detection = self.language_detector.analyze(text, tgt_lang)
+        if detection is not None and detection.skip_reason is not None:
+            if hasattr(self, "translation_box") and self.translation_box:
+                self.translation_box.setText(text)
+            return
+
         if hasattr(self, "translation_box") and self.translation_box:
-            self.translation_box.setText(get_text("Default_Translation_Card"))
+            if self.translation_service.is_ready:
+                self.translation_box.setText(get_text("Default_Translation_Card"))
+            else:
+                self.translation_box.setText(get_text("Loading_Model_Card"))
+
+        def show_translation(translated):
+            return hasattr(self, "translation_box") and self.translation_box.setText(translated)
 
         self.translation_service.translate_async(
             text=text,
-            src_lang=self.config["src_lang"],
+            src_lang=detection.src_lang if detection is not None else self.config["src_lang"],
             tgt_lang=tgt_lang,
             max_length=self.config["max_length"],
             num_beams=self.config["num_beams"],
-            callback=lambda translated: hasattr(self, "translation_box") and self.translation_box.setText(translated)
+            callback=show_translation,
+            partial_callback=show_translation if self.config.get("streaming", True) else None
         )
         self.collapse_after_delay(TRANSLATION_COLLAPSE_DELAY_MS)
 
+    # ---------------- Model loading state ----------------
+    def show_model_loading(self):
+        """
+        Show that the translation model is still loading.
+
+        For beginners:
+            Tells the user the app is getting ready while the AI model loads.
+        Technical:
+            Called right after the window is shown; the engine loads on the worker thread.
+        """
+        if hasattr(self, "translation_box") and self.translation_box:
+            self.translation_box.setText(get_text("Loading_Model_Card"))
+
+    def on_model_loaded(self):
+        """
+        Replace the loading notice once the engine is ready.
+
+        For beginners:
+            Clears the "loading" message, or shows "Translating..." if text is waiting.
+        Technical:
+            Connected to `TranslationWorker.engine_loaded`; queued requests start right after.
+        """
+        if hasattr(self, "translation_box") and self.translation_box.toPlainText() == get_text("Loading_Model_Card"):
+            self.translation_box.setText(get_text("Default_Translation_Card") if self.last_text else "")
+
+    def on_model_failed(self, message: str):
+        """
+        Report that the translation model could not be loaded.
+
+        For beginners:
+            Shows an error message in the translation card.
+        Technical:
+            Connected to `TranslationWorker.engine_failed`; the message is also printed by the worker.
+        """
+        if hasattr(self, "translation_box") and self.translation_box:
+            self.translation_box.setText(get_text("Model_Load_Failed_Card"))
+
     # ---------------- Collapse window after delay ----------------
     def collapse_after_delay(self, delay_ms=TRANSLATION_COLLAPSE_DELAY_MS):
         """